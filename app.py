@@ -1,6 +1,6 @@
 from fastapi import FastAPI,HTTPException, File, UploadFile, BackgroundTasks, Depends, Body, Query, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import os
 import sys
 import logging
@@ -10,21 +10,47 @@ from contextlib import asynccontextmanager
 from models.schema import ConversationSummaryModel
 
 from services.conversation_summarizer.conversation_summarizer import conversation_summarizer_router
+from services.conversation_summarizer.call_summary import call_summary_router
+from services.conversation_summarizer.bulk import bulk_summary_router
 from services.data_extraction.extraction import data_extraction_router
 from services.rag.rag import rag_router
 from services.livekit_api.outbound_call.router import outbound_call_router
 from services.livekit_api.mongodb.routers import user_data_router
 from services.livekit_api.inbound_call.router import inbound_call_router
-from services.livekit_api.call_recording.download import call_recording_router
+from services.livekit_api.call_recording.router import call_recording_router
+from services.livekit_api.agent_profile.router import agent_profile_router
+from utils.agent_runtime import agent_runtime
+from utils.agent_policy import agent_policy
+from utils.startup import prewarm, prewarm_status
+from utils.background import background_jobs
+from utils.executors import configure_starlette_threadpool, executor_metrics, shutdown_executors
+from utils.telemetry import MetricsMiddleware, METRICS_CONTENT_TYPE, metrics_payload, setup_tracing, shutdown_tracing
 
 # Configure logging
 logger = logging.getLogger("Nexus Service")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Routers import nothing heavy; MongoDB, RAG, extraction and the summarizer warm up here
+    setup_tracing()
+    configure_starlette_threadpool()
+    prewarm_task = await prewarm()
+    yield
+    if prewarm_task is not None and not prewarm_task.done():
+        prewarm_task.cancel()
+    # Let running jobs (bulk summaries) finish or flush their partial results before exit
+    await background_jobs.drain()
+    # Shut down MCP servers kept alive by the shared agent runtime
+    await agent_runtime.aclose()
+    shutdown_executors()
+    shutdown_tracing()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Nexus Service API",
     description="API for Nexus Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -35,21 +61,49 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-route request counts, latency histograms and in-flight gauges, plus a server span per request
+app.add_middleware(MetricsMiddleware)
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     try:
         # Simulate a potential error condition (replace with your actual check)
-        return JSONResponse(content={"status": "healthy"})
+        return JSONResponse(content={
+            "status": "healthy",
+            "prewarm": prewarm_status,
+            "background_jobs": background_jobs.running(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail={"status": "error", "message": str(e)})
 
+# Per-agent run latency and token usage, per-model retries, hedges and breaker state, provider rate limits
+@app.get("/agent-metrics")
+async def agent_metrics():
+    return JSONResponse(content={
+        "agents": agent_runtime.metrics(),
+        "models": agent_policy.metrics(),
+        "rate_limits": agent_policy.rate_limits(),
+    })
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=metrics_payload(), media_type=METRICS_CONTENT_TYPE)
+
+# Queue depth and utilization of the named thread pools, the CPU process pool and Starlette's threadpool
+@app.get("/executor-metrics")
+async def get_executor_metrics():
+    return JSONResponse(content=executor_metrics())
+
 
 app.include_router(conversation_summarizer_router, tags=["Conversation Summarizer"])
+app.include_router(call_summary_router, tags=["Conversation Summarizer"])
+app.include_router(bulk_summary_router, tags=["Conversation Summarizer"])
 app.include_router(data_extraction_router, tags=["Data Extraction"])
 app.include_router(rag_router, tags=["RAG"])
 app.include_router(outbound_call_router, prefix="/livekit", tags=["Livekit Outbound Call"])
 app.include_router(inbound_call_router, prefix="/livekit", tags=["Livekit Inbound Call"])
 app.include_router(call_recording_router, prefix="/livekit", tags=["Livekit Call Recording"])
 app.include_router(user_data_router, prefix="/livekit",tags=["Livekit Call Data"])
+app.include_router(agent_profile_router, prefix="/livekit", tags=["Livekit Agent Profile"])
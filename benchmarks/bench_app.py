@@ -0,0 +1,184 @@
+"""
+The Nexus app wired to local stand-ins, for the load benchmark.
+
+Run from the repository root with the stub server (benchmarks/stubs.py) already up:
+
+    BENCH_STUB_URL=http://127.0.0.1:9100 uvicorn bench_app:app --app-dir benchmarks
+
+* MongoDB: mongomock, or the server at BENCH_MONGODB_URI (e.g. a local mongod)
+* Qdrant: an in-memory QdrantClient(":memory:"), or the server at BENCH_QDRANT_URL
+* Embeddings: deterministic hashed vectors with BENCH_EMBED_MS of simulated latency
+* Sparse (BM25) encoder: hashed term frequencies in-process instead of the FastEmbed model
+* Unstructured, LiveKit and OpenRouter: the stub server at BENCH_STUB_URL
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sys
+import time
+import warnings
+from typing import Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+STUB_URL = os.environ.get("BENCH_STUB_URL", "http://127.0.0.1:9100").rstrip("/")
+MONGODB_URI = os.environ.get("BENCH_MONGODB_URI")
+QDRANT_URL = os.environ.get("BENCH_QDRANT_URL")
+EMBED_DIM = int(os.environ.get("BENCH_EMBED_DIM", "768"))
+EMBED_MS = float(os.environ.get("BENCH_EMBED_MS", "20"))
+
+# Settings read at import time by the app modules; set before anything from the app is imported
+os.environ.update({
+    "STARTUP_PREWARM": "off",
+    # The fake sparse model only exists in this process, so BM25 encoding cannot go to the CPU pool
+    "EXECUTOR_CPU_WORKERS": "0",
+    "METRICS_ENABLED": os.environ.get("METRICS_ENABLED", "true"),
+    "OTEL_TRACES_EXPORTER": "none",
+    "MONGODB_URI": MONGODB_URI or "mongodb://mongomock.invalid:27017",
+    "UNSTRUCTURED_API_URL": STUB_URL,
+    "UNSTRUCTURED_API_KEY": "bench",
+    "LIVEKIT_URL": STUB_URL,
+    "LIVEKIT_API_KEY": "bench",
+    "LIVEKIT_API_SECRET": "bench-secret-bench-secret-bench-secret",
+    "RAG_EMBED_BACKEND": "bench",
+    "OPENROUTER_API_KEY": "bench",
+    "GOOGLE_API_KEY": "bench",
+})
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.llms.openrouter import OpenRouter
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app import app  # noqa: F401  (the ASGI app served by uvicorn)
+from services.livekit_api.mongodb import config as mongodb_config
+from services.livekit_api.mongodb import db as mongodb_db
+from services.rag import config as rag_config
+from services.rag import sparse
+from services.rag.embeddings import get_embed_model, register_embed_backend
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in "".join(c.lower() if c.isalnum() else " " for c in text).split() if t]
+
+
+def _bucket(token: str, size: int) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little") % size
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Bag-of-words vectors hashed into `EMBED_DIM` buckets; similar texts get similar vectors."""
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * EMBED_DIM
+        for token in _tokens(text):
+            vector[_bucket(token, EMBED_DIM)] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        time.sleep(EMBED_MS / 1000)
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        await asyncio.sleep(EMBED_MS / 1000)
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        # One simulated round trip per batch, like a remote embedding API
+        time.sleep(EMBED_MS / 1000)
+        return [self._embed(t) for t in texts]
+
+
+class _SparseEmbedding:
+    def __init__(self, indices: np.ndarray, values: np.ndarray):
+        self.indices = indices
+        self.values = values
+
+
+class FakeSparseModel:
+    """Stand-in for fastembed's SparseTextEmbedding: term counts over hashed token ids."""
+
+    def embed(self, texts: List[str], batch_size: int = 256, **kwargs: Any):
+        for text in texts:
+            counts = {}
+            for token in _tokens(text):
+                index = _bucket(token, 2 ** 31)
+                counts[index] = counts.get(index, 0.0) + 1.0
+            yield _SparseEmbedding(np.array(list(counts), dtype=np.int64), np.array(list(counts.values()), dtype=np.float32))
+
+
+def _use_mongomock():
+    import mongomock
+
+    client = mongomock.MongoClient()
+    # The call-data routers go through the shared MongodbClient ...
+    instance = object.__new__(mongodb_config.MongodbClient)
+    instance.mongo_uri = os.environ["MONGODB_URI"]
+    instance.client = client
+    mongodb_config.MongodbClient._instance = instance
+    mongodb_db._client = client
+
+    # ... while extraction storage opens a client per call
+    from services.data_extraction import get_extracted_data
+    from services.data_extraction.utils import save_to_mongodb
+
+    save_to_mongodb.MongoClient = lambda *args, **kwargs: client
+    get_extracted_data.MongoClient = lambda *args, **kwargs: client
+
+
+def _qdrant_clients():
+    if QDRANT_URL:
+        return QdrantClient(url=QDRANT_URL, timeout=30), AsyncQdrantClient(url=QDRANT_URL, timeout=30)
+    client = QdrantClient(":memory:")
+    aclient = AsyncQdrantClient(":memory:")
+    # Two local clients keep separate stores; share one so async queries see what sync indexing wrote
+    aclient._client.collections = client._client.collections
+    aclient._client.aliases = client._client.aliases
+    return client, aclient
+
+
+def _use_rag_stand_ins():
+    config = object.__new__(rag_config.RagConfig)
+    config.openrouter_api_key = "bench"
+    config.google_api_key = "bench"
+    config.qdrant_url = QDRANT_URL or ":memory:"
+    config.qdrant_api_key = None
+    config.client, config.aclient = _qdrant_clients()
+    rag_config._config = config
+
+    Settings.llm = OpenRouter(
+        api_key="bench",
+        api_base=f"{STUB_URL}/api/v1",
+        model="google/gemini-2.0-flash-001",
+        max_tokens=10000,
+        context_window=1000000,
+        temperature=0.3,
+    )
+    register_embed_backend("bench", "bench-fake-embedding", lambda: FakeEmbedding(model_name="bench-fake-embedding"))
+    Settings.embed_model = get_embed_model("bench")
+    Settings.node_parser = SentenceSplitter(chunk_size=2048, chunk_overlap=50, separator="\n\n")
+    sparse._models[sparse.SPARSE_MODEL] = FakeSparseModel()
+
+
+# Per-request INFO logs would dominate the profile; BENCH_LOG_LEVEL=INFO brings them back
+logging.getLogger().setLevel(os.environ.get("BENCH_LOG_LEVEL", "WARNING"))
+for handler in logging.getLogger().handlers:
+    handler.setLevel(logging.NOTSET)
+# Warns on every store that :memory: clients are not synced; _qdrant_clients shares their storage
+logging.getLogger("llama_index.vector_stores.qdrant.base").setLevel(logging.ERROR)
+warnings.filterwarnings("ignore", message="Payload indexes have no effect in the local Qdrant")
+
+if not MONGODB_URI:
+    _use_mongomock()
+_use_rag_stand_ins()
+mongodb_db.ensure_indexes()
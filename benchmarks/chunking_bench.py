@@ -0,0 +1,143 @@
+"""
+Chunking benchmark: Unstructured extraction output as a JSON dump vs element-aware chunks.
+
+Builds a synthetic `--pages`-page extraction result shaped like the Unstructured API's
+(titles, paragraphs, list items, tables, headers and footers, with coordinates, element
+ids and languages), or loads one from --elements-json (a saved `/extract-data` response or
+an element list). It then chunks it with the ingestion node parser both ways:
+* before: process_document_extraction's result as one json.dumps(indent=2) document
+* after: services.rag.elements chunks of element text grouped by section
+
+and reports chunks, embedded tokens and payload bytes per path.
+
+The node parser here uses a regex sentence tokenizer instead of NLTK's, so it runs offline.
+
+Usage:
+    python benchmarks/chunking_bench.py --pages 40
+    python benchmarks/chunking_bench.py --elements-json extraction.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import uuid
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from embedding_bench import WORDS
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_elements(pages: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    elements = []
+
+    def element(kind: str, text: str, page: int, **extra: Any) -> Dict[str, Any]:
+        x, y = rng.uniform(50, 500), rng.uniform(50, 700)
+        return {
+            "type": kind,
+            "element_id": uuid.uuid4().hex,
+            "text": text,
+            "metadata": {
+                "coordinates": {
+                    "points": [[x, y], [x, y + 20], [x + 400, y + 20], [x + 400, y]],
+                    "system": "PixelSpace",
+                    "layout_width": 1700,
+                    "layout_height": 2200,
+                },
+                "filetype": "application/pdf",
+                "languages": ["eng"],
+                "page_number": page,
+                "parent_id": uuid.uuid4().hex,
+                "filename": "tmpx8f2k1_workflow.pdf",
+                **extra,
+            },
+        }
+
+    for page in range(1, pages + 1):
+        elements.append(element("Header", "Acme Solar - Customer Handbook", page))
+        for _ in range(rng.randint(1, 2)):
+            elements.append(element("Title", _sentence(rng, 4)[:-1], page, category_depth=0))
+            for _ in range(rng.randint(2, 5)):
+                elements.append(element("NarrativeText", " ".join(_sentence(rng, rng.randint(8, 20)) for _ in range(3)), page))
+            if rng.random() < 0.4:
+                for _ in range(rng.randint(2, 4)):
+                    elements.append(element("ListItem", _sentence(rng, 8), page))
+            if rng.random() < 0.2:
+                rows = [" ".join(rng.choice(WORDS) for _ in range(4)) for _ in range(5)]
+                elements.append(element("Table", " ".join(rows), page,
+                                        text_as_html="<table>" + "".join(f"<tr><td>{r}</td></tr>" for r in rows) + "</table>"))
+        elements.append(element("Footer", f"Page {page}", page))
+        elements.append(element("PageBreak", "", page))
+    return elements
+
+
+def measure(documents) -> Dict[str, int]:
+    from llama_index.core.node_parser import SentenceSplitter
+    from llama_index.core.schema import MetadataMode
+    from llama_index.core.vector_stores.utils import node_to_metadata_dict
+    from utils.tokens import count_tokens
+
+    # Same settings as RagConfig's node parser
+    parser = SentenceSplitter(
+        chunk_size=2048,
+        chunk_overlap=50,
+        separator="\n\n",
+        chunking_tokenizer_fn=lambda text: re.split(r"(?<=[.!?])\s+", text),
+    )
+    nodes = parser.get_nodes_from_documents(documents)
+    return {
+        "documents": len(documents),
+        "chunks": len(nodes),
+        "embedded_tokens": sum(count_tokens(n.get_content(metadata_mode=MetadataMode.EMBED)) for n in nodes),
+        "payload_bytes": sum(len(json.dumps(node_to_metadata_dict(n, flat_metadata=False))) for n in nodes),
+    }
+
+
+def main() -> int:
+    from llama_index.core import Document
+    from services.rag.elements import elements_to_documents, extraction_elements
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--elements-json", help="Saved extraction result or element list to chunk instead")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.elements_json:
+        with open(args.elements_json) as f:
+            loaded = json.load(f)
+        elements = extraction_elements(loaded)
+        if elements is None:
+            parser.error(f"{args.elements_json} holds no Unstructured elements")
+    else:
+        elements = synthetic_elements(args.pages)
+    # What /extract-and-add-data used to hand to add_data
+    result = {"extraction_result": {"json": elements, "processing_time": 12.3}, "mongodb_saved": True}
+
+    before = measure([Document(text=json.dumps(result, ensure_ascii=False, indent=2), metadata={"source_type": "dict"})])
+    after = measure(elements_to_documents(elements, filename="handbook.pdf"))
+    report = {"elements": len(elements), "before": before, "after": after}
+    for name in ("before", "after"):
+        r = report[name]
+        print(f"{name:6s}  chunks {r['chunks']:5d}  embedded tokens {r['embedded_tokens']:8d}  payload {r['payload_bytes'] / 1024:8.1f} KB")
+    saved = 1 - after["embedded_tokens"] / before["embedded_tokens"] if before["embedded_tokens"] else 0.0
+    print(f"{len(elements)} elements: {saved:.1%} fewer embedded tokens")
+    report["token_reduction"] = round(saved, 3)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
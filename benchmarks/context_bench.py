@@ -0,0 +1,106 @@
+"""
+Context assembly benchmark: tokens sent to LLM synthesis with and without services.rag.context.
+
+Ingests `--docs` synthetic passages of `--words` words into one workflow through the app's
+ingestion path (bench_app stand-ins), where a `--dup-rate` share of them are lightly edited
+copies of another passage, as when the same FAQ or brochure is uploaded in several versions.
+Each of `--queries` queries then retrieves `--top-k` chunks, which are assembled at every
+budget in `--budgets`. Reports the mean context tokens before and after, the chunks dropped
+as duplicates or over budget, and the assembly time. Synthesis time grows with the prompt,
+so the saved tokens are what the budget trades against answer latency.
+
+Usage:
+    python benchmarks/context_bench.py --docs 400 --queries 100 --top-k 8
+    python benchmarks/context_bench.py --budgets 0,1000,2000,4000 --dup-rate 0.5
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+import bench_app  # noqa: F401  (wires the app to the stand-ins before anything else imports it)
+from common import percentile
+from embedding_bench import WORDS, corpus
+
+
+def near_duplicates(texts: List[str], rate: float, seed: int = 11) -> List[str]:
+    """`texts` plus edited copies of a `rate` share of them (about 1 word in 20 changed)."""
+    rng = random.Random(seed)
+    copies = []
+    for text in rng.sample(texts, int(len(texts) * rate)):
+        words = text.split()
+        for i in rng.sample(range(len(words)), max(1, len(words) // 20)):
+            words[i] = rng.choice(WORDS)
+        copies.append(" ".join(words))
+    return texts + copies
+
+
+async def bench(docs: int, words: int, dup_rate: float, queries: int, top_k: int, budgets: List[int]) -> Dict:
+    from services.rag import vector_db, vector_query
+    from services.rag.context import assemble_context
+    from services.rag.embeddings import get_embed_model
+    from services.rag.registry import resolve_collection
+
+    workflow_id = f"bench_context_{int(time.time())}"
+    texts = near_duplicates(corpus(docs, words), dup_rate)
+    for i, text in enumerate(texts):
+        await vector_db.add_data(workflow_id, text, document_id=f"doc-{i}")
+
+    record = await resolve_collection(workflow_id, create=False)
+    embed_model = get_embed_model(record["embed_backend"])
+    engine = vector_query._engine_for(
+        record, embed_model, sparse_top_k=top_k, similarity_top_k=top_k, hybrid_top_k=top_k
+    )
+    retrieved = []
+    for text in corpus(queries, 6, seed=23):
+        _, nodes = await vector_query._retrieve(record, text, embed_model, engine)
+        retrieved.append(nodes)
+
+    report = {"docs": len(texts), "top_k": top_k, "budgets": {}}
+    for budget in budgets:
+        totals = {"tokens_in": 0, "tokens_out": 0, "duplicates": 0, "over_budget": 0, "truncated": 0}
+        timings = []
+        for nodes in retrieved:
+            started = time.perf_counter()
+            _, result = assemble_context(nodes, token_budget=budget)
+            timings.append(time.perf_counter() - started)
+            for key in totals:
+                totals[key] += getattr(result, key)
+        timings.sort()
+        row = {key: round(value / len(retrieved), 1) for key, value in totals.items()}
+        row["saved_pct"] = round(100 * (1 - totals["tokens_out"] / totals["tokens_in"]), 1) if totals["tokens_in"] else 0.0
+        row["p50_ms"] = round(percentile(timings, 0.50) * 1000, 3)
+        row["p95_ms"] = round(percentile(timings, 0.95) * 1000, 3)
+        report["budgets"][budget] = row
+        print(
+            f"budget {budget or 'none':>6}  tokens {row['tokens_in']:8.1f} -> {row['tokens_out']:8.1f}"
+            f" ({row['saved_pct']:4.1f}% saved)  dropped dup {row['duplicates']:.1f} / budget {row['over_budget']:.1f}"
+            f"  assembly p50 {row['p50_ms']:.3f} ms  p95 {row['p95_ms']:.3f} ms"
+        )
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--budgets", default="0,1000,2000,6000", help="Comma-separated token budgets, 0 is unlimited")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    budgets = [int(b) for b in args.budgets.split(",")]
+    report = asyncio.run(bench(args.docs, args.words, args.dup_rate, args.queries, args.top_k, budgets))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Embedding backend benchmark: ingest throughput and query latency per backend.
+
+Embeds a synthetic corpus of `--chunks` passages with each backend (batched the way
+VectorStoreIndex does during ingestion) and then `--queries` short queries, first one
+at a time and then `--concurrency` at once. The local backend uses the CPU process pool
+(EXECUTOR_CPU_WORKERS) for document batches; the Gemini backend is skipped without
+GOOGLE_API_KEY.
+
+Usage:
+    python benchmarks/embedding_bench.py --backend fastembed --backend gemini --chunks 512 --queries 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from common import latency_summary
+
+WORDS = (
+    "solar panel rooftop installation warranty financing survey inverter battery grid subsidy "
+    "tariff meter maintenance cleaning efficiency monsoon shading roof tilt capacity kilowatt "
+    "customer support booking invoice payment refund appointment technician inspection permit"
+).split()
+
+
+def corpus(n: int, words: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + "." for _ in range(n)]
+
+
+async def bench_backend(name: str, texts: List[str], queries: List[str], concurrency: int) -> Optional[Dict]:
+    from services.rag.embeddings import get_embed_backend, get_embed_model
+    from utils.executors import shutdown_executors
+
+    if name == "gemini" and not os.environ.get("GOOGLE_API_KEY"):
+        print(f"{name}: skipped (GOOGLE_API_KEY not set)")
+        return None
+
+    backend = get_embed_backend(name)
+    model = get_embed_model(name)
+
+    # Model load / first connection, and CPU pool start-up, are not part of steady-state cost
+    start = time.perf_counter()
+    model.get_text_embedding_batch(texts[: min(len(texts), 256)])
+    warmup_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = await asyncio.get_event_loop().run_in_executor(None, model.get_text_embedding_batch, texts)
+    ingest_s = time.perf_counter() - start
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for query in queries:
+        t = time.perf_counter()
+        await model.aget_query_embedding(query)
+        latencies.append(time.perf_counter() - t)
+    sequential = latency_summary(latencies, 0, time.perf_counter() - started)
+
+    concurrent_latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query: str):
+        async with semaphore:
+            t = time.perf_counter()
+            await model.aget_query_embedding(query)
+            concurrent_latencies.append(time.perf_counter() - t)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    concurrent = latency_summary(concurrent_latencies, 0, time.perf_counter() - started)
+    shutdown_executors()
+
+    result = {
+        "model": backend.model_id,
+        "dim": len(vectors[0]) if vectors else 0,
+        "warmup_s": round(warmup_s, 2),
+        "ingest_s": round(ingest_s, 3),
+        "ingest_chunks_per_s": round(len(texts) / ingest_s, 1) if ingest_s else 0.0,
+        "query_sequential": sequential,
+        "query_concurrent": concurrent,
+    }
+    print(f"{backend.model_id}: dim {result['dim']}, ingest {result['ingest_chunks_per_s']:.1f} chunks/s, "
+          f"query p50 {sequential['p50_ms']:.1f} ms / p95 {sequential['p95_ms']:.1f} ms, "
+          f"{concurrent['rps']:.1f} queries/s at concurrency {concurrency}")
+    return result
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", help="Backends to compare (repeatable; default fastembed and gemini)")
+    parser.add_argument("--chunks", type=int, default=512, help="Passages to embed for the ingest measurement")
+    parser.add_argument("--words", type=int, default=200, help="Words per passage")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    texts = corpus(args.chunks, args.words)
+    queries = corpus(args.queries, 8, seed=11)
+    report = {}
+    for name in args.backend or ["fastembed", "gemini"]:
+        result = await bench_backend(name, texts, queries, args.concurrency)
+        if result is not None:
+            report[name] = result
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
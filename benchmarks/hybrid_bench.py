@@ -0,0 +1,100 @@
+"""
+Hybrid retrieval benchmark: llama-index client-side fusion vs one fused Query API request.
+
+Ingests `--docs` synthetic passages into one workflow through the app's ingestion path
+(bench_app stand-ins: fake embeddings and BM25, in-memory Qdrant or BENCH_QDRANT_URL),
+then retrieves `--queries` queries with both paths and reports retrieval latency and how
+often both return the same top result. Query embeddings are computed up front, so only
+the search and fusion are timed. The in-memory client has no network and fuses in Python
+either way, so the saved round trip and server-side fusion only show against a server.
+
+Usage:
+    BENCH_EMBED_MS=0 python benchmarks/hybrid_bench.py --docs 2000 --queries 200
+    BENCH_QDRANT_URL=http://localhost:6333 python benchmarks/hybrid_bench.py
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List
+
+import bench_app  # noqa: F401  (wires the app to the stand-ins before anything else imports it)
+from common import latency_summary
+from embedding_bench import corpus
+
+
+async def bench(docs: int, queries: int, top_k: int) -> Dict:
+    from llama_index.core import QueryBundle
+    from services.rag import vector_db, vector_query
+    from services.rag.embeddings import get_embed_model
+    from services.rag.filters import build_query_filter
+    from services.rag.profiles import profile_of
+    from services.rag.registry import resolve_collection
+    from services.rag.tenancy import collection_of
+
+    workflow_id = f"bench_hybrid_{int(time.time())}"
+    start = time.perf_counter()
+    await vector_db.add_data(workflow_id, corpus(docs, 60))
+    ingest_s = time.perf_counter() - start
+
+    record = await resolve_collection(workflow_id, create=False)
+    embed_model = get_embed_model(record["embed_backend"])
+    collection = collection_of(record)
+    query_filter = build_query_filter(record)
+    tops = dict(sparse_top_k=top_k, similarity_top_k=top_k, hybrid_top_k=top_k)
+    engines = {
+        "llama": vector_query._build_query_engine(
+            collection, embed_model=embed_model, query_filter=query_filter, **tops
+        ),
+        "native": vector_query._build_native_query_engine(
+            collection,
+            embed_model=embed_model,
+            query_filter=query_filter,
+            search_params=profile_of(record).search_params(),
+            **tops,
+        ),
+    }
+
+    bundles = []
+    for text in corpus(queries, 6, seed=23):
+        bundles.append(QueryBundle(query_str=text, embedding=await embed_model.aget_query_embedding(text)))
+
+    report = {"docs": docs, "ingest_s": round(ingest_s, 2)}
+    top_ids: Dict[str, List[str]] = {}
+    for name, engine in engines.items():
+        await engine.aretrieve(bundles[0])  # collection info lookups and connection set-up
+        latencies, ids = [], []
+        started = time.perf_counter()
+        for bundle in bundles:
+            t = time.perf_counter()
+            nodes = await engine.aretrieve(bundle)
+            latencies.append(time.perf_counter() - t)
+            ids.append(nodes[0].node.node_id if nodes else "")
+        report[name] = latency_summary(latencies, 0, time.perf_counter() - started)
+        top_ids[name] = ids
+        print(f"{name:7s} retrieve p50 {report[name]['p50_ms']:.2f} ms  p95 {report[name]['p95_ms']:.2f} ms")
+
+    same = sum(a == b for a, b in zip(top_ids["llama"], top_ids["native"]))
+    report["same_top1"] = round(same / len(bundles), 3)
+    print(f"same top result for {report['same_top1']:.1%} of queries")
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(bench(args.docs, args.queries, args.top_k))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
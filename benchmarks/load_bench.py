@@ -0,0 +1,311 @@
+"""
+Load benchmark of the main endpoints against local stand-ins for every external service.
+
+Starts the stub server (benchmarks/stubs.py: Unstructured, LiveKit, OpenRouter with
+configurable latency) and the app wired to it (benchmarks/bench_app.py: mongomock or a
+local mongod, in-memory Qdrant, fake embeddings), seeds calls and a RAG collection, then
+drives each scenario with `--concurrency` clients and reports throughput and p50/p95/p99.
+
+With `--baseline` the run is compared to a previous `--json` report and exits non-zero
+when a scenario's p95 grew or its throughput dropped by more than `--tolerance`.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_bench.py --concurrency 32 --requests 500 --json bench.json
+    python benchmarks/load_bench.py --scenario query-data --llm-ms 300 --baseline bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from common import free_port, latency_summary, stop, wait_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+USER_ID = "bench-user"
+WORKFLOW_ID = "bench-workflow"
+RAG_WORKFLOW_ID = "bench-rag"
+
+SAMPLE_MESSAGES = [
+    {"role": "assistant", "content": "Hello, this is Maya from Acme Solar. Is this a good time to talk?"},
+    {"role": "user", "content": "Sure, I have a few minutes. What is this about?"},
+]
+
+KNOWLEDGE = [
+    f"Section {i}. Acme Solar offers rooftop panel installation in {city} with a {years}-year warranty, "
+    f"financing from {rate}% APR and a free site survey booked through the support line."
+    for i, (city, years, rate) in enumerate(itertools.product(
+        ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai"], [10, 15, 25], [6.5, 7.9]
+    ))
+]
+QUERIES = [
+    "What warranty do you offer in Pune?",
+    "Is financing available and at what rate?",
+    "How do I book a site survey?",
+    "Do you install rooftop panels in Chennai?",
+]
+
+OUTBOUND_CALL = {
+    "user_id": USER_ID,
+    "system_agent_name": "bench-agent",
+    "workflow_id": WORKFLOW_ID,
+    "agent_name": "Maya",
+    "agent_gender": "female",
+    "agent_language": "en",
+    "agent_number": "+910000000000",
+    "number_from": "+910000000000",
+    "outbound_trunk_id": "ST_bench",
+    "tts_model": "bench-tts",
+    "language_tts": "en",
+    "voice_id": "bench-voice",
+    "llm_model": "bench-llm",
+    "stt_model": "bench-stt",
+    "company_name": "Acme Solar",
+    "individual_name": "Lead",
+    "knowledge_base": RAG_WORKFLOW_ID,
+}
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def _ok(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return False
+    # /make-outbound-call reports LiveKit failures as 200 with success=false
+    if response.request.url.path.endswith("/make-outbound-call"):
+        return bool(response.json().get("success")) and response.json().get("sip_call_id") is not None
+    return True
+
+
+async def add_call_conversation(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    # Appends to a rotating set of calls so documents grow like a live conversation
+    return await client.post("/livekit/add-call-conversation", json={
+        "user_id": USER_ID, "workflow_id": WORKFLOW_ID, "call_id": f"bench-live-{i % 50}",
+        "messages": SAMPLE_MESSAGES,
+    })
+
+
+def get_call_conversation(seeded_calls: int) -> Request:
+    async def request(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get("/livekit/get-call-conversation", params={
+            "user_id": USER_ID, "workflow_id": WORKFLOW_ID, "call_id": f"bench-call-{i % seeded_calls}",
+        })
+    return request
+
+
+async def query_data(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await client.post("/query-data", json={"workflow_id": RAG_WORKFLOW_ID, "query": QUERIES[i % len(QUERIES)]})
+
+
+async def add_data(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    # Only the 202 is timed; ingestion continues in the background (see qdrant.index in /metrics)
+    return await client.post("/add-data", json={"workflow_id": f"bench-ingest-{i % 4}", "data": KNOWLEDGE[i % len(KNOWLEDGE)]})
+
+
+async def extract_data(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    files = {"file": (f"bench-{i}.txt", b"\n\n".join(k.encode() for k in KNOWLEDGE[:5]), "text/plain")}
+    return await client.post("/extract-data", data={"workflow_id": WORKFLOW_ID, "collection_name": "bench_extractions"}, files=files)
+
+
+async def make_outbound_call(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await client.post("/livekit/make-outbound-call", json={
+        **OUTBOUND_CALL, "room_name": f"bench-room-{i}", "number_to_call": f"+91{9000000000 + i}",
+    })
+
+
+def scenarios(seeded_calls: int) -> Dict[str, Request]:
+    return {
+        "add-call-conversation": add_call_conversation,
+        "get-call-conversation": get_call_conversation(seeded_calls),
+        "query-data": query_data,
+        "add-data": add_data,
+        "extract-data": extract_data,
+        "make-outbound-call": make_outbound_call,
+    }
+
+
+async def seed(client: httpx.AsyncClient, calls: int, messages_per_call: int, timeout: float = 120):
+    """Seed calls for the read scenario and a RAG collection for query-data."""
+    semaphore = asyncio.Semaphore(16)
+
+    async def add_call(n: int):
+        async with semaphore:
+            response = await client.post("/livekit/add-call-conversation", json={
+                "user_id": USER_ID, "workflow_id": WORKFLOW_ID, "call_id": f"bench-call-{n}",
+                "messages": (SAMPLE_MESSAGES * messages_per_call)[:messages_per_call],
+            })
+            response.raise_for_status()
+
+    await asyncio.gather(*(add_call(n) for n in range(calls)))
+
+    (await client.post("/add-data", json={"workflow_id": RAG_WORKFLOW_ID, "data": KNOWLEDGE})).raise_for_status()
+    # Ingestion is a background task; the collection is ready once a query succeeds
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(1)
+        if (await query_data(client, 0)).status_code == 200:
+            return
+    raise RuntimeError("RAG collection was not ready in time")
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    request: Request,
+    concurrency: int,
+    total: Optional[int],
+    duration: Optional[float],
+    warmup: int,
+) -> Dict[str, float]:
+    """Run `request` from `concurrency` workers, for `total` requests or `duration` seconds."""
+    for i in range(warmup):
+        await request(client, i)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count(warmup)
+    stop_at = time.perf_counter() + duration if duration else None
+    first_error: Optional[str] = None
+
+    async def worker():
+        nonlocal errors, first_error
+        while True:
+            i = next(counter)
+            if total is not None and i >= warmup + total:
+                return
+            if stop_at is not None and time.perf_counter() >= stop_at:
+                return
+            start = time.perf_counter()
+            try:
+                response = await request(client, i)
+                ok = _ok(response)
+                if not ok and first_error is None:
+                    first_error = f"{response.status_code} {response.text[:200]}"
+            except httpx.HTTPError as e:
+                ok = False
+                if first_error is None:
+                    first_error = repr(e)
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = latency_summary(latencies, errors, time.perf_counter() - started)
+    if first_error:
+        result["first_error"] = first_error
+    return result
+
+
+def compare(report: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Scenarios whose p95 or throughput regressed by more than `tolerance` (a fraction)."""
+    regressions = []
+    for name, result in report.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get("p95_ms") and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {result['p95_ms']} ms")
+        if base.get("rps") and result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['rps']} -> {result['rps']} req/s")
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {result['errors']}")
+    return regressions
+
+
+def _start_stubs(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "stubs.py"), "--port", str(port),
+         "--unstructured-ms", str(args.unstructured_ms), "--livekit-ms", str(args.livekit_ms),
+         "--llm-ms", str(args.llm_ms), "--jitter", str(args.jitter)],
+        cwd=ROOT,
+    )
+
+
+def _start_app(args: argparse.Namespace, port: int, stub_url: str) -> subprocess.Popen:
+    env = dict(os.environ, BENCH_STUB_URL=stub_url, BENCH_EMBED_MS=str(args.embed_ms))
+    if args.mongodb_uri:
+        env["BENCH_MONGODB_URI"] = args.mongodb_uri
+    if args.qdrant_url:
+        env["BENCH_QDRANT_URL"] = args.qdrant_url
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_app:app", "--app-dir", BENCH_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--no-access-log", "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(scenarios(1)), help="Scenarios to run (repeatable; default all)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--duration", type=float, help="Run each scenario for this many seconds instead of --requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario")
+    parser.add_argument("--seed-calls", type=int, default=200)
+    parser.add_argument("--seed-messages", type=int, default=40, help="Messages per seeded call")
+    parser.add_argument("--unstructured-ms", type=float, default=800)
+    parser.add_argument("--livekit-ms", type=float, default=40)
+    parser.add_argument("--llm-ms", type=float, default=600)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--mongodb-uri", help="Use this MongoDB (e.g. a local mongod) instead of mongomock")
+    parser.add_argument("--qdrant-url", help="Use this Qdrant server instead of an in-memory one")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report from a previous --json run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression against --baseline (fraction)")
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    stub_url, base_url = f"http://127.0.0.1:{stub_port}", f"http://127.0.0.1:{app_port}"
+    stubs = _start_stubs(args, stub_port)
+    server = None
+    report: Dict[str, Dict[str, Any]] = {}
+    try:
+        await wait_ready(stub_url + "/health", process=stubs)
+        server = _start_app(args, app_port, stub_url)
+        await wait_ready(base_url + "/health", timeout=120, process=server)
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            await seed(client, args.seed_calls, args.seed_messages)
+            all_scenarios = scenarios(args.seed_calls)
+            for name in args.scenario or list(all_scenarios):
+                result = await drive(client, all_scenarios[name], args.concurrency, None if args.duration else args.requests, args.duration, args.warmup)
+                report[name] = result
+                print(f"{name:22s} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+                      f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}")
+                if "first_error" in result:
+                    print(f"{'':22s} first error: {result['first_error']}")
+    finally:
+        if server is not None:
+            stop(server)
+        stop(stubs)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": report}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
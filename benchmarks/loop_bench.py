@@ -0,0 +1,133 @@
+"""
+Event loop benchmark: asyncio/h11 vs uvloop/httptools on the hot endpoints.
+
+Starts one single-worker uvicorn server per configuration (with startup prewarm off),
+drives each path with `--concurrency` keep-alive clients for `--duration` seconds, and
+reports requests/s and latency percentiles. Configurations whose loop or HTTP parser is
+not installed are skipped.
+
+Usage:
+    python benchmarks/loop_bench.py --duration 10 --concurrency 64 --path /health --path /agent-metrics
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from common import free_port, latency_summary, stop, wait_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = {
+    "asyncio+h11": ("asyncio", "h11"),
+    "asyncio+httptools": ("asyncio", "httptools"),
+    "uvloop+httptools": ("uvloop", "httptools"),
+}
+
+DEFAULT_PATHS = ["/health", "/agent-metrics"]
+
+
+def _available(loop: str, http: str) -> bool:
+    return all(importlib.util.find_spec(m) is not None for m in {loop, http} - {"asyncio"})
+
+
+async def _drive(base_url: str, path: str, concurrency: int, duration: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warm connections and code paths before measuring
+        await asyncio.gather(*(client.get(path) for _ in range(concurrency)))
+        stop_at = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 500:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return latency_summary(latencies, errors, elapsed)
+
+
+async def bench_config(name: str, loop: str, http: str, paths: List[str], concurrency: int, duration: float) -> Optional[Dict]:
+    if not _available(loop, http):
+        print(f"{name}: skipped ({loop}/{http} not installed)")
+        return None
+
+    port = free_port()
+    env = dict(os.environ, STARTUP_PREWARM="off")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--loop", loop, "--http", http, "--no-access-log", "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_ready(base_url + "/health", process=server)
+        results = {}
+        for path in paths:
+            results[path] = await _drive(base_url, path, concurrency, duration)
+            r = results[path]
+            print(f"{name:18s} {path:24s} {r['rps']:9.1f} req/s  p50 {r['p50_ms']:7.2f} ms  "
+                  f"p99 {r['p99_ms']:7.2f} ms  errors {r['errors']}")
+        return results
+    finally:
+        stop(server)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", action="append", help="GET path to drive (repeatable)")
+    parser.add_argument("--config", action="append", choices=sorted(CONFIGS), help="Configurations to run (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    paths = args.path or DEFAULT_PATHS
+    report = {}
+    for name in args.config or list(CONFIGS):
+        loop, http = CONFIGS[name]
+        result = await bench_config(name, loop, http, paths, args.concurrency, args.duration)
+        if result is not None:
+            report[name] = result
+
+    baseline = report.get("asyncio+h11")
+    if baseline:
+        for name, results in report.items():
+            if name == "asyncio+h11":
+                continue
+            for path, r in results.items():
+                base_rps = baseline[path]["rps"]
+                if base_rps:
+                    print(f"{name} vs asyncio+h11 on {path}: {r['rps'] / base_rps:.2f}x throughput")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
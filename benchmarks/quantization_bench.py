@@ -0,0 +1,223 @@
+"""
+Collection profile benchmark: memory footprint vs recall@k and search latency.
+
+Builds `--points` clustered unit vectors and `--queries` queries, computes the exact top-k,
+and searches them once per collection profile (services.rag.profiles).
+
+The in-memory Qdrant client keeps every vector as float32 and ignores quantization, HNSW
+and on-disk settings, so locally each profile's search is reproduced with numpy: score all
+points with the int8 or binary codes, keep `oversampling x k` candidates and rescore them
+with the float32 vectors. The in-memory Qdrant provides the exact baseline and its latency.
+Memory is Qdrant's per-point layout (vectors, quantized codes, HNSW links, payload) split
+into RAM and disk. Pass --qdrant-url to create real profiled collections on a server
+instead; recall and latency are then measured on its quantized HNSW search.
+
+Usage:
+    python benchmarks/quantization_bench.py --points 50000 --dim 384 --k 5
+    python benchmarks/quantization_bench.py --qdrant-url http://localhost:6333 --points 200000 --dim 768
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from common import latency_summary
+
+DENSE = "text-dense"
+# Typical llama-index node payload (text, metadata and node JSON)
+PAYLOAD_BYTES = 2048
+# Qdrant stores 2*m links per point on the base layer as u32 point offsets
+LINK_BYTES = 4
+
+
+def make_data(points: int, queries: int, dim: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, points // 500), dim))
+
+    def sample(n: int) -> np.ndarray:
+        x = centers[rng.integers(0, len(centers), n)] + 1.2 * rng.normal(size=(n, dim))
+        return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+    return sample(points), sample(queries)
+
+
+def footprint(profile, points: int, dim: int) -> Dict[str, float]:
+    """RAM and disk MB of a profile's collection, from Qdrant's storage layout."""
+    float_bytes = points * dim * 4
+    codes = {"int8": points * dim, "binary": points * ((dim + 7) // 8)}.get(profile.quantization, 0)
+    links = points * 2 * (profile.hnsw_m or 16) * LINK_BYTES
+    payload = points * PAYLOAD_BYTES
+    ram = links + (0 if profile.on_disk_vectors else float_bytes) + (0 if profile.on_disk_payload else payload)
+    disk = (float_bytes if profile.on_disk_vectors else 0) + (payload if profile.on_disk_payload else 0)
+    if profile.quantization and profile.quantization_always_ram:
+        ram += codes
+    else:
+        disk += codes
+    return {"ram_mb": round(ram / 2 ** 20, 1), "disk_mb": round(disk / 2 ** 20, 1)}
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    idx = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def simulated_search(profile, vectors: np.ndarray) -> Callable[[np.ndarray, int], np.ndarray]:
+    """Quantized scoring plus optional rescoring, as Qdrant does for a profile."""
+    if profile.quantization == "int8":
+        # Scalar quantization bounds clip the extreme (1 - quantile) of values
+        bound = float(np.quantile(np.abs(vectors), 0.99))
+        scale = bound / 127
+        codes = np.clip(np.round(vectors / scale), -127, 127).astype(np.int8)
+        as_float = codes.astype(np.float32)
+
+        def approximate(query: np.ndarray) -> np.ndarray:
+            return as_float @ np.clip(np.round(query / scale), -127, 127)
+    elif profile.quantization == "binary":
+        codes = np.packbits(vectors > 0, axis=1)
+        popcount = np.array([bin(i).count("1") for i in range(256)], dtype=np.int32)
+
+        def approximate(query: np.ndarray) -> np.ndarray:
+            return -popcount[np.bitwise_xor(codes, np.packbits(query > 0))].sum(axis=1)
+    else:
+        def approximate(query: np.ndarray) -> np.ndarray:
+            return vectors @ query
+
+    def search(query: np.ndarray, k: int) -> np.ndarray:
+        scores = approximate(query)
+        if not profile.quantization:
+            return top_k(scores, k)
+        candidates = top_k(scores, int(k * (profile.oversampling or 1.0)))
+        if not profile.rescore:
+            return candidates[:k]
+        return candidates[np.argsort(-(vectors[candidates] @ query))][:k]
+
+    return search
+
+
+def recall(found: List[np.ndarray], truth: np.ndarray, k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(t[:k])) / k for f, t in zip(found, truth)]))
+
+
+def run_local(profiles, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> List[Dict]:
+    from qdrant_client import QdrantClient, models
+
+    client = QdrantClient(":memory:")
+    client.create_collection("bench_profiles", vectors_config={
+        DENSE: models.VectorParams(size=vectors.shape[1], distance=models.Distance.COSINE),
+    })
+    for start in range(0, len(vectors), 2048):
+        chunk = vectors[start:start + 2048]
+        client.upsert("bench_profiles", [
+            models.PointStruct(id=start + i, vector={DENSE: v.tolist()}) for i, v in enumerate(chunk)
+        ])
+    latencies = []
+    found = []
+    for query in queries:
+        t = time.perf_counter()
+        hits = client.query_points("bench_profiles", query=query.tolist(), using=DENSE, limit=k).points
+        latencies.append(time.perf_counter() - t)
+        found.append(np.array([h.id for h in hits]))
+    print(f"in-memory qdrant (exact float32): recall@{k} {recall(found, truth, k):.3f}, "
+          f"p50 {latency_summary(latencies, 0, sum(latencies))['p50_ms']:.2f} ms")
+
+    report = []
+    for profile in profiles:
+        search = simulated_search(profile, vectors)
+        latencies, found = [], []
+        for query in queries:
+            t = time.perf_counter()
+            found.append(search(query, k))
+            latencies.append(time.perf_counter() - t)
+        report.append(_result(profile, vectors, k, recall(found, truth, k), latencies, "numpy"))
+    return report
+
+
+def run_server(profiles, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, url: str) -> List[Dict]:
+    from qdrant_client import QdrantClient, models
+
+    client = QdrantClient(url=url, timeout=300)
+    report = []
+    for profile in profiles:
+        name = f"bench_profile_{profile.name}_{uuid.uuid4().hex[:6]}"
+        client.create_collection(
+            name,
+            vectors_config={DENSE: profile.vector_params(vectors.shape[1])},
+            quantization_config=profile.quantization_config(),
+            on_disk_payload=profile.on_disk_payload,
+        )
+        for start in range(0, len(vectors), 1024):
+            chunk = vectors[start:start + 1024]
+            client.upsert(name, [
+                models.PointStruct(id=start + i, vector={DENSE: v.tolist()}, payload={"text": "x" * PAYLOAD_BYTES})
+                for i, v in enumerate(chunk)
+            ])
+        # Search only after the optimizer has built the HNSW graph and quantized codes
+        while client.get_collection(name).status != models.CollectionStatus.GREEN:
+            time.sleep(1)
+
+        latencies, found = [], []
+        for query in queries:
+            t = time.perf_counter()
+            hits = client.query_points(
+                name, query=query.tolist(), using=DENSE, limit=k, search_params=profile.search_params(),
+            ).points
+            latencies.append(time.perf_counter() - t)
+            found.append(np.array([h.id for h in hits]))
+        client.delete_collection(name)
+        report.append(_result(profile, vectors, k, recall(found, truth, k), latencies, "qdrant"))
+    return report
+
+
+def _result(profile, vectors: np.ndarray, k: int, recall_at_k: float, latencies: List[float], engine: str) -> Dict:
+    search = latency_summary(latencies, 0, sum(latencies))
+    result = {
+        "profile": profile.name,
+        "engine": engine,
+        **footprint(profile, *vectors.shape),
+        f"recall@{k}": round(recall_at_k, 4),
+        "search": search,
+    }
+    print(f"{profile.name:10s} RAM {result['ram_mb']:8.1f} MB  disk {result['disk_mb']:8.1f} MB  "
+          f"recall@{k} {recall_at_k:.3f}  p50 {search['p50_ms']:.2f} ms  p95 {search['p95_ms']:.2f} ms ({engine})")
+    return result
+
+
+def main() -> int:
+    from services.rag.profiles import COLLECTION_PROFILES, get_profile
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", action="append", help="Profiles to compare (repeatable; default all)")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--qdrant-url", help="Benchmark real profiled collections on a Qdrant server")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    profiles = [get_profile(name) for name in (args.profile or list(COLLECTION_PROFILES))]
+    vectors, queries = make_data(args.points, args.queries, args.dim)
+    truth = np.stack([top_k(vectors @ q, args.k) for q in queries])
+
+    if args.qdrant_url:
+        report = run_server(profiles, vectors, queries, truth, args.k, args.qdrant_url)
+    else:
+        report = run_local(profiles, vectors, queries, truth, args.k)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
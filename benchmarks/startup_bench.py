@@ -0,0 +1,153 @@
+"""
+Import-time and startup-time benchmark for the API worker.
+
+Runs each measurement in a fresh interpreter so module caches never carry over:
+
+* ``-X importtime`` breakdown of ``import app``: the slowest modules by cumulative
+  time and the heaviest top-level packages by self time.
+* Worker boot time: ``import app`` plus the lifespan startup phase, the time before
+  uvicorn starts accepting requests. The median over ``--runs`` is compared with
+  ``--target-ms`` and the exit code is 1 when it is exceeded, so CI can gate on it.
+
+Usage:
+    python benchmarks/startup_bench.py --runs 5 --target-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT_SCRIPT = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import {module} as target
+t1 = time.perf_counter()
+
+async def boot():
+    async with target.app.router.lifespan_context(target.app):
+        t2 = time.perf_counter()
+    return t2
+
+t2 = asyncio.run(boot()) if {lifespan} else t1
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "boot_ms": (t2 - t0) * 1000}}))
+"""
+
+
+def _run(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Return (module, depth, self_us, cumulative_us) rows from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((stripped.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_breakdown(module: str, env: Dict[str, str], top: int) -> Dict[str, object]:
+    proc = _run(["-X", "importtime", "-c", f"import {module}"], env)
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or [""]
+        raise SystemExit(f"import {module} failed: {tail[0]}")
+
+    rows = parse_importtime(proc.stderr)
+    total_us = next((cum for name, _, _, cum in rows if name == module), 0)
+    packages: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    slowest = sorted(rows, key=lambda r: r[3], reverse=True)
+    return {
+        "total_ms": total_us / 1000,
+        "modules": [
+            {"module": name, "cumulative_ms": cum / 1000, "self_ms": self_us / 1000}
+            for name, _, self_us, cum in slowest
+            if name != module
+        ][:top],
+        "packages": [
+            {"package": name, "self_ms": us / 1000}
+            for name, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)
+        ][:top],
+    }
+
+
+def boot_times(module: str, env: Dict[str, str], runs: int, lifespan: bool) -> List[Dict[str, float]]:
+    script = BOOT_SCRIPT.format(module=module, lifespan=lifespan)
+    results = []
+    for _ in range(runs):
+        proc = _run(["-c", script], env)
+        if proc.returncode != 0:
+            tail = proc.stderr.strip().splitlines()[-1:] or [""]
+            raise SystemExit(f"boot failed: {tail[0]}")
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module exposing the FastAPI `app`")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=float(os.getenv("STARTUP_TARGET_MS", "1500")))
+    parser.add_argument("--no-lifespan", action="store_true", help="Measure import only")
+    parser.add_argument("--prewarm", default="off", choices=["off", "background", "blocking"],
+                        help="STARTUP_PREWARM mode for the boot runs")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["STARTUP_PREWARM"] = args.prewarm
+
+    breakdown = import_breakdown(args.module, env, args.top)
+    boots = boot_times(args.module, env, args.runs, not args.no_lifespan)
+    boot_median = statistics.median(b["boot_ms"] for b in boots)
+    report = {
+        "import": breakdown,
+        "boot_ms": [round(b["boot_ms"], 1) for b in boots],
+        "boot_median_ms": round(boot_median, 1),
+        "import_median_ms": round(statistics.median(b["import_ms"] for b in boots), 1),
+        "target_ms": args.target_ms,
+        "passed": boot_median <= args.target_ms,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.module} (-X importtime): {breakdown['total_ms']:.1f} ms")
+        print("\nSlowest modules (cumulative):")
+        for row in breakdown["modules"]:
+            print(f"  {row['cumulative_ms']:9.1f} ms  {row['module']}")
+        print("\nHeaviest packages (self):")
+        for row in breakdown["packages"]:
+            print(f"  {row['self_ms']:9.1f} ms  {row['package']}")
+        print(f"\nWorker boot ({args.runs} runs, prewarm={args.prewarm}): {report['boot_ms']} ms")
+        status = "PASS" if report["passed"] else "FAIL"
+        print(f"Median boot {report['boot_median_ms']} ms vs target {args.target_ms:.0f} ms: {status}")
+
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
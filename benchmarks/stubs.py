@@ -0,0 +1,110 @@
+"""
+Local stand-ins for the external HTTP services, with configurable latency.
+
+One server answers all of them, so the app under test only needs its base URLs
+pointed here:
+
+* Unstructured partition API: ``POST /general/v0/general`` (UNSTRUCTURED_API_URL)
+* LiveKit Twirp API: ``POST /twirp/livekit.<Service>/<Method>`` (LIVEKIT_URL)
+* OpenRouter chat completions: ``POST /api/v1/chat/completions`` (OpenAI-compatible)
+
+Usage:
+    python benchmarks/stubs.py --port 9100 --unstructured-ms 800 --livekit-ms 40 --llm-ms 600
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+def _jitter(ms: float, jitter: float) -> float:
+    """Latency in seconds, uniformly spread by +/- `jitter` (a fraction)."""
+    return max(0.0, ms * (1 + random.uniform(-jitter, jitter))) / 1000
+
+
+def build_app(unstructured_ms: float, livekit_ms: float, llm_ms: float, jitter: float, elements: int) -> Starlette:
+    async def partition(request: Request):
+        form = await request.form()
+        upload = form.get("files")
+        filename = getattr(upload, "filename", None) or "document"
+        await asyncio.sleep(_jitter(unstructured_ms, jitter))
+        return JSONResponse([
+            {
+                "type": "NarrativeText",
+                "element_id": uuid.uuid4().hex,
+                "text": f"Paragraph {i} of {filename}: the quick brown fox jumps over the lazy dog.",
+                "metadata": {"filename": filename, "page_number": 1 + i // 10},
+            }
+            for i in range(elements)
+        ])
+
+    async def twirp(request: Request):
+        from livekit.protocol.agent_dispatch import AgentDispatch
+        from livekit.protocol.sip import SIPParticipantInfo
+
+        await request.body()
+        await asyncio.sleep(_jitter(livekit_ms, jitter))
+        method = request.path_params["method"]
+        if method == "CreateDispatch":
+            message = AgentDispatch(id=f"AD_{uuid.uuid4().hex[:12]}", agent_name="Calling-Agent-System")
+        elif method == "CreateSIPParticipant":
+            message = SIPParticipantInfo(
+                participant_id=f"PA_{uuid.uuid4().hex[:12]}",
+                sip_call_id=f"SCL_{uuid.uuid4().hex[:12]}",
+            )
+        else:
+            return JSONResponse({"code": "unimplemented", "msg": f"stub has no {method}"}, status_code=501)
+        return Response(message.SerializeToString(), media_type="application/protobuf")
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(_jitter(llm_ms, jitter))
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        answer = f"Stub answer based on {len(prompt)} characters of context."
+        return JSONResponse({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 12, "total_tokens": len(prompt) // 4 + 12},
+        })
+
+    async def health(request: Request):
+        return JSONResponse({"status": "ok"})
+
+    return Starlette(routes=[
+        Route("/health", health),
+        Route("/general/v0/general", partition, methods=["POST"]),
+        Route("/twirp/{service}/{method}", twirp, methods=["POST"]),
+        Route("/api/v1/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--unstructured-ms", type=float, default=800)
+    parser.add_argument("--livekit-ms", type=float, default=40)
+    parser.add_argument("--llm-ms", type=float, default=600)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency spread as a fraction (0.2 = +/-20%%)")
+    parser.add_argument("--elements", type=int, default=40, help="Elements per partitioned document")
+    args = parser.parse_args()
+
+    app = build_app(args.unstructured_ms, args.livekit_ms, args.llm_ms, args.jitter, args.elements)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
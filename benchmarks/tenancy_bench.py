@@ -0,0 +1,162 @@
+"""
+Collection layout benchmark: one collection per workflow vs one shared multi-tenant collection.
+
+For each workflow count, loads `--points` random vectors per workflow in both layouts and
+reports the memory they take and the latency of tenant-scoped searches (a random workflow
+per query, filtered by workflow_id in the shared layout).
+
+Each layout runs in its own process against an in-memory Qdrant, and memory is that
+process's RSS growth. Local mode has neither HNSW nor payload indexes, so shared-layout
+searches scan the whole collection; pass --qdrant-url for a server (memory then comes from
+its /metrics endpoint, so run it against an otherwise idle instance).
+
+Usage:
+    python benchmarks/tenancy_bench.py --workflows 1000 --workflows 10000 --points 20
+    python benchmarks/tenancy_bench.py --qdrant-url http://localhost:6333 --workflows 1000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+from common import latency_summary
+
+DENSE = "text-dense"
+TENANT_KEY = "workflow_id"
+SHARED = "bench_tenancy_shared"
+
+
+def _server_memory(url: str) -> Optional[int]:
+    try:
+        text = httpx.get(f"{url}/metrics", timeout=10).text
+    except httpx.HTTPError:
+        return None
+    for line in text.splitlines():
+        if line.startswith("memory_resident_bytes"):
+            return int(float(line.split()[-1]))
+    return None
+
+
+def _memory(url: Optional[str]) -> Optional[int]:
+    if url:
+        return _server_memory(url)
+    import psutil
+    return psutil.Process().memory_info().rss
+
+
+def run_layout(layout: str, workflows: int, points: int, dim: int, queries: int, url: Optional[str]) -> Dict:
+    from qdrant_client import QdrantClient, models
+
+    rng = random.Random(13)
+    client = QdrantClient(url=url, timeout=120) if url else QdrantClient(":memory:")
+    names = [f"bench_wf_{i:05d}" for i in range(workflows)]
+    vector_params = {DENSE: models.VectorParams(size=dim, distance=models.Distance.COSINE)}
+
+    def vectors(n: int) -> List[List[float]]:
+        return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(n)]
+
+    baseline = _memory(url)
+    start = time.perf_counter()
+    if layout == "shared":
+        client.create_collection(SHARED, vectors_config=vector_params)
+        client.create_payload_index(
+            SHARED, TENANT_KEY, field_schema=models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True)
+        )
+        client.update_collection(SHARED, hnsw_config=models.HnswConfigDiff(m=0, payload_m=16))
+        batch = []
+        for name in names:
+            for v in vectors(points):
+                batch.append(models.PointStruct(id=str(uuid.uuid4()), vector={DENSE: v}, payload={TENANT_KEY: name}))
+            if len(batch) >= 1024:
+                client.upsert(SHARED, batch, wait=True)
+                batch = []
+        if batch:
+            client.upsert(SHARED, batch, wait=True)
+    else:
+        for name in names:
+            client.create_collection(name, vectors_config=vector_params)
+            client.upsert(name, [
+                models.PointStruct(id=str(uuid.uuid4()), vector={DENSE: v}, payload={}) for v in vectors(points)
+            ], wait=True)
+    load_s = time.perf_counter() - start
+    # Give a server time to build indexes before measuring memory and search
+    if url:
+        time.sleep(2)
+    memory = _memory(url)
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(queries):
+        name = rng.choice(names)
+        query = vectors(1)[0]
+        t = time.perf_counter()
+        if layout == "shared":
+            client.query_points(SHARED, query=query, using=DENSE, limit=5, query_filter=models.Filter(must=[
+                models.FieldCondition(key=TENANT_KEY, match=models.MatchValue(value=name))
+            ]))
+        else:
+            client.query_points(name, query=query, using=DENSE, limit=5)
+        latencies.append(time.perf_counter() - t)
+    search = latency_summary(latencies, 0, time.perf_counter() - started)
+
+    if url:
+        for name in ([SHARED] if layout == "shared" else names):
+            client.delete_collection(name)
+
+    return {
+        "layout": layout,
+        "workflows": workflows,
+        "points": workflows * points,
+        "load_s": round(load_s, 2),
+        "memory_mb": round((memory - baseline) / 2 ** 20, 1) if memory is not None and baseline is not None else None,
+        "search": search,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", type=int, action="append", help="Workflow counts (repeatable; default 1000 and 10000)")
+    parser.add_argument("--points", type=int, default=20, help="Points per workflow")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--layout", action="append", choices=["per_workflow", "shared"])
+    parser.add_argument("--qdrant-url", help="Benchmark a Qdrant server instead of the in-memory client")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        layout, workflows = args.child.split(":")
+        print(json.dumps(run_layout(layout, int(workflows), args.points, args.dim, args.queries, args.qdrant_url)))
+        return 0
+
+    report = []
+    for workflows in args.workflows or [1000, 10000]:
+        for layout in args.layout or ["per_workflow", "shared"]:
+            # A fresh process per run keeps RSS measurements independent
+            command = [sys.executable, os.path.abspath(__file__), "--child", f"{layout}:{workflows}",
+                       "--points", str(args.points), "--dim", str(args.dim), "--queries", str(args.queries)]
+            if args.qdrant_url:
+                command += ["--qdrant-url", args.qdrant_url]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            report.append(result)
+            s = result["search"]
+            print(f"{workflows:6d} workflows  {layout:12s}  load {result['load_s']:7.2f} s  memory {result['memory_mb']} MB  "
+                  f"search p50 {s['p50_ms']:.2f} ms  p95 {s['p95_ms']:.2f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,40 @@
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openrouter import OpenRouterProvider
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
 
-conversation_summarizer_llm = OpenAIModel(
-    'meta-llama/llama-4-scout',
-    provider=OpenRouterProvider(
-        api_key=openrouter_api_key,
-    ),
-)
\ No newline at end of file
+# Hedging / failover target for the summarizer (e.g. google/gemini-2.0-flash-001). Unset by default:
+# hedged requests duplicate LLM calls, so operators opt in by setting SUMMARIZER_FALLBACK_MODEL.
+summarizer_fallback_model = os.environ.get("SUMMARIZER_FALLBACK_MODEL") or None
+
+# Models are built on first use: pydantic_ai and the openai SDK are slow to import
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _openrouter_model(model_name: str):
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            from pydantic_ai.models.openai import OpenAIModel
+            from pydantic_ai.providers.openrouter import OpenRouterProvider
+
+            model = OpenAIModel(
+                model_name,
+                provider=OpenRouterProvider(
+                    api_key=openrouter_api_key,
+                ),
+            )
+            _models[model_name] = model
+        return model
+
+
+def get_conversation_summarizer_llm():
+    return _openrouter_model('meta-llama/llama-4-scout')
+
+
+def get_conversation_summarizer_fallback_llm():
+    return _openrouter_model(summarizer_fallback_model) if summarizer_fallback_model else None
@@ -1,6 +1,51 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Any, Optional
 
 class ConversationSummaryModel(BaseModel):
     """Request model for conversation summarization."""
     conversation_summary: str
+
+
+class ConversationMessage(BaseModel):
+    """A single conversation turn; extra fields stored with call messages are accepted and ignored."""
+    model_config = ConfigDict(extra="allow")
+
+    role: Optional[str] = None
+    content: str
+    timestamp: Optional[str] = None
+
+
+class SummarizeConversationRequest(BaseModel):
+    """Request body for conversation summarization: structured messages or a raw transcript."""
+    messages: Optional[List[ConversationMessage]] = None
+    conversation_history: Optional[str] = None
+
+
+class SummarizeCallRequest(BaseModel):
+    """Request model for summarizing a call stored in MongoDB."""
+    user_id: str
+    workflow_id: str
+    call_id: str
+    force: bool = False
+
+
+class CallSummaryResponse(BaseModel):
+    """Summary of a stored call, with the transcript hash it was built from."""
+    user_id: str
+    workflow_id: str
+    call_id: str
+    conversation_summary: str
+    messages_hash: str
+    message_count: int
+    created_at: Optional[str] = None
+    cached: bool = False
+
+
+class BulkSummarizeRequest(BaseModel):
+    """Request model for summarizing every call of a workflow in a date range."""
+    user_id: str
+    workflow_id: str
+    start: Optional[str] = None
+    end: Optional[str] = None
+    force: bool = False
+    concurrency: Optional[int] = None
@@ -1,26 +1,68 @@
+import argparse
 import os
+import shutil
 import sys
+import tempfile
 import uvicorn
 from dotenv import load_dotenv
-import nest_asyncio
-
-# Apply nest_asyncio to allow nested event loops
-nest_asyncio.apply()
 
 APP_MODULE = "app:app"
 
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name) or default)
+
+
 def main():
     """Run the server."""
     # Load environment variables
     load_dotenv()
-    # Run the server with standard asyncio loop instead of uvloop to avoid conflicts
+
+    parser = argparse.ArgumentParser(description="Run the Nexus Service API")
+    parser.add_argument(
+        "--prod",
+        action="store_true",
+        default=os.environ.get("SERVER_MODE", "dev").lower() == "prod",
+        help="Production mode: WEB_CONCURRENCY workers, no reload (or set SERVER_MODE=prod)",
+    )
+    args = parser.parse_args()
+
+    host = os.environ.get("SERVER_HOST", "0.0.0.0")
+    port = _env_int("PORT", _env_int("SERVER_PORT", 8021))
+    # "auto" picks uvloop and httptools when installed, the pure-Python asyncio/h11 otherwise
+    loop = os.environ.get("SERVER_LOOP", "auto")
+    http = os.environ.get("SERVER_HTTP", "auto")
+
+    if not args.prod:
+        uvicorn.run(APP_MODULE, host=host, port=port, reload=True, loop=loop, http=http)
+        return
+
+    # WEB_CONCURRENCY is the conventional worker count variable on PaaS hosts. One worker
+    # unless set: rate limits, circuit breakers and caches are kept per worker process
+    workers = _env_int("WEB_CONCURRENCY", 1)
+    if workers > 1:
+        # Workers write metrics to a shared directory so /metrics aggregates all of them;
+        # stale files from a previous run would be summed in, so start from an empty one
+        metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "nexus-metrics")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
     uvicorn.run(
         APP_MODULE,
-        host="0.0.0.0",
-        port=8021,
-        reload=True,
-        loop="asyncio"  # Use standard asyncio instead of uvloop
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        proxy_headers=True,
+        forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "*"),
+        access_log=os.environ.get("SERVER_ACCESS_LOG", "false").lower() == "true",
+        timeout_keep_alive=_env_int("SERVER_KEEPALIVE_S", 5),
+        # In-flight requests get this long after SIGTERM; the lifespan then drains background jobs
+        timeout_graceful_shutdown=_env_int("SERVER_GRACEFUL_SHUTDOWN_S", 30),
+        limit_max_requests=_env_int("SERVER_MAX_REQUESTS", 0) or None,
     )
 
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,454 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models.schema import BulkSummarizeRequest
+from services.livekit_api.mongodb.db import bulk_summary_jobs, calls
+from services.livekit_api.mongodb.utils import now_ist_iso, parse_any_dt_to_ist, parse_bound_date_only
+from utils.background import background_jobs
+from utils.executors import run_in
+from .call_summary import SUMMARY_FIELD, EmptyCallError, build_call_summary, summary_update
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BULK_SUMMARY_CONCURRENCY = int(os.getenv("BULK_SUMMARY_CONCURRENCY", "8"))
+BULK_SUMMARY_MAX_CONCURRENCY = int(os.getenv("BULK_SUMMARY_MAX_CONCURRENCY", "32"))
+# Jobs running at once across every worker of the deployment
+BULK_SUMMARY_MAX_JOBS = int(os.getenv("BULK_SUMMARY_MAX_JOBS", "2"))
+# Calls loaded from MongoDB per query and summaries written per bulk_write
+BULK_SUMMARY_LOAD_BATCH = int(os.getenv("BULK_SUMMARY_LOAD_BATCH", "25"))
+BULK_SUMMARY_WRITE_BATCH = int(os.getenv("BULK_SUMMARY_WRITE_BATCH", "50"))
+# USD per million tokens, used for the cost estimate in job progress
+SUMMARY_PRICE_INPUT_PER_1M = float(os.getenv("SUMMARY_PRICE_INPUT_PER_1M", "0"))
+SUMMARY_PRICE_OUTPUT_PER_1M = float(os.getenv("SUMMARY_PRICE_OUTPUT_PER_1M", "0"))
+# Seconds between progress writes of a running job; its worker also picks up cancel requests then
+BULK_SUMMARY_HEARTBEAT_S = float(os.getenv("BULK_SUMMARY_HEARTBEAT_S", "5"))
+# A running job not written for this long is reported as lost (its worker died)
+BULK_SUMMARY_STALE_S = float(os.getenv("BULK_SUMMARY_STALE_S", "60"))
+# Seconds finished jobs are kept for progress queries
+BULK_SUMMARY_JOB_RETENTION_S = int(os.getenv("BULK_SUMMARY_JOB_RETENTION_S", "604800"))
+
+bulk_summary_router = APIRouter()
+
+
+@dataclass
+class BulkSummaryJob:
+    job_id: str
+    user_id: str
+    workflow_id: str
+    start: Optional[str]
+    end: Optional[str]
+    force: bool
+    concurrency: int
+    status: str = "pending"
+    created_at: str = field(default_factory=now_ist_iso)
+    created_ts: float = field(default_factory=time.time)
+    finished_at: Optional[str] = None
+    selected: int = 0
+    skipped: int = 0
+    summarized: int = 0
+    unchanged: int = 0
+    empty: int = 0
+    failed: int = 0
+    written: int = 0
+    requests: int = 0
+    request_tokens: int = 0
+    response_tokens: int = 0
+    total_tokens: int = 0
+    error: Optional[str] = None
+    errors: Deque[str] = field(default_factory=lambda: deque(maxlen=20))
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def processed(self) -> int:
+        return self.summarized + self.unchanged + self.empty + self.failed
+
+    def add_usage(self, usage: Dict[str, Any]):
+        self.requests += usage.get("requests") or 0
+        self.request_tokens += usage.get("request_tokens") or 0
+        self.response_tokens += usage.get("response_tokens") or 0
+        self.total_tokens += usage.get("total_tokens") or 0
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self.started is not None:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        cost = (
+            self.request_tokens * SUMMARY_PRICE_INPUT_PER_1M
+            + self.response_tokens * SUMMARY_PRICE_OUTPUT_PER_1M
+        ) / 1_000_000
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "user_id": self.user_id,
+            "workflow_id": self.workflow_id,
+            "start": self.start,
+            "end": self.end,
+            "force": self.force,
+            "concurrency": self.concurrency,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "selected": self.selected,
+            "skipped_up_to_date": self.skipped,
+            "processed": self.processed,
+            "remaining": max(0, self.selected - self.processed),
+            "summarized": self.summarized,
+            "unchanged": self.unchanged,
+            "empty": self.empty,
+            "failed": self.failed,
+            "written": self.written,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_calls_per_min": round(self.processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "usage": {
+                "requests": self.requests,
+                "request_tokens": self.request_tokens,
+                "response_tokens": self.response_tokens,
+                "total_tokens": self.total_tokens,
+            },
+            "estimated_cost_usd": round(cost, 6),
+            "error": self.error,
+            "recent_errors": list(self.errors),
+        }
+
+
+# Jobs started by this process, while they run; every job's state is kept in MongoDB
+_jobs: Dict[str, BulkSummaryJob] = {}
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+_ACTIVE = ("pending", "running")
+# Bookkeeping fields of a stored job that are not part of its progress (heartbeat_at is read, then dropped)
+_INTERNAL = {"_id": 0, "created_ts": 0, "expire_at": 0, "owner": 0}
+
+
+def _job_document(job: BulkSummaryJob) -> Dict[str, Any]:
+    doc = job.progress()
+    doc["created_ts"] = job.created_ts
+    doc["heartbeat_at"] = time.time()
+    doc["owner"] = _OWNER
+    if job.status not in _ACTIVE:
+        doc["expire_at"] = datetime.now(timezone.utc) + timedelta(seconds=BULK_SUMMARY_JOB_RETENTION_S)
+    return doc
+
+
+def _active_filter() -> Dict[str, Any]:
+    # A job whose worker stopped heartbeating (crash, kill) no longer counts as running
+    return {"status": {"$in": list(_ACTIVE)}, "heartbeat_at": {"$gte": time.time() - BULK_SUMMARY_STALE_S}}
+
+
+def _sync_claim(job: BulkSummaryJob) -> bool:
+    """
+    Store a new job unless BULK_SUMMARY_MAX_JOBS jobs already run across the deployment.
+
+    The job is inserted first and then counts the active jobs created before it, so two
+    workers starting jobs at once agree on which of them goes over the limit.
+    """
+    bulk_summary_jobs().insert_one(_job_document(job))
+    earlier = bulk_summary_jobs().count_documents({
+        **_active_filter(),
+        "$or": [
+            {"created_ts": {"$lt": job.created_ts}},
+            {"created_ts": job.created_ts, "job_id": {"$lt": job.job_id}},
+        ],
+    })
+    if earlier >= BULK_SUMMARY_MAX_JOBS:
+        bulk_summary_jobs().delete_one({"job_id": job.job_id})
+        return False
+    return True
+
+
+def _sync_save(job: BulkSummaryJob) -> bool:
+    """Store a job's progress; returns whether a cancel was requested (possibly from another worker)."""
+    stored = bulk_summary_jobs().find_one_and_update(
+        {"job_id": job.job_id},
+        {"$set": _job_document(job)},
+        projection={"cancel_requested": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return bool(stored and stored.get("cancel_requested"))
+
+
+def _sync_load(job_id: str) -> Optional[Dict[str, Any]]:
+    doc = bulk_summary_jobs().find_one({"job_id": job_id}, _INTERNAL)
+    if doc is None:
+        return None
+    heartbeat = doc.pop("heartbeat_at", 0)
+    if doc.get("status") in _ACTIVE and heartbeat < time.time() - BULK_SUMMARY_STALE_S:
+        doc["status"] = "lost"
+        doc["error"] = doc.get("error") or "The worker running this job stopped"
+    return doc
+
+
+def _sync_request_cancel(job_id: str) -> Optional[Dict[str, Any]]:
+    bulk_summary_jobs().update_one(
+        {"job_id": job_id, "status": {"$in": list(_ACTIVE)}}, {"$set": {"cancel_requested": True}}
+    )
+    return _sync_load(job_id)
+
+
+def _created_at_prefilter(start_dt: Optional[datetime], end_dt: Optional[datetime]) -> Dict[str, str]:
+    """
+    String range on created_at that keeps every call inside [start_dt, end_dt].
+
+    Stored timestamps are ISO strings, written in IST but possibly in another offset for
+    older calls, so the bounds are whole dates widened by two days to cover any offset.
+    """
+    created: Dict[str, str] = {}
+    if start_dt:
+        created["$gte"] = (start_dt - timedelta(days=2)).strftime("%Y-%m-%d")
+    if end_dt:
+        created["$lt"] = (end_dt + timedelta(days=2)).strftime("%Y-%m-%d")
+    return created
+
+
+def _sync_select_calls(user_id: str, workflow_id: str, start: Optional[str], end: Optional[str], force: bool):
+    """
+    Return (call_ids to summarize, number skipped as up to date).
+
+    Only counts are projected, so transcripts are not loaded for calls whose stored
+    summary already covers every message; messages are append-only, so an equal count
+    means the summary is current. Loaded calls are still verified by hash.
+    """
+    start_dt = parse_bound_date_only(start, as_end=False) if start else None
+    end_dt = parse_bound_date_only(end, as_end=True) if end else None
+
+    match: Dict[str, Any] = {"user_id": user_id, "workflow_id": workflow_id}
+    created = _created_at_prefilter(start_dt, end_dt)
+    if created:
+        # Narrows ISO string timestamps in MongoDB; exact bounds are checked below
+        match["$or"] = [{"created_at": created}, {"created_at": {"$not": {"$type": "string"}}}]
+
+    pipeline = [
+        {"$match": match},
+        {
+            "$project": {
+                "_id": 0,
+                "call_id": 1,
+                "created_at": 1,
+                "message_count": {"$size": {"$ifNull": ["$messages", []]}},
+                "summary_count": f"$metadata.{SUMMARY_FIELD}.message_count",
+            }
+        },
+    ]
+    call_ids: List[str] = []
+    skipped = 0
+    for doc in calls().aggregate(pipeline):
+        dt = parse_any_dt_to_ist(doc.get("created_at"))
+        if dt is not None and ((start_dt and dt < start_dt) or (end_dt and dt > end_dt)):
+            continue
+        if not doc.get("message_count"):
+            continue
+        if not force and doc.get("summary_count") == doc["message_count"]:
+            skipped += 1
+            continue
+        call_ids.append(doc["call_id"])
+    return call_ids, skipped
+
+
+def _sync_load_calls(user_id: str, workflow_id: str, call_ids: List[str]) -> List[Dict[str, Any]]:
+    return list(calls().find(
+        {"user_id": user_id, "workflow_id": workflow_id, "call_id": {"$in": call_ids}},
+        {"_id": 0, "call_id": 1, "messages": 1, f"metadata.{SUMMARY_FIELD}": 1},
+    ))
+
+
+def _sync_write(ops: List[UpdateOne]) -> int:
+    try:
+        return calls().bulk_write(ops, ordered=False).matched_count
+    except BulkWriteError as e:
+        logger.error(f"Bulk summary write partially failed: {e.details.get('writeErrors', [])[:3]}")
+        return e.details.get("nMatched", 0)
+
+
+async def run_bulk_summary(job: BulkSummaryJob):
+    """
+    Summarize every selected call of a job.
+
+    Calls are loaded in batches and fed to `job.concurrency` workers through a bounded
+    queue; provider request rates are limited by the shared agent policy. Summaries are
+    written back with `bulk_write` every BULK_SUMMARY_WRITE_BATCH results. Progress is
+    stored every BULK_SUMMARY_HEARTBEAT_S seconds so any worker can report it.
+    """
+    pending: List[UpdateOne] = []
+    write_lock = asyncio.Lock()
+
+    async def flush():
+        async with write_lock:
+            nonlocal pending
+            ops, pending = pending, []
+            if ops:
+                job.written += await run_in("io_mongo", _sync_write, ops)
+
+    async def process(doc: Dict[str, Any]):
+        try:
+            summary, cached = await build_call_summary(doc, force=job.force)
+        except EmptyCallError:
+            job.empty += 1
+            return
+        except Exception as e:
+            job.failed += 1
+            job.errors.append(f"{doc.get('call_id')}: {str(e)}")
+            logger.warning(f"Bulk summary failed for call {doc.get('call_id')}: {str(e)}")
+            return
+        if cached:
+            job.unchanged += 1
+            return
+        job.add_usage(summary.get("usage") or {})
+        pending.append(UpdateOne(
+            {"user_id": job.user_id, "workflow_id": job.workflow_id, "call_id": doc["call_id"]},
+            summary_update(summary),
+        ))
+        job.summarized += 1
+        if len(pending) >= BULK_SUMMARY_WRITE_BATCH:
+            await flush()
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=job.concurrency * 2)
+
+    async def produce(call_ids: List[str]):
+        try:
+            for i in range(0, len(call_ids), BULK_SUMMARY_LOAD_BATCH):
+                batch = call_ids[i:i + BULK_SUMMARY_LOAD_BATCH]
+                docs = await run_in("io_mongo", _sync_load_calls, job.user_id, job.workflow_id, batch)
+                # Calls deleted since selection are simply dropped
+                job.selected -= len(batch) - len(docs)
+                for doc in docs:
+                    await queue.put(doc)
+        finally:
+            for _ in range(job.concurrency):
+                await queue.put(None)
+
+    async def work():
+        while True:
+            doc = await queue.get()
+            if doc is None:
+                return
+            await process(doc)
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(BULK_SUMMARY_HEARTBEAT_S)
+            try:
+                cancel = await run_in("io_mongo", _sync_save, job)
+            except Exception as e:
+                logger.warning(f"Bulk summary {job.job_id} progress write failed: {str(e)}")
+                continue
+            if cancel and job.task is not None:
+                logger.info(f"Bulk summary {job.job_id} cancelled on request")
+                job.task.cancel()
+                return
+
+    job.status = "running"
+    job.started = time.monotonic()
+    beat = asyncio.create_task(heartbeat())
+    try:
+        call_ids, job.skipped = await run_in(
+            "io_mongo", _sync_select_calls, job.user_id, job.workflow_id, job.start, job.end, job.force
+        )
+        job.selected = len(call_ids)
+        logger.info(f"Bulk summary {job.job_id}: {job.selected} calls selected, {job.skipped} up to date")
+        await asyncio.gather(produce(call_ids), *(work() for _ in range(job.concurrency)))
+        job.status = "completed"
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+    except Exception as e:
+        logger.exception(f"Bulk summary {job.job_id} failed")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        try:
+            await flush()
+        except Exception as e:
+            logger.error(f"Bulk summary {job.job_id} final write failed: {str(e)}")
+            job.error = job.error or str(e)
+        beat.cancel()
+        job.finished = time.monotonic()
+        job.finished_at = now_ist_iso()
+        try:
+            await run_in("io_mongo", _sync_save, job)
+        except Exception as e:
+            logger.error(f"Bulk summary {job.job_id} final progress write failed: {str(e)}")
+        _jobs.pop(job.job_id, None)
+        logger.info(f"Bulk summary {job.job_id} {job.status}: {job.progress()}")
+
+
+@bulk_summary_router.post(
+    "/summarize-calls/bulk",
+    status_code=202,
+    summary="Start a bulk summarization job",
+    description=(
+        "Summarizes every call of a workflow created in the optional IST date range, skipping "
+        "calls whose stored summary is current. Returns a job ID to poll for progress."
+    ),
+)
+async def start_bulk_summary(payload: BulkSummarizeRequest):
+    try:
+        parse_bound_date_only(payload.start, as_end=False)
+        parse_bound_date_only(payload.end, as_end=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    concurrency = min(payload.concurrency or BULK_SUMMARY_CONCURRENCY, BULK_SUMMARY_MAX_CONCURRENCY)
+    job = BulkSummaryJob(
+        job_id=uuid.uuid4().hex,
+        user_id=payload.user_id,
+        workflow_id=payload.workflow_id,
+        start=payload.start,
+        end=payload.end,
+        force=payload.force,
+        concurrency=max(1, concurrency),
+    )
+    try:
+        claimed = await run_in("io_mongo", _sync_claim, job)
+    except Exception as e:
+        logger.error(f"Failed to store bulk summary job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not claimed:
+        raise HTTPException(status_code=429, detail="Too many bulk summarization jobs running")
+    _jobs[job.job_id] = job
+    job.task = background_jobs.spawn(run_bulk_summary(job), name=f"bulk-summary:{job.job_id}")
+    return JSONResponse(status_code=202, content=job.progress())
+
+
+@bulk_summary_router.get("/summarize-calls/bulk/{job_id}", summary="Progress of a bulk summarization job")
+async def get_bulk_summary(job_id: str):
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job.progress()
+    # Started by another worker, or finished
+    doc = await run_in("io_mongo", _sync_load, job_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return doc
+
+
+@bulk_summary_router.delete("/summarize-calls/bulk/{job_id}", summary="Cancel a bulk summarization job")
+async def cancel_bulk_summary(job_id: str):
+    job = _jobs.get(job_id)
+    if job is None:
+        # Another worker runs it and cancels it at its next heartbeat
+        doc = await run_in("io_mongo", _sync_request_cancel, job_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return doc
+    if job.task is not None and not job.task.done():
+        job.task.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            pass
+    return job.progress()
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+
+from models.schema import SummarizeCallRequest, CallSummaryResponse
+from services.livekit_api.mongodb.db import calls
+from services.livekit_api.mongodb.utils import now_ist_iso
+from utils.executors import run_in
+from .conversation_summarizer import format_messages, get_summarizer
+
+logger = logging.getLogger(__name__)
+
+call_summary_router = APIRouter()
+
+# Field under the call's metadata where the summary is cached
+SUMMARY_FIELD = "conversation_summary"
+
+
+class CallNotFoundError(LookupError):
+    """The requested call does not exist."""
+
+
+class EmptyCallError(Exception):
+    """The call exists but has no messages to summarize."""
+
+
+def messages_hash(messages: List[Any]) -> str:
+    """Content hash of a call transcript; any appended or edited message changes it."""
+    payload = json.dumps(messages, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _call_filter(user_id: str, workflow_id: str, call_id: str) -> Dict[str, str]:
+    return {"user_id": user_id, "workflow_id": workflow_id, "call_id": call_id}
+
+
+def _sync_load_call(user_id: str, workflow_id: str, call_id: str) -> Optional[Dict[str, Any]]:
+    return calls().find_one(
+        _call_filter(user_id, workflow_id, call_id),
+        {"_id": 0, "messages": 1, f"metadata.{SUMMARY_FIELD}": 1},
+    )
+
+
+def summary_update(summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$set": {f"metadata.{SUMMARY_FIELD}": summary, "updated_at": now_ist_iso()}}
+
+
+def _sync_store_summary(user_id: str, workflow_id: str, call_id: str, summary: Dict[str, Any]) -> None:
+    calls().update_one(_call_filter(user_id, workflow_id, call_id), summary_update(summary))
+
+
+def cached_summary(doc: Dict[str, Any], current_hash: str) -> Optional[Dict[str, Any]]:
+    """Return the stored summary if it was built from the current transcript."""
+    metadata = doc.get("metadata")
+    stored = metadata.get(SUMMARY_FIELD) if isinstance(metadata, dict) else None
+    if isinstance(stored, dict) and stored.get("messages_hash") == current_hash and stored.get("summary"):
+        return stored
+    return None
+
+
+def stored_segments(doc: Dict[str, Any]) -> Dict[str, str]:
+    """Segment summaries saved with the previous summary, keyed by segment hash."""
+    metadata = doc.get("metadata")
+    stored = metadata.get(SUMMARY_FIELD) if isinstance(metadata, dict) else None
+    segments = stored.get("segments") if isinstance(stored, dict) else None
+    return {s["hash"]: s["summary"] for s in segments or [] if isinstance(s, dict) and s.get("hash")}
+
+
+async def build_call_summary(doc: Dict[str, Any], force: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """
+    Summarize a loaded call document without storing the result.
+
+    Returns:
+        (summary, cached): the stored summary when it is current, otherwise a new one
+
+    Raises:
+        EmptyCallError: When the call has no messages
+    """
+    messages = doc.get("messages") or []
+    if not messages:
+        raise EmptyCallError("Call has no messages")
+
+    current_hash = messages_hash(messages)
+    if not force:
+        stored = cached_summary(doc, current_hash)
+        if stored is not None:
+            return stored, True
+
+    # Segment summaries from the previous run let a grown transcript re-summarize only its tail
+    result = await get_summarizer().summarize(
+        format_messages(messages).splitlines(),
+        known_segments=None if force else stored_segments(doc),
+    )
+    summary = {
+        "summary": result.output.conversation_summary,
+        "messages_hash": current_hash,
+        "message_count": len(messages),
+        "created_at": now_ist_iso(),
+        "segments": result.segments,
+        "usage": {
+            "requests": result.usage.requests,
+            "request_tokens": result.usage.request_tokens or 0,
+            "response_tokens": result.usage.response_tokens or 0,
+            "total_tokens": result.usage.total_tokens or 0,
+        },
+    }
+    return summary, False
+
+
+async def summarize_call(user_id: str, workflow_id: str, call_id: str, force: bool = False) -> Dict[str, Any]:
+    """
+    Summarize a stored call and cache the result in its metadata.
+
+    The summary is stored with a hash of the messages it was built from, so repeated
+    requests for an unchanged call skip the LLM entirely, and with its segment
+    summaries, so a call that grew only re-summarizes the new segments.
+
+    Args:
+        user_id: Owner of the call
+        workflow_id: Workflow the call belongs to
+        call_id: The call ID
+        force: Re-summarize even when the cached summary is current
+
+    Returns:
+        Dict with summary, messages_hash, message_count, created_at and cached
+
+    Raises:
+        CallNotFoundError: When the call does not exist
+        EmptyCallError: When the call has no messages
+    """
+    doc = await run_in("io_mongo", _sync_load_call, user_id, workflow_id, call_id)
+    if doc is None:
+        raise CallNotFoundError("Call not found")
+
+    summary, cached = await build_call_summary(doc, force=force)
+    if cached:
+        return {**summary, "cached": True}
+
+    await run_in("io_mongo", _sync_store_summary, user_id, workflow_id, call_id, summary)
+    logger.info("Stored summary for call %s/%s/%s (%d messages)", user_id, workflow_id, call_id, summary["message_count"])
+    return {**summary, "cached": False}
+
+
+@call_summary_router.post(
+    "/summarize-call",
+    response_model=CallSummaryResponse,
+    summary="Summarize a stored call",
+    description=(
+        "Reads the call's messages from MongoDB, summarizes them and caches the summary in "
+        "the call metadata. An unchanged transcript returns the cached summary; `force` re-runs it."
+    ),
+)
+async def summarize_call_endpoint(payload: SummarizeCallRequest) -> CallSummaryResponse:
+    try:
+        result = await summarize_call(payload.user_id, payload.workflow_id, payload.call_id, force=payload.force)
+    except CallNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except EmptyCallError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Error summarizing call")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return CallSummaryResponse(
+        user_id=payload.user_id,
+        workflow_id=payload.workflow_id,
+        call_id=payload.call_id,
+        conversation_summary=result["summary"],
+        messages_hash=result["messages_hash"],
+        message_count=result["message_count"],
+        created_at=result.get("created_at"),
+        cached=result["cached"],
+    )
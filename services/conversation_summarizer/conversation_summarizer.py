@@ -1,27 +1,150 @@
-from pydantic_ai import Agent
-from config.llms import conversation_summarizer_llm
-from prompts.conversation_summarizer import conversation_summarizer_prompt
-from models.schema import ConversationSummaryModel
-from fastapi import APIRouter
-from utils.agent_execution import execute_agent_safely
+import json
+import threading
+from typing import Any, Iterable, Optional
+
+from config.llms import get_conversation_summarizer_llm, get_conversation_summarizer_fallback_llm
+from prompts.conversation_summarizer import conversation_summarizer_prompt, segment_summarizer_prompt
+from models.schema import ConversationSummaryModel, SummarizeConversationRequest
+from fastapi import APIRouter, Body, HTTPException
+from sse_starlette import EventSourceResponse
 
 # FastAPI router setup
 conversation_summarizer_router = APIRouter()
 
-conversation_summarizer = Agent(
-    model=conversation_summarizer_llm,
-    system_prompt=conversation_summarizer_prompt,
-    output_type=ConversationSummaryModel,
-    retries=5
-)
+_summarizer = None
+_summarizer_lock = threading.Lock()
 
-@conversation_summarizer_router.post("/summarize-conversation", response_model=ConversationSummaryModel)
-async def summarize_conversation(conversation_history: str) -> ConversationSummaryModel:
-    prompt = f"""
+
+def _message_field(message: Any, *names: str) -> Optional[Any]:
+    for name in names:
+        value = message.get(name) if isinstance(message, dict) else getattr(message, name, None)
+        if value:
+            return value
+    return None
+
+
+def format_messages(messages: Iterable[Any]) -> str:
+    """Render structured messages (models or stored call message dicts) as a `role: content` transcript."""
+    lines = []
+    for message in messages:
+        content = _message_field(message, "content", "text", "message", "data")
+        if content is None:
+            continue
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, default=str)
+        role = _message_field(message, "role", "speaker", "name")
+        lines.append(f"{role}: {content}" if role else content)
+    return "\n".join(lines)
+
+
+def build_summary_prompt(conversation_history: str) -> str:
+    return f"""
     # Conversation history: {conversation_history}
 
     *** Summarize the conversation in a concise and detailed manner. ***
     """
 
-    response = await execute_agent_safely(conversation_summarizer, prompt)
-    return response.output
+
+def get_summarizer():
+    """
+    Shared summarizer: a single pass for short transcripts, map-reduce over token-budgeted
+    segments for long ones. Built on first use so pydantic_ai loads outside of app import.
+    """
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                from pydantic_ai import Agent
+                from .map_reduce import MapReduceSummarizer
+
+                llm = get_conversation_summarizer_llm()
+                conversation_summarizer = Agent(
+                    model=llm,
+                    name="conversation_summarizer",
+                    system_prompt=conversation_summarizer_prompt,
+                    output_type=ConversationSummaryModel,
+                    retries=5
+                )
+                # Condenses one segment of a long transcript (or a group of partial summaries) into notes
+                conversation_segment_summarizer = Agent(
+                    model=llm,
+                    name="conversation_segment_summarizer",
+                    system_prompt=segment_summarizer_prompt,
+                    output_type=str,
+                    retries=2
+                )
+                _summarizer = MapReduceSummarizer(
+                    conversation_summarizer,
+                    conversation_segment_summarizer,
+                    build_summary_prompt,
+                    fallback_model=get_conversation_summarizer_fallback_llm(),
+                )
+    return _summarizer
+
+
+def _resolve_history(conversation_history: Optional[str], payload: Optional[SummarizeConversationRequest]) -> str:
+    if payload is not None:
+        if payload.messages:
+            return format_messages(payload.messages)
+        if payload.conversation_history:
+            return payload.conversation_history
+    if conversation_history:
+        return conversation_history
+    raise HTTPException(status_code=400, detail="Provide messages or conversation_history")
+
+
+async def summarize_history(conversation_history: str) -> ConversationSummaryModel:
+    """Summarize a flattened transcript with the shared summarizer."""
+    result = await get_summarizer().summarize(conversation_history.splitlines())
+    return result.output
+
+
+@conversation_summarizer_router.post("/summarize-conversation", response_model=ConversationSummaryModel)
+async def summarize_conversation(
+    conversation_history: Optional[str] = None,
+    payload: Optional[SummarizeConversationRequest] = Body(None),
+) -> ConversationSummaryModel:
+    # The query parameter is kept for existing callers; prefer the JSON body for long conversations
+    return await summarize_history(_resolve_history(conversation_history, payload))
+
+
+@conversation_summarizer_router.post(
+    "/summarize-conversation/stream",
+    summary="Stream a conversation summary as server-sent events",
+    description=(
+        "Emits `delta` events carrying new summary text as the model generates it, then a "
+        "`done` event with the complete summary. A `reset` event means earlier text was revised "
+        "and the next `delta` carries the full text so far. Failures after the stream has started are "
+        "reported as an `error` event."
+    ),
+)
+async def summarize_conversation_stream(payload: SummarizeConversationRequest):
+    history = _resolve_history(None, payload)
+
+    async def events():
+        from utils.agent_execution import stream_agent_safely
+
+        summarizer = get_summarizer()
+        sent = ""
+        summary = None
+        try:
+            # Long transcripts are mapped and reduced first; only the final summary is streamed
+            prompt, _ = await summarizer.prepare(history.splitlines())
+            async for output in stream_agent_safely(summarizer.agent, prompt):
+                summary = output
+                text = getattr(output, "conversation_summary", None) or ""
+                if text.startswith(sent):
+                    delta = text[len(sent):]
+                else:
+                    # Partial validation revised earlier text; resend it whole
+                    delta = text
+                    yield {"event": "reset", "data": ""}
+                sent = text
+                if delta:
+                    yield {"event": "delta", "data": json.dumps({"text": delta}, ensure_ascii=False)}
+        except Exception as e:
+            yield {"event": "error", "data": json.dumps({"detail": str(e)})}
+            return
+        yield {"event": "done", "data": summary.model_dump_json() if summary is not None else "{}"}
+
+    return EventSourceResponse(events())
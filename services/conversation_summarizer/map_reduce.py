@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+from dotenv import load_dotenv
+from pydantic_ai.usage import Usage
+
+from utils.agent_execution import execute_agent_safely
+from utils.tokens import count_tokens, split_by_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Token budget per map segment; transcripts that fit in one segment are summarized in a single pass
+SUMMARY_SEGMENT_TOKENS = int(os.getenv("SUMMARY_SEGMENT_TOKENS", "6000"))
+# Concurrent segment/merge runs across all requests in the process
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+# Partial summaries above this many tokens are merged in another intermediate round
+SUMMARY_REDUCE_TOKENS = int(os.getenv("SUMMARY_REDUCE_TOKENS", "6000"))
+SUMMARY_SEGMENT_CACHE_SIZE = int(os.getenv("SUMMARY_SEGMENT_CACHE_SIZE", "4096"))
+
+
+def segment_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_segments(lines: List[str], max_tokens: int = SUMMARY_SEGMENT_TOKENS) -> List[str]:
+    """
+    Greedily pack transcript lines into segments of at most `max_tokens` tokens.
+
+    Packing only looks forward, so appending lines never changes earlier segments:
+    only the last segment and any new ones differ, which keeps segment hashes stable.
+    A single line longer than the budget is split on token boundaries.
+    """
+    segments: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if tokens > max_tokens:
+            if current:
+                segments.append("\n".join(current))
+                current, current_tokens = [], 0
+            segments.extend(split_by_tokens(line, max_tokens))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            segments.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        segments.append("\n".join(current))
+    return segments
+
+
+def _segment_prompt(segment: str, index: int, total: int) -> str:
+    return f"""
+    # Conversation part {index + 1} of {total}:
+    {segment}
+
+    *** Summarize this part of the conversation as notes for the final summary. ***
+    """
+
+
+def _merge_prompt(partials: List[str], final: bool) -> str:
+    parts = "\n\n".join(f"## Part {i + 1}\n{summary}" for i, summary in enumerate(partials))
+    instruction = (
+        "Combine these partial summaries of consecutive parts of one conversation into a single "
+        "concise and detailed summary of the whole conversation."
+        if final else
+        "Merge these partial summaries of consecutive parts of one conversation into one set of notes."
+    )
+    return f"""
+    # Partial summaries, in conversation order:
+    {parts}
+
+    *** {instruction} ***
+    """
+
+
+@dataclass
+class SummaryResult:
+    output: Any
+    usage: Usage = field(default_factory=Usage)
+    # [{"hash": ..., "summary": ...}] for each map segment, in order
+    segments: List[Dict[str, str]] = field(default_factory=list)
+    segments_reused: int = 0
+    reduce_rounds: int = 0
+
+
+class MapReduceSummarizer:
+    """
+    Summarize transcripts of any length with a fixed context budget.
+
+    Short transcripts go to the final agent in one prompt. Longer ones are split into
+    token-budgeted segments that `segment_agent` summarizes concurrently; the partial
+    summaries are merged in rounds until they fit, and the final agent produces the
+    structured summary. Segment summaries are cached by content hash, so a transcript
+    that only grew at the end re-summarizes just its tail.
+    """
+
+    def __init__(
+        self,
+        agent,
+        segment_agent,
+        build_prompt: Callable[[str], str],
+        *,
+        fallback_model: Any = None,
+        segment_tokens: int = SUMMARY_SEGMENT_TOKENS,
+        reduce_tokens: int = SUMMARY_REDUCE_TOKENS,
+        concurrency: int = SUMMARY_MAP_CONCURRENCY,
+        cache_size: int = SUMMARY_SEGMENT_CACHE_SIZE,
+    ):
+        self.agent = agent
+        self.segment_agent = segment_agent
+        self.build_prompt = build_prompt
+        self.fallback_model = fallback_model
+        self.segment_tokens = segment_tokens
+        self.reduce_tokens = reduce_tokens
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            return self._cache.get(key)
+
+    def _cache_put(self, key: str, summary: str):
+        with self._cache_lock:
+            self._cache[key] = summary
+
+    async def _summarize_part(self, key: str, prompt: str, usage: Usage) -> str:
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        async with self._semaphore:
+            response = await execute_agent_safely(self.segment_agent, prompt)
+        usage.incr(response.usage())
+        self._cache_put(key, response.output)
+        return response.output
+
+    async def _map(self, segments: List[str], known: Dict[str, str], result: SummaryResult) -> List[str]:
+        hashes = [segment_hash(segment) for segment in segments]
+        for key in hashes:
+            if key in known:
+                self._cache_put(key, known[key])
+
+        async def one(i: int) -> str:
+            if self._cache_get(hashes[i]) is not None:
+                result.segments_reused += 1
+            return await self._summarize_part(
+                hashes[i], _segment_prompt(segments[i], i, len(segments)), result.usage
+            )
+
+        summaries = await asyncio.gather(*(one(i) for i in range(len(segments))))
+        result.segments = [{"hash": h, "summary": s} for h, s in zip(hashes, summaries)]
+        return list(summaries)
+
+    def _group(self, partials: List[str]) -> List[List[str]]:
+        """Pack partial summaries into merge groups within the reduce budget, at least two per group."""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for summary in partials:
+            tokens = count_tokens(summary)
+            if len(current) >= 2 and current_tokens + tokens > self.reduce_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            if len(current) == 1 and groups:
+                groups[-1].extend(current)
+            else:
+                groups.append(current)
+        return groups
+
+    async def _reduce(self, partials: List[str], result: SummaryResult) -> List[str]:
+        while len(partials) > 1 and sum(count_tokens(p) for p in partials) > self.reduce_tokens:
+            groups = self._group(partials)
+            result.reduce_rounds += 1
+            partials = list(await asyncio.gather(*(
+                self._summarize_part(
+                    "reduce:" + segment_hash("\0".join(group)),
+                    _merge_prompt(group, final=False),
+                    result.usage,
+                )
+                for group in groups
+            )))
+        return partials
+
+    async def prepare(self, lines: List[str], known_segments: Optional[Dict[str, str]] = None) -> Tuple[str, SummaryResult]:
+        """
+        Run the map and intermediate reduce rounds and return the prompt for the final agent.
+
+        Args:
+            lines: Transcript lines in order
+            known_segments: Segment summaries from an earlier run, keyed by segment hash
+
+        Returns:
+            (final prompt, partial result with map/reduce usage and segment summaries)
+        """
+        result = SummaryResult(output=None)
+        segments = split_segments(lines, self.segment_tokens)
+        if len(segments) <= 1:
+            return self.build_prompt("\n".join(lines)), result
+
+        partials = await self._map(segments, known_segments or {}, result)
+        partials = await self._reduce(partials, result)
+        logger.info(
+            "Map-reduce summary: %d segments (%d reused), %d reduce rounds",
+            len(segments), result.segments_reused, result.reduce_rounds,
+        )
+        return _merge_prompt(partials, final=True), result
+
+    async def summarize(self, lines: List[str], known_segments: Optional[Dict[str, str]] = None) -> SummaryResult:
+        """Summarize transcript lines into the final agent's structured output."""
+        prompt, result = await self.prepare(lines, known_segments)
+        response = await execute_agent_safely(self.agent, prompt, fallback_model=self.fallback_model)
+        result.usage.incr(response.usage())
+        result.output = response.output
+        return result
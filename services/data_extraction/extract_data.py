@@ -1,10 +1,11 @@
-import os, json, logging, asyncio, pathlib, time
+import os, json, logging, pathlib, time, threading
 from typing import Union, Dict, Any, Optional, List
 import unstructured_client
 from unstructured_client.models import operations, shared
-from unstructured.staging.base import elements_from_dicts
 from dotenv import load_dotenv  
 
+from utils.executors import run_in
+from utils.telemetry import span
 from .utils.save_to_mongodb import save_to_mongodb
 
 load_dotenv()
@@ -33,9 +34,6 @@ class Config:
         if not self.unstructured_api_url.startswith(('http://', 'https://')):
             raise ValueError("UNSTRUCTURED_API_URL must be a valid URL")
 
-# Initialize configuration
-config = Config()
-
 # Enhanced logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -43,11 +41,33 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger("unstructured_extractor")
 
-# Initialize client 
-CLIENT = unstructured_client.UnstructuredClient(
-    api_key_auth=config.unstructured_api_key,
-    server_url=config.unstructured_api_url
-)
+_config = None
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_config() -> Config:
+    """Validated Unstructured settings, loaded on first extraction rather than on import."""
+    global _config
+    if _config is None:
+        with _client_lock:
+            if _config is None:
+                _config = Config()
+    return _config
+
+
+def get_client() -> unstructured_client.UnstructuredClient:
+    """Shared Unstructured API client, created on first use."""
+    global _client
+    if _client is None:
+        config = get_config()
+        with _client_lock:
+            if _client is None:
+                _client = unstructured_client.UnstructuredClient(
+                    api_key_auth=config.unstructured_api_key,
+                    server_url=config.unstructured_api_url
+                )
+    return _client
 
 async def extract_file(
     path: Union[str, pathlib.Path],
@@ -100,9 +120,9 @@ async def extract_file(
         if strategy == shared.Strategy.VLM:
             partition_params.update({
                 'vlm_model_provider': shared.VLMModelProvider.OPENAI,  # gateway trick
-                'vlm_model': config.model_id,
+                'vlm_model': get_config().model_id,
             })
-            LOGGER.info("Using VLM strategy with Gemini model: %s", config.model_id)
+            LOGGER.info("Using VLM strategy with Gemini model: %s", get_config().model_id)
         else:
             LOGGER.info("Using %s strategy (VLM not available on this API)", strategy.value if hasattr(strategy, 'value') else str(strategy))
         
@@ -115,10 +135,9 @@ async def extract_file(
         req = operations.PartitionRequest(partition_parameters=params)
         
         LOGGER.info("Sending request to Unstructured API...")
-        # Make the blocking call non-blocking by running it in a thread pool executor
-        # This is more compatible with uvloop than asyncio.to_thread()
-        loop = asyncio.get_event_loop()
-        res = await loop.run_in_executor(None, lambda: CLIENT.general.partition(request=req))
+        # Slow partitions run in their own pool so they cannot starve Mongo and indexing work
+        with span("unstructured.partition", strategy=str(partition_params.get("strategy"))):
+            res = await run_in("extraction_http", lambda: get_client().general.partition(request=req))
 
         if res.status_code != 200:
             error_msg = f"Partition failed: {res.status_code}"
@@ -141,6 +160,7 @@ async def extract_file(
         result = {"json": json_out, "processing_time": processing_time}
         
         if return_elements:
+            from unstructured.staging.base import elements_from_dicts
             result["elements"] = elements_from_dicts(json_out)
         
         return result
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Body
 from services.data_extraction.get_extracted_data import get_extracted_data
-from services.data_extraction.extract_data import process_document_extraction
 from typing import Union, Dict, Any, Optional, List
 from fastapi import HTTPException, File, UploadFile, BackgroundTasks, Depends, Body, Query, Form
 import os
@@ -14,6 +13,12 @@ logger = logging.getLogger("data_extraction")
 
 data_extraction_router = APIRouter()
 
+
+async def process_document_extraction(file_path: str, **kwargs: Any) -> Dict[str, Any]:
+    # The Unstructured client and its settings load on first use, not when the router is imported
+    from services.data_extraction.extract_data import process_document_extraction as extract
+    return await extract(file_path, **kwargs)
+
 # Extract data from file (synchronous)
 # -------------------------------
 @data_extraction_router.post("/extract-data")
@@ -1,8 +1,10 @@
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import os,logging,asyncio
+import os,logging
 from typing import Dict, Any, Optional, List
 
+from utils.executors import run_in
+
 load_dotenv()
 
 class Config:
@@ -94,9 +96,8 @@ async def get_extracted_data(
     Returns:
         Dictionary containing the extracted data, or None if not found
     """
-    # Run the synchronous MongoDB operation in a thread pool to avoid blocking
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _sync_get_extracted_data, workflow_id, collection_name)
+    # Run the synchronous MongoDB operation in the Mongo thread pool to avoid blocking
+    return await run_in("io_mongo", _sync_get_extracted_data, workflow_id, collection_name)
 
 
             
\ No newline at end of file
@@ -1,8 +1,10 @@
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import os,logging,time,asyncio,uuid
+import os,logging,time,uuid
 from typing import Dict, Any
 
+from utils.executors import run_in
+
 load_dotenv()
 
 PYMONGO_AVAILABLE = True
@@ -100,6 +102,5 @@ async def save_to_mongodb(
         LOGGER.error("pymongo is not installed. Install it with: pip install pymongo")
         return False
     
-    # Run the synchronous MongoDB operation in a thread pool to avoid blocking
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _sync_save_to_mongodb, workflow_id, collection_name, data)
\ No newline at end of file
+    # Run the synchronous MongoDB operation in the Mongo thread pool to avoid blocking
+    return await run_in("io_mongo", _sync_save_to_mongodb, workflow_id, collection_name, data)
\ No newline at end of file
@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+
+
+class AgentProfileRequest(BaseModel):
+    profile_id: Optional[str] = None
+
+    user_id: str
+    workflow_id: str
+    system_agent_name: str
+    agent_name: str
+    agent_gender: str
+    agent_language: str
+    agent_number: str
+    tts_model: str
+    language_tts: str
+    voice_id: str
+    llm_model: str
+    stt_model: str
+
+    company_name: Optional[str] = None
+    individual_name: Optional[str] = None
+    knowledge_base: Optional[str] = None
+    custom_instructions: Optional[str] = None
+    campaign_objective: Optional[str] = None
+    campaign_type: Optional[str] = None
+    campaign_briefing: Optional[str] = None
+    target_audience: Optional[str] = None
+    key_talking_points: Optional[str] = None
+    objection_responses: Optional[str] = None
+
+
+class AgentProfileRef(BaseModel):
+    profile_id: str
+    version: str
+    created: bool = False
+
+
+class AgentProfileResponse(BaseModel):
+    profile_id: str
+    version: str
+    config: Dict[str, Any]
@@ -0,0 +1,49 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+
+from .models import AgentProfileRequest, AgentProfileRef, AgentProfileResponse
+from .store import save_agent_profile, get_agent_profile, split_agent_config
+
+logger = logging.getLogger(__name__)
+
+agent_profile_router = APIRouter()
+
+
+@agent_profile_router.post(
+    "/add-agent-profile",
+    response_model=AgentProfileRef,
+    summary="Store a versioned agent profile",
+    description="Persists an agent config once; identical configs resolve to the same version.",
+)
+async def add_agent_profile(payload: AgentProfileRequest) -> AgentProfileRef:
+    try:
+        data = payload.model_dump()
+        profile_id = data.pop("profile_id")
+        profile, _ = split_agent_config(data)
+        ref = await save_agent_profile(profile, profile_id=profile_id)
+        return AgentProfileRef(**ref)
+    except Exception as e:
+        logger.exception("Error storing agent profile")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@agent_profile_router.get(
+    "/get-agent-profile",
+    response_model=AgentProfileResponse,
+    summary="Fetch an agent profile by ID and optional version",
+)
+async def get_agent_profile_endpoint(
+    profile_id: str = Query(..., min_length=1),
+    version: Optional[str] = Query(None, min_length=1, description="Profile version, latest when omitted"),
+) -> AgentProfileResponse:
+    try:
+        doc = await get_agent_profile(profile_id, version)
+        if not doc:
+            raise HTTPException(status_code=404, detail="Agent profile not found")
+        return AgentProfileResponse(**doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error fetching agent profile")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+from dotenv import load_dotenv
+
+from ..mongodb.db import agent_profiles
+from ..mongodb.utils import now_ist_iso
+from utils.executors import run_in
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "full" (default) serializes the whole agent config into dispatch metadata, as agent workers
+# expect today. "profile" sends only a profile reference plus per-call fields; opt in once every
+# agent worker resolves agent_profile_id/agent_profile_version through /livekit/get-agent-profile.
+DISPATCH_METADATA_MODE = os.getenv("DISPATCH_METADATA_MODE", "full").lower()
+AGENT_PROFILE_CACHE_SIZE = int(os.getenv("AGENT_PROFILE_CACHE_SIZE", "1024"))
+# Seconds a process skips re-marking a cached version as the latest of its profile; after a revert
+# to an earlier version another worker's save may show as latest for at most this long.
+AGENT_PROFILE_TOUCH_S = float(os.getenv("AGENT_PROFILE_TOUCH_S", "60"))
+
+# Fields that describe the agent itself and stay the same for every call of a campaign.
+# Everything else in an agent config (room, numbers, trunk) is a per-call override.
+PROFILE_FIELDS = (
+    "user_id",
+    "workflow_id",
+    "system_agent_name",
+    "agent_name",
+    "agent_gender",
+    "agent_language",
+    "agent_number",
+    "tts_model",
+    "language_tts",
+    "voice_id",
+    "llm_model",
+    "stt_model",
+    "company_name",
+    "individual_name",
+    "knowledge_base",
+    "custom_instructions",
+    "campaign_objective",
+    "campaign_type",
+    "campaign_briefing",
+    "target_audience",
+    "key_talking_points",
+    "objection_responses",
+)
+
+# (profile_id, version) -> config. Versions are content hashes, so entries never go stale.
+_profile_cache: LRUCache = LRUCache(maxsize=AGENT_PROFILE_CACHE_SIZE)
+_cache_lock = threading.Lock()
+# profile_id -> (version, monotonic time) this process last marked as the latest in MongoDB
+_touched: LRUCache = LRUCache(maxsize=AGENT_PROFILE_CACHE_SIZE)
+
+
+def _cache_get(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        return _profile_cache.get(key)
+
+
+def _cache_put(key: Tuple[str, str], config: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _profile_cache[key] = config
+
+
+def split_agent_config(agent_config: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split an agent config into its reusable profile part and its per-call overrides."""
+    profile = {k: agent_config.get(k) for k in PROFILE_FIELDS}
+    overrides = {k: v for k, v in agent_config.items() if k not in PROFILE_FIELDS}
+    return profile, overrides
+
+
+def profile_version(profile: Dict[str, Any]) -> str:
+    """Return a stable content hash used as the profile version."""
+    payload = json.dumps(profile, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def default_profile_id(profile: Dict[str, Any]) -> str:
+    return f"{profile.get('user_id')}:{profile.get('workflow_id')}:{profile.get('system_agent_name')}"
+
+
+def _sync_save_profile(profile_id: str, version: str, profile: Dict[str, Any]) -> bool:
+    now = now_ist_iso()
+    res = agent_profiles().update_one(
+        {"profile_id": profile_id, "version": version},
+        {
+            "$setOnInsert": {
+                "profile_id": profile_id,
+                "version": version,
+                "config": profile,
+                "created_at": now,
+            },
+            "$set": {"last_used_at": now},
+        },
+        upsert=True,
+    )
+    return res.upserted_id is not None
+
+
+def _sync_get_profile(profile_id: str, version: Optional[str]) -> Optional[Dict[str, Any]]:
+    q = {"profile_id": profile_id}
+    if version:
+        q["version"] = version
+    cursor = (
+        agent_profiles()
+        .find(q, {"_id": 0, "profile_id": 1, "version": 1, "config": 1, "created_at": 1})
+        # Latest is the version last saved, so reverting to an earlier config makes it latest again
+        .sort([("last_used_at", -1), ("created_at", -1)])
+        .limit(1)
+    )
+    return next(cursor, None)
+
+
+async def save_agent_profile(profile: Dict[str, Any], profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Persist an agent profile once and return its reference.
+
+    Identical configs map to the same version, so repeated dispatches for a campaign
+    only hit MongoDB the first time a process sees the profile, and then once every
+    AGENT_PROFILE_TOUCH_S to keep it marked as the profile's latest version.
+
+    Args:
+        profile: The profile part of the agent config
+        profile_id: Optional caller-chosen ID, defaults to user/workflow/system agent
+
+    Returns:
+        Dict with profile_id, version and whether a new version was created
+    """
+    profile_id = profile_id or default_profile_id(profile)
+    version = profile_version(profile)
+    key = (profile_id, version)
+
+    with _cache_lock:
+        touched = _touched.get(profile_id)
+    fresh = touched is not None and touched[0] == version and time.monotonic() - touched[1] < AGENT_PROFILE_TOUCH_S
+    if fresh and _cache_get(key) is not None:
+        return {"profile_id": profile_id, "version": version, "created": False}
+
+    # Also bumps last_used_at of a known version, which makes it the latest again after a revert
+    created = await run_in("io_mongo", _sync_save_profile, profile_id, version, profile)
+    _cache_put(key, profile)
+    with _cache_lock:
+        _touched[profile_id] = (version, time.monotonic())
+    if created:
+        logger.info("Stored agent profile %s version %s", profile_id, version)
+    return {"profile_id": profile_id, "version": version, "created": created}
+
+
+async def get_agent_profile(profile_id: str, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fetch an agent profile, from the in-process cache when the version is known.
+
+    Args:
+        profile_id: The profile ID
+        version: Specific version to fetch, latest when omitted
+
+    Returns:
+        Dict with profile_id, version and config, or None if not found
+    """
+    if version:
+        cached = _cache_get((profile_id, version))
+        if cached is not None:
+            return {"profile_id": profile_id, "version": version, "config": cached}
+
+    doc = await run_in("io_mongo", _sync_get_profile, profile_id, version)
+    if not doc:
+        return None
+    _cache_put((doc["profile_id"], doc["version"]), doc["config"])
+    return {"profile_id": doc["profile_id"], "version": doc["version"], "config": doc["config"]}
+
+
+async def compact_agent_config(agent_config: Dict[str, Any], profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Replace the profile part of an agent config with a reference to the stored profile.
+
+    The returned dict keeps user_id/workflow_id and every per-call field, and adds
+    agent_profile_id/agent_profile_version for the agent worker to resolve. Falls back
+    to the full config when profile mode is disabled or the store is unavailable.
+    """
+    if DISPATCH_METADATA_MODE == "full":
+        return dict(agent_config)
+
+    profile, overrides = split_agent_config(agent_config)
+    try:
+        ref = await save_agent_profile(profile, profile_id=profile_id)
+    except Exception as e:
+        logger.error(f"Failed to store agent profile, sending full config: {e}")
+        return dict(agent_config)
+
+    return {
+        "user_id": agent_config.get("user_id"),
+        "workflow_id": agent_config.get("workflow_id"),
+        **overrides,
+        "agent_profile_id": ref["profile_id"],
+        "agent_profile_version": ref["version"],
+    }
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from .s3 import get_s3_client
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: workers cannot coordinate, run a single one
+    fcntl = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RECORDING_CACHE_DIR = os.getenv("RECORDING_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "nexus-recording-cache")
+RECORDING_CACHE_MAX_BYTES = int(os.getenv("RECORDING_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Entries used this recently are never evicted, so a file handed out is still there when it is opened
+RECORDING_CACHE_MIN_AGE_S = float(os.getenv("RECORDING_CACHE_MIN_AGE_S", "60"))
+# Partial downloads older than this were abandoned by a crashed worker and are removed
+RECORDING_CACHE_PARTIAL_MAX_AGE_S = float(os.getenv("RECORDING_CACHE_PARTIAL_MAX_AGE_S", "3600"))
+
+_PARTIAL_SUFFIX = ".part"
+_LOCK_FILE = ".lock"
+
+
+class RecordingCache:
+    """
+    Size-bounded on-disk LRU of recently downloaded recordings.
+
+    Entries are keyed by bucket/key/ETag, so a re-uploaded object never serves
+    stale bytes. Concurrent misses for the same entry download it only once per process.
+
+    The directory may be shared by several workers: the disk is the only state. An
+    entry's mtime is its last use, and size and eviction come from a directory scan
+    under an exclusive file lock, so the cap holds for all workers together.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(self.directory, exist_ok=True)
+        self._evict()
+
+    @staticmethod
+    def cache_key(bucket: str, object_key: str, etag: str) -> str:
+        raw = f"{bucket}\0{object_key}\0{etag}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    @contextmanager
+    def _dir_lock(self):
+        """Exclusive lock on the cache directory across workers (and threads of this one)."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._path(_LOCK_FILE), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _evict(self):
+        """Drop abandoned partial downloads, then least recently used entries until under max_bytes."""
+        now = time.time()
+        with self._dir_lock():
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if name == _LOCK_FILE:
+                    continue
+                path = self._path(name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(_PARTIAL_SUFFIX):
+                    # Other workers' downloads in progress are left alone
+                    if now - st.st_mtime > RECORDING_CACHE_PARTIAL_MAX_AGE_S:
+                        self._remove(path)
+                    continue
+                entries.append((st.st_mtime, path, st.st_size))
+                total += st.st_size
+
+            for mtime, path, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if now - mtime < RECORDING_CACHE_MIN_AGE_S:
+                    # Everything after this was used even more recently
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            # Marks the entry as recently used for every worker's eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def fetch(self, bucket: str, object_key: str, etag: str) -> str:
+        """Return the local path of the object, downloading it on a miss."""
+        key = self.cache_key(bucket, object_key, etag)
+        path = self.get(key)
+        if path:
+            return path
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            path = self.get(key)
+            if path:
+                return path
+
+            final_path = self._path(key)
+            partial_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}{_PARTIAL_SUFFIX}"
+            try:
+                get_s3_client().download_file(bucket, object_key, partial_path)
+                os.replace(partial_path, final_path)
+                size = os.path.getsize(final_path)
+            except Exception:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+            self._evict()
+            logger.info("Cached recording %s/%s (%d bytes)", bucket, object_key, size)
+            return final_path
+
+
+_cache: Optional[RecordingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_recording_cache() -> RecordingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RecordingCache(RECORDING_CACHE_DIR, RECORDING_CACHE_MAX_BYTES)
+    return _cache
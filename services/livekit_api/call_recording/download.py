@@ -1,47 +1,48 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-import boto3
-from botocore.client import Config
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, RedirectResponse, Response
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import os
 import tempfile
 import shutil
-from typing import Optional
+from typing import Optional, Literal
+
+from .s3 import (
+    get_s3_client,
+    get_recording_object,
+    iter_body,
+    parse_range_header,
+    presign_recording_url,
+    etag_matches,
+    is_not_found,
+    is_not_modified,
+    s3_error_code,
+    content_disposition_header,
+)
+from .cache import get_recording_cache
 
 load_dotenv()
 
-# Environment-based configuration (do NOT hardcode secrets)
-AWS_S3_ENDPOINT = os.getenv("AWS_S3_ENDPOINT")
-AWS_S3_ACCESS_KEY_ID = os.getenv("AWS_S3_ACCESS_KEY_ID")
-AWS_S3_SECRET_ACCESS_KEY = os.getenv("AWS_S3_SECRET_ACCESS_KEY")
-AWS_S3_REGION = os.getenv("AWS_S3_REGION", "us-east-1")
-AWS_S3_FORCE_PATH_STYLE = os.getenv("AWS_S3_FORCE_PATH_STYLE", "true").lower() in ("1", "true", "yes")
+# Default delivery mode:
+#   "stream"    pipes GetObject to the client
+#   "file"      stages the object in a temp dir first
+#   "presigned" returns a short-lived URL so the client fetches straight from S3/MinIO
+#   "cached"    serves from a size-bounded on-disk LRU keyed by bucket/key/ETag
+RECORDING_DOWNLOAD_MODE = os.getenv("RECORDING_DOWNLOAD_MODE", "stream").lower()
+RECORDING_PRESIGN_EXPIRES = int(os.getenv("RECORDING_PRESIGN_EXPIRES", "300"))
+# Upper bound for caller-supplied expiry; SigV4 URLs cap out at 7 days anyway
+RECORDING_PRESIGN_MAX_EXPIRES = int(os.getenv("RECORDING_PRESIGN_MAX_EXPIRES", "3600"))
+
+DownloadMode = Literal["file", "stream", "presigned", "cached"]
 
-call_recording_router = APIRouter()
+download_router = APIRouter()
 
 class DownloadRequest(BaseModel):
     bucket: Optional[str] = "recording"
     object_key: str
     filename: Optional[str] = None
-
-
-def _get_s3_client():
-    if not (AWS_S3_ENDPOINT and AWS_S3_ACCESS_KEY_ID and AWS_S3_SECRET_ACCESS_KEY):
-        raise RuntimeError("S3 configuration missing. Ensure AWS_S3_* env vars are set.")
-
-    s3_config = {}
-    if AWS_S3_FORCE_PATH_STYLE:
-        s3_config = {"s3": {"addressing_style": "path"}}
-
-    return boto3.client(
-        "s3",
-        endpoint_url=AWS_S3_ENDPOINT,
-        aws_access_key_id=AWS_S3_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_S3_SECRET_ACCESS_KEY,
-        region_name=AWS_S3_REGION,
-        config=Config(**s3_config) if s3_config else Config(),
-    )
+    mode: Optional[DownloadMode] = None
+    expires_in: Optional[int] = Field(None, ge=1, le=RECORDING_PRESIGN_MAX_EXPIRES)
 
 
 def _cleanup_tmp(file_path: str, dir_path: str):
@@ -60,25 +61,106 @@ def _cleanup_tmp(file_path: str, dir_path: str):
             pass
 
 
-@call_recording_router.post(
-    "/download-call-recording",
-    response_class=FileResponse,
-    summary="Download a call recording from S3/MinIO",
-    description="Downloads a call recording object by bucket and key, returning the file.",
-)
-def download_recording(payload: DownloadRequest, background_tasks: BackgroundTasks):
-    tmp_dir = None
+def _raise_for_s3_error(e: Exception):
+    if is_not_found(e):
+        raise HTTPException(status_code=404, detail="Recording not found")
+    if s3_error_code(e) == "InvalidRange":
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+    raise HTTPException(status_code=500, detail=f"Failed to download: {str(e)}")
+
+
+def _stream_recording(
+    bucket: str,
+    object_key: str,
+    filename: str,
+    request: Request,
+    disposition: str = "attachment",
+):
+    """Pipe the S3 object body to the client in chunks, honouring a single HTTP Range."""
+    if_none_match = request.headers.get("if-none-match")
     try:
-        s3 = _get_s3_client()
+        body, headers, status_code, media_type = get_recording_object(
+            bucket,
+            object_key,
+            range_header=parse_range_header(request.headers.get("range")),
+            if_none_match=if_none_match,
+        )
+    except Exception as e:
+        if is_not_modified(e):
+            return Response(status_code=304, headers={"ETag": if_none_match})
+        _raise_for_s3_error(e)
+
+    try:
+        headers["Content-Disposition"] = content_disposition_header(filename, disposition)
+        # Sync iterator: Starlette runs each read in its threadpool, so the event loop never blocks on S3
+        return StreamingResponse(
+            iter_body(body),
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+        )
+    except Exception:
+        # The body is only closed by iter_body once streaming starts
+        body.close()
+        raise
 
-        # Use provided filename or derive from object key
-        filename = payload.filename or os.path.basename(payload.object_key) or "recording.bin"
+
+def _presigned_url(bucket: str, object_key: str, filename: str, expires_in: Optional[int], disposition: str = "attachment") -> dict:
+    expires_in = min(expires_in or RECORDING_PRESIGN_EXPIRES, RECORDING_PRESIGN_MAX_EXPIRES)
+    try:
+        url = presign_recording_url(
+            bucket,
+            object_key,
+            expires_in=expires_in,
+            content_disposition=content_disposition_header(filename, disposition),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to presign: {str(e)}")
+    return {"url": url, "expires_in": expires_in, "bucket": bucket, "object_key": object_key}
+
+
+def _serve_cached(
+    bucket: str,
+    object_key: str,
+    filename: str,
+    request: Request,
+    disposition: str = "attachment",
+):
+    """Serve from the local LRU cache, answering If-None-Match with a HEAD-only round trip."""
+    try:
+        head = get_s3_client().head_object(Bucket=bucket, Key=object_key)
+    except Exception as e:
+        _raise_for_s3_error(e)
+
+    etag = head.get("ETag") or ""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    try:
+        local_path = get_recording_cache().fetch(bucket, object_key, etag)
+    except Exception as e:
+        _raise_for_s3_error(e)
+
+    return FileResponse(
+        local_path,
+        media_type=head.get("ContentType") or "application/octet-stream",
+        headers={
+            "ETag": etag,
+            "Content-Disposition": content_disposition_header(filename, disposition),
+        },
+    )
+
+
+def _download_to_file(bucket: str, object_key: str, filename: str, background_tasks: BackgroundTasks) -> FileResponse:
+    tmp_dir = None
+    try:
+        s3 = get_s3_client()
 
         # Save to a secure temp directory
         tmp_dir = tempfile.mkdtemp(prefix="recording-")
         local_path = os.path.join(tmp_dir, filename)
 
-        s3.download_file(payload.bucket, payload.object_key, local_path)
+        s3.download_file(bucket, object_key, local_path)
 
         # Schedule cleanup after response is sent
         background_tasks.add_task(_cleanup_tmp, local_path, tmp_dir)
@@ -98,3 +180,62 @@ def download_recording(payload: DownloadRequest, background_tasks: BackgroundTas
             except Exception:
                 pass
         raise HTTPException(status_code=500, detail=f"Failed to download: {str(e)}")
+
+
+@download_router.post(
+    "/download-call-recording",
+    response_class=FileResponse,
+    summary="Download a call recording from S3/MinIO",
+    description=(
+        "Downloads a call recording object by bucket and key. `stream` pipes the object "
+        "from S3 with Range support, `file` stages it in a temporary directory, `cached` "
+        "serves it from a local LRU cache with If-None-Match support, and `presigned` "
+        "returns a short-lived URL instead of the bytes."
+    ),
+)
+def download_recording(payload: DownloadRequest, request: Request, background_tasks: BackgroundTasks):
+    # Use provided filename or derive from object key
+    filename = payload.filename or os.path.basename(payload.object_key) or "recording.bin"
+    mode = payload.mode or RECORDING_DOWNLOAD_MODE
+
+    if mode == "file":
+        return _download_to_file(payload.bucket, payload.object_key, filename, background_tasks)
+    if mode == "presigned":
+        return JSONResponse(_presigned_url(payload.bucket, payload.object_key, filename, payload.expires_in))
+    if mode == "cached":
+        return _serve_cached(payload.bucket, payload.object_key, filename, request)
+    return _stream_recording(payload.bucket, payload.object_key, filename, request)
+
+
+@download_router.get(
+    "/stream-call-recording",
+    summary="Stream a call recording from S3/MinIO",
+    description=(
+        "Serves a recording inline with Range support so audio players can seek. "
+        "`presigned` redirects to a short-lived S3/MinIO URL, `cached` serves from the local LRU cache."
+    ),
+)
+def stream_recording(
+    request: Request,
+    object_key: str = Query(..., min_length=1),
+    bucket: str = Query("recording", min_length=1),
+    filename: Optional[str] = Query(None),
+    mode: Literal["stream", "presigned", "cached"] = Query("stream"),
+):
+    filename = filename or os.path.basename(object_key) or "recording.bin"
+    if mode == "presigned":
+        presigned = _presigned_url(bucket, object_key, filename, None, disposition="inline")
+        return RedirectResponse(presigned["url"], status_code=307)
+    if mode == "cached":
+        return _serve_cached(bucket, object_key, filename, request, disposition="inline")
+    return _stream_recording(bucket, object_key, filename, request, disposition="inline")
+
+
+@download_router.post(
+    "/call-recording-url",
+    summary="Get a presigned URL for a call recording",
+    description="Returns a short-lived URL so clients download the recording directly from S3/MinIO.",
+)
+def call_recording_url(payload: DownloadRequest):
+    filename = payload.filename or os.path.basename(payload.object_key) or "recording.bin"
+    return _presigned_url(payload.bucket, payload.object_key, filename, payload.expires_in)
@@ -0,0 +1,214 @@
+import io
+import logging
+import os
+import posixpath
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+from .s3 import get_s3_client, iter_body, content_disposition_header, RECORDING_STREAM_CHUNK_SIZE
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Objects fetched ahead of the one being written to the archive
+RECORDING_EXPORT_PREFETCH = int(os.getenv("RECORDING_EXPORT_PREFETCH", "4"))
+# Objects up to this size are read fully during prefetch; larger ones are streamed when their turn comes
+RECORDING_EXPORT_PREFETCH_MAX_BYTES = int(os.getenv("RECORDING_EXPORT_PREFETCH_MAX_BYTES", str(16 * 1024 * 1024)))
+RECORDING_EXPORT_MAX_OBJECTS = int(os.getenv("RECORDING_EXPORT_MAX_OBJECTS", "5000"))
+
+export_router = APIRouter()
+
+
+class ExportRequest(BaseModel):
+    bucket: Optional[str] = "recording"
+    object_keys: Optional[List[str]] = None
+    prefix: Optional[str] = None
+    filename: Optional[str] = "recordings.zip"
+    compression: Literal["stored", "deflated"] = "stored"
+
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable write target; zipfile then emits data descriptors and never seeks back."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        for chunk in chunks:
+            yield chunk
+
+
+class _Fetched:
+    def __init__(self, key: str, obj: Dict[str, Any], data: Optional[bytes]):
+        self.key = key
+        self.last_modified = obj.get("LastModified")
+        self.body = None if data is not None else obj["Body"]
+        self.data = data
+
+    def chunks(self) -> Iterator[bytes]:
+        if self.data is not None:
+            for i in range(0, len(self.data), RECORDING_STREAM_CHUNK_SIZE):
+                yield self.data[i:i + RECORDING_STREAM_CHUNK_SIZE]
+        else:
+            yield from iter_body(self.body)
+
+    def close(self):
+        if self.body is not None:
+            self.body.close()
+
+
+def _fetch(bucket: str, key: str) -> _Fetched:
+    obj = get_s3_client().get_object(Bucket=bucket, Key=key)
+    if obj["ContentLength"] <= RECORDING_EXPORT_PREFETCH_MAX_BYTES:
+        try:
+            return _Fetched(key, obj, obj["Body"].read())
+        finally:
+            obj["Body"].close()
+    return _Fetched(key, obj, None)
+
+
+def _close_fetched(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _iter_prefix_keys(bucket: str, prefix: str) -> Iterator[str]:
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            if not item["Key"].endswith("/"):
+                yield item["Key"]
+
+
+def _archive_name(key: str, prefix: Optional[str], used: set) -> str:
+    name = key[len(prefix):] if prefix and key.startswith(prefix) else key
+    name = posixpath.normpath(name.lstrip("/"))
+    if name in (".", "..") or name.startswith("../"):
+        name = posixpath.basename(key) or "recording.bin"
+    candidate, n = name, 1
+    while candidate in used:
+        root, ext = posixpath.splitext(name)
+        candidate = f"{root} ({n}){ext}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+def iter_zip_archive(
+    bucket: str,
+    keys: Iterable[str],
+    *,
+    prefix: Optional[str] = None,
+    compression: int = zipfile.ZIP_STORED,
+    window: int = RECORDING_EXPORT_PREFETCH,
+    max_objects: int = RECORDING_EXPORT_MAX_OBJECTS,
+) -> Iterator[bytes]:
+    """
+    Build a ZIP archive on the fly from S3 objects and yield it in chunks.
+
+    Up to `window` objects are fetched concurrently ahead of the writer; only the
+    current entry's chunks and the prefetched objects are ever held in memory.
+    Objects that fail to download are listed in `_export_errors.txt`.
+    """
+    sink = _ZipSink()
+    key_iter = iter(keys)
+    pending: Deque[Tuple[str, Any]] = deque()
+    used_names: set = set()
+    errors: List[str] = []
+    submitted = 0
+
+    pool = ThreadPoolExecutor(max_workers=max(1, window), thread_name_prefix="recording-export")
+
+    def fill():
+        nonlocal submitted
+        while len(pending) < window and submitted < max_objects:
+            key = next(key_iter, None)
+            if key is None:
+                return
+            pending.append((key, pool.submit(_fetch, bucket, key)))
+            submitted += 1
+
+    try:
+        zf = zipfile.ZipFile(sink, mode="w", compression=compression, allowZip64=True)
+        fill()
+        while pending:
+            key, future = pending.popleft()
+            fill()
+            try:
+                fetched = future.result()
+            except Exception as e:
+                logger.warning("Skipping %s/%s in export: %s", bucket, key, str(e))
+                errors.append(f"{key}: {str(e)}")
+                continue
+
+            zinfo = zipfile.ZipInfo(_archive_name(key, prefix, used_names))
+            zinfo.compress_type = compression
+            if fetched.last_modified is not None:
+                zinfo.date_time = fetched.last_modified.timetuple()[:6]
+            try:
+                with zf.open(zinfo, mode="w", force_zip64=True) as dest:
+                    for chunk in fetched.chunks():
+                        dest.write(chunk)
+                        yield from sink.drain()
+            finally:
+                fetched.close()
+            yield from sink.drain()
+
+        if errors:
+            zf.writestr("_export_errors.txt", "\n".join(errors))
+        zf.close()
+        yield from sink.drain()
+    finally:
+        # Client went away or an error occurred: release whatever is still in flight
+        for _, future in pending:
+            if not future.cancel():
+                future.add_done_callback(_close_fetched)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@export_router.post(
+    "/export-call-recordings",
+    summary="Export call recordings as a streamed ZIP",
+    description=(
+        "Streams a ZIP archive of the given object keys, or of every object under a bucket "
+        "prefix. Objects are fetched concurrently with a bounded prefetch window and the "
+        "archive is never staged on disk or in memory."
+    ),
+)
+def export_recordings(payload: ExportRequest):
+    if bool(payload.object_keys) == bool(payload.prefix):
+        raise HTTPException(status_code=400, detail="Provide either object_keys or prefix")
+
+    try:
+        get_s3_client()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export: {str(e)}")
+
+    if payload.prefix:
+        keys: Iterable[str] = _iter_prefix_keys(payload.bucket, payload.prefix)
+    else:
+        keys = payload.object_keys
+
+    compression = zipfile.ZIP_DEFLATED if payload.compression == "deflated" else zipfile.ZIP_STORED
+    filename = payload.filename or "recordings.zip"
+    return StreamingResponse(
+        iter_zip_archive(payload.bucket, keys, prefix=payload.prefix, compression=compression),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition_header(filename)},
+    )
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+from .download import download_router
+from .export import export_router
+
+call_recording_router = APIRouter()
+
+call_recording_router.include_router(download_router)
+call_recording_router.include_router(export_router)
@@ -0,0 +1,204 @@
+import os
+import re
+import threading
+from email.utils import formatdate
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+import boto3
+from botocore.client import Config
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Environment-based configuration (do NOT hardcode secrets)
+AWS_S3_ENDPOINT = os.getenv("AWS_S3_ENDPOINT")
+AWS_S3_ACCESS_KEY_ID = os.getenv("AWS_S3_ACCESS_KEY_ID")
+AWS_S3_SECRET_ACCESS_KEY = os.getenv("AWS_S3_SECRET_ACCESS_KEY")
+AWS_S3_REGION = os.getenv("AWS_S3_REGION", "us-east-1")
+AWS_S3_FORCE_PATH_STYLE = os.getenv("AWS_S3_FORCE_PATH_STYLE", "true").lower() in ("1", "true", "yes")
+# Host clients should use for presigned URLs when it differs from the internal endpoint
+AWS_S3_PUBLIC_ENDPOINT = os.getenv("AWS_S3_PUBLIC_ENDPOINT") or AWS_S3_ENDPOINT
+
+# Connection pool shared by all requests; size it to the expected number of concurrent downloads
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_S3_MAX_POOL_CONNECTIONS", "50"))
+AWS_S3_CONNECT_TIMEOUT = float(os.getenv("AWS_S3_CONNECT_TIMEOUT", "5"))
+AWS_S3_READ_TIMEOUT = float(os.getenv("AWS_S3_READ_TIMEOUT", "60"))
+RECORDING_STREAM_CHUNK_SIZE = int(os.getenv("RECORDING_STREAM_CHUNK_SIZE", str(256 * 1024)))
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_client = None
+_presign_client = None
+_client_lock = threading.Lock()
+
+
+def _create_s3_client(endpoint_url: Optional[str] = None):
+    if not (AWS_S3_ENDPOINT and AWS_S3_ACCESS_KEY_ID and AWS_S3_SECRET_ACCESS_KEY):
+        raise RuntimeError("S3 configuration missing. Ensure AWS_S3_* env vars are set.")
+
+    s3_config: Dict[str, Any] = {
+        "max_pool_connections": AWS_S3_MAX_POOL_CONNECTIONS,
+        "connect_timeout": AWS_S3_CONNECT_TIMEOUT,
+        "read_timeout": AWS_S3_READ_TIMEOUT,
+        "retries": {"max_attempts": 3, "mode": "standard"},
+        "tcp_keepalive": True,
+    }
+    if AWS_S3_FORCE_PATH_STYLE:
+        s3_config["s3"] = {"addressing_style": "path"}
+
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url or AWS_S3_ENDPOINT,
+        aws_access_key_id=AWS_S3_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_S3_SECRET_ACCESS_KEY,
+        region_name=AWS_S3_REGION,
+        config=Config(**s3_config),
+    )
+
+
+def get_s3_client():
+    """Return the process-wide S3 client (boto3 clients are thread-safe)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_s3_client()
+    return _client
+
+
+def get_presign_client():
+    """Return the client used to sign URLs, bound to the public endpoint (signatures cover the host)."""
+    global _presign_client
+    if AWS_S3_PUBLIC_ENDPOINT == AWS_S3_ENDPOINT:
+        return get_s3_client()
+    if _presign_client is None:
+        with _client_lock:
+            if _presign_client is None:
+                _presign_client = _create_s3_client(AWS_S3_PUBLIC_ENDPOINT)
+    return _presign_client
+
+
+def presign_recording_url(
+    bucket: str,
+    object_key: str,
+    *,
+    expires_in: int,
+    content_disposition: Optional[str] = None,
+) -> str:
+    """Return a short-lived GET URL so clients can fetch the object straight from S3/MinIO."""
+    params: Dict[str, Any] = {"Bucket": bucket, "Key": object_key}
+    if content_disposition:
+        params["ResponseContentDisposition"] = content_disposition
+    return get_presign_client().generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    normalized = etag.strip().removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == normalized:
+            return True
+    return False
+
+
+def s3_error_code(exc: Exception) -> Optional[str]:
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code")
+    return None
+
+
+def is_not_found(exc: Exception) -> bool:
+    return s3_error_code(exc) in ("NoSuchKey", "NoSuchBucket", "404", "NotFound")
+
+
+def is_not_modified(exc: Exception) -> bool:
+    return s3_error_code(exc) in ("304", "NotModified")
+
+
+def parse_range_header(value: Optional[str]) -> Optional[str]:
+    """
+    Return a single-range `bytes=` header suitable for S3 GetObject.
+
+    Multi-range or malformed headers return None so the full object is served,
+    which RFC 9110 allows.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    match = _RANGE_RE.match(value)
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if start and end and int(end) < int(start):
+        return None
+    return value
+
+
+def get_recording_object(
+    bucket: str,
+    object_key: str,
+    *,
+    range_header: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+) -> Tuple[Any, Dict[str, str], int, str]:
+    """
+    Issue a GetObject and return (body, headers, status_code, media_type).
+
+    The body is not read; callers stream it with `iter_body`. A matching
+    `if_none_match` makes S3 raise a 304 ClientError (see `is_not_modified`).
+    """
+    params: Dict[str, Any] = {"Bucket": bucket, "Key": object_key}
+    if range_header:
+        params["Range"] = range_header
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+
+    obj = get_s3_client().get_object(**params)
+
+    try:
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(obj["ContentLength"]),
+        }
+        if obj.get("ETag"):
+            headers["ETag"] = obj["ETag"]
+        if obj.get("LastModified"):
+            # botocore returns tzutc() datetimes, which format_datetime(usegmt=True) rejects
+            headers["Last-Modified"] = formatdate(obj["LastModified"].timestamp(), usegmt=True)
+
+        status_code = 200
+        if obj.get("ContentRange"):
+            headers["Content-Range"] = obj["ContentRange"]
+            status_code = 206
+
+        media_type = obj.get("ContentType") or "application/octet-stream"
+    except Exception:
+        obj["Body"].close()
+        raise
+    return obj["Body"], headers, status_code, media_type
+
+
+def iter_body(body, chunk_size: int = RECORDING_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield an S3 streaming body in chunks and always release the connection."""
+    try:
+        for chunk in body.iter_chunks(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        body.close()
+
+
+def content_disposition_header(filename: str, disposition: str = "attachment") -> str:
+    """Content-Disposition header value; names that are not plain ASCII use the RFC 5987 form."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
@@ -43,6 +43,7 @@ class InboundDispatchRuleRequest(BaseModel):
     target_audience: Optional[str] = None
     key_talking_points: Optional[str] = None
     objection_responses: Optional[str] = None
+    agent_profile_id: Optional[str] = None
 
 class InboundDispatchRuleResponse(BaseModel):
     dispatch_rule_id: str
@@ -2,6 +2,11 @@ import asyncio
 from livekit import api
 from dotenv import load_dotenv
 import uuid,json
+from typing import Optional
+
+from services.rag.prefetch import schedule_prefetch
+from utils.telemetry import span
+from ...agent_profile.store import compact_agent_config
 
 load_dotenv()
 
@@ -30,7 +35,8 @@ async def create_inbound_dispatch_rule(
     campaign_briefing:str,
     target_audience:str,
     key_talking_points:str,
-    objection_responses:str
+    objection_responses:str,
+    agent_profile_id:Optional[str] = None
 ) -> str:
     lkapi = api.LiveKitAPI()
 
@@ -59,6 +65,8 @@ async def create_inbound_dispatch_rule(
         "key_talking_points":key_talking_points,
         "objection_responses":objection_responses
     }
+    # Store the agent config once and only reference it from the rule metadata
+    data = await compact_agent_config(data, profile_id=agent_profile_id)
 
     # Create a dispatch rule to place each caller in a separate room
     rule = api.SIPDispatchRule(
@@ -81,7 +89,11 @@ async def create_inbound_dispatch_rule(
         )
     )
 
-    dispatch = await lkapi.sip.create_sip_dispatch_rule(request)
+    with span("livekit.create_sip_dispatch_rule"):
+        dispatch = await lkapi.sip.create_sip_dispatch_rule(request)
     await lkapi.aclose()
 
+    # Every call routed by the rule shares one entry, keyed by the rule id (the sip.ruleID participant attribute)
+    schedule_prefetch(dispatch.sip_dispatch_rule_id, workflow_id, key_talking_points, objection_responses)
+
     return str(dispatch.sip_dispatch_rule_id)
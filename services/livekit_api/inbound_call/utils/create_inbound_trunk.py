@@ -3,6 +3,8 @@ import asyncio
 from livekit import api
 from dotenv import load_dotenv
 
+from utils.telemetry import span
+
 load_dotenv()
 
 async def create_inbound_trunk_id(
@@ -21,7 +23,8 @@ async def create_inbound_trunk_id(
         trunk = trunk
     )
 
-    trunk = await livekit_api.sip.create_sip_inbound_trunk(request)
+    with span("livekit.create_sip_inbound_trunk"):
+        trunk = await livekit_api.sip.create_sip_inbound_trunk(request)
     await livekit_api.aclose()
 
     return str(trunk.sip_trunk_id)
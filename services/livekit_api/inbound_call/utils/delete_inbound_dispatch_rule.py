@@ -1,6 +1,8 @@
 from livekit import api
 from dotenv import load_dotenv
 
+from utils.telemetry import span
+
 load_dotenv()
 
 async def delete_inbound_dispatch_rule(sip_dispatch_rule_id: str) -> bool:
@@ -8,11 +10,12 @@ async def delete_inbound_dispatch_rule(sip_dispatch_rule_id: str) -> bool:
     livekit_api = api.LiveKitAPI()
     
     try:
-        await livekit_api.sip.delete_sip_dispatch_rule(
-            api.DeleteSIPDispatchRuleRequest(
-                sip_dispatch_rule_id=sip_dispatch_rule_id
+        with span("livekit.delete_sip_dispatch_rule"):
+            await livekit_api.sip.delete_sip_dispatch_rule(
+                api.DeleteSIPDispatchRuleRequest(
+                    sip_dispatch_rule_id=sip_dispatch_rule_id
+                )
             )
-        )
         await livekit_api.aclose()
         return True
     except Exception:
@@ -3,6 +3,8 @@ from livekit import api
 from dotenv import load_dotenv
 from livekit.protocol.sip import DeleteSIPTrunkRequest
 
+from utils.telemetry import span
+
 load_dotenv()
 
 async def delete_inbound_trunk(trunk_id: str):
@@ -10,11 +12,12 @@ async def delete_inbound_trunk(trunk_id: str):
     livekit_api = api.LiveKitAPI()
     
     try:
-        await livekit_api.sip.delete_sip_trunk(
-            DeleteSIPTrunkRequest(
-                sip_trunk_id=trunk_id
+        with span("livekit.delete_sip_trunk"):
+            await livekit_api.sip.delete_sip_trunk(
+                DeleteSIPTrunkRequest(
+                    sip_trunk_id=trunk_id
+                )
             )
-        )
         await livekit_api.aclose()
         return True
     except Exception as e:
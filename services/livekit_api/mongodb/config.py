@@ -23,20 +23,21 @@ class MongodbClient:
         if not self.mongo_uri:
             raise ValueError("Missing MONGODB_URI in environment variables.")
 
+        # MongoClient connects in the background; the first operation waits for server selection
         self.client = MongoClient(
             self.mongo_uri, 
             serverSelectionTimeoutMS=5000,
             connectTimeoutMS=10000,
             socketTimeoutMS=20000
         )
-        
-        # Retry logic for connection
-        max_retries = 3
+
+    def ping(self, max_retries: int = 3):
+        """Check connectivity with exponential backoff; called from the app lifespan, not on import."""
         for attempt in range(max_retries):
             try:
                 self.client.admin.command('ping')
-                print("MongoDB client initialized successfully")
-                break
+                logger.info("MongoDB client initialized successfully")
+                return
             except ConnectionFailure as e:
                 if attempt == max_retries - 1:
                     logger.error(f"Could not connect after {max_retries} attempts: {e}")
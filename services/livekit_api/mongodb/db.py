@@ -1,5 +1,7 @@
 import os
 import logging
+import threading
+import time
 import pytz
 
 from .config import MongodbClient
@@ -11,28 +13,109 @@ DB_NAME = "livekit_calling_system"
 USERS_COL = "users"
 WORKFLOWS_COL = "workflows"
 CALLS_COL = "calls"
+AGENT_PROFILES_COL = "agent_profiles"
+RAG_COLLECTIONS_COL = "rag_collections"
+RAG_COLLECTION_PROFILES_COL = "rag_collection_profiles"
+RAG_PREFETCH_COL = "rag_prefetch"
+BULK_SUMMARY_JOBS_COL = "bulk_summary_jobs"
 IST = pytz.timezone("Asia/Kolkata")
 
-_client = MongodbClient().client
+# Seconds before index creation is retried after it failed (e.g. MongoDB was down at startup)
+MONGODB_INDEX_RETRY_S = float(os.environ.get("MONGODB_INDEX_RETRY_S", "30"))
+
+_client = None
+_client_lock = threading.Lock()
+_indexes_ready = False
+_indexes_next_try = 0.0
+_indexes_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Shared MongoClient, created on first use so importing this module does no I/O.
+
+    The first use also ensures the indexes, unless prewarm already did; a failed attempt
+    is retried on use after MONGODB_INDEX_RETRY_S.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongodbClient().client
+    if not _indexes_ready and time.monotonic() >= _indexes_next_try:
+        _ensure_indexes_once()
+    return _client
+
+
+def _ensure_indexes_once():
+    global _indexes_next_try
+    # Non-blocking: callers do not wait on another thread's attempt, and the
+    # collection accessors used by ensure_indexes() do not re-enter it
+    if not _indexes_lock.acquire(blocking=False):
+        return
+    try:
+        if not _indexes_ready and not _create_indexes():
+            _indexes_next_try = time.monotonic() + MONGODB_INDEX_RETRY_S
+    finally:
+        _indexes_lock.release()
 
 
 def users():
-    return _client[DB_NAME][USERS_COL]
+    return get_client()[DB_NAME][USERS_COL]
 
 
 def workflows():
-    return _client[DB_NAME][WORKFLOWS_COL]
+    return get_client()[DB_NAME][WORKFLOWS_COL]
 
 
 def calls():
-    return _client[DB_NAME][CALLS_COL]
+    return get_client()[DB_NAME][CALLS_COL]
+
+
+def agent_profiles():
+    return get_client()[DB_NAME][AGENT_PROFILES_COL]
+
+
+def rag_collections():
+    return get_client()[DB_NAME][RAG_COLLECTIONS_COL]
+
+
+def rag_collection_profiles():
+    return get_client()[DB_NAME][RAG_COLLECTION_PROFILES_COL]
+
+
+def rag_prefetch():
+    return get_client()[DB_NAME][RAG_PREFETCH_COL]
+
+
+def bulk_summary_jobs():
+    return get_client()[DB_NAME][BULK_SUMMARY_JOBS_COL]
+
+
+def ensure_indexes() -> bool:
+    """Create the indexes unless already done; run from prewarm. Returns whether they exist."""
+    with _indexes_lock:
+        return _indexes_ready or _create_indexes()
 
 
-# Ensure indexes on import
-try:
-    users().create_index("user_id", unique=True)
-    workflows().create_index([("user_id", 1), ("workflow_id", 1)], unique=True)
-    calls().create_index([("user_id", 1), ("workflow_id", 1), ("call_id", 1)], unique=True)
-    logger.info("MongoDB indexes ensured for users/workflows/calls")
-except Exception as e:
-    logger.error(f"Failed to ensure indexes: {e}")
+def _create_indexes() -> bool:
+    global _indexes_ready
+    try:
+        users().create_index("user_id", unique=True)
+        workflows().create_index([("user_id", 1), ("workflow_id", 1)], unique=True)
+        calls().create_index([("user_id", 1), ("workflow_id", 1), ("call_id", 1)], unique=True)
+        agent_profiles().create_index([("profile_id", 1), ("version", 1)], unique=True)
+        agent_profiles().create_index([("profile_id", 1), ("last_used_at", -1), ("created_at", -1)])
+        rag_collections().create_index("workflow_id", unique=True)
+        rag_collection_profiles().create_index("collection", unique=True)
+        rag_prefetch().create_index("call_key", unique=True)
+        rag_prefetch().create_index("expire_at", expireAfterSeconds=0)
+        bulk_summary_jobs().create_index("job_id", unique=True)
+        bulk_summary_jobs().create_index([("status", 1), ("created_ts", 1)])
+        # Finished jobs are removed once their expire_at passes
+        bulk_summary_jobs().create_index("expire_at", expireAfterSeconds=0)
+        logger.info("MongoDB indexes ensured for users/workflows/calls/agent_profiles/rag_collections/rag_collection_profiles/rag_prefetch/bulk_summary_jobs")
+        _indexes_ready = True
+    except Exception as e:
+        logger.error(f"Failed to ensure indexes: {e}")
+    return _indexes_ready
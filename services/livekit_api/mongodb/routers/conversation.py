@@ -2,6 +2,8 @@ import logging
 from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Query
 
+from utils.executors import run_in
+
 from ..db import users, workflows, calls
 from ..utils import now_ist_iso, parse_any_dt_to_ist, parse_bound_date_only, format_ist_ampm
 from ..models import AddConversationRequest
@@ -11,8 +13,7 @@ logger = logging.getLogger(__name__)
 conversation_router = APIRouter()
 
 
-@conversation_router.post("/add-call-conversation", summary="Append messages to a call conversation")
-def add_conversation(req: AddConversationRequest):
+def _sync_add_conversation(req: AddConversationRequest):
     try:
         now = now_ist_iso()
 
@@ -68,14 +69,18 @@ def add_conversation(req: AddConversationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@conversation_router.get("/get-call-conversation", summary="Fetch call conversation by user/workflow/call with optional date range")
-def get_conversation(
-    user_id: str = Query(..., min_length=1),
-    workflow_id: Optional[str] = Query(None, min_length=1),
-    call_id: Optional[str] = Query(None, min_length=1),
-    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST) for filtering messages/calls"),
-    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST) for filtering messages/calls"),
-    limit: Optional[int] = Query(None, ge=1),
+@conversation_router.post("/add-call-conversation", summary="Append messages to a call conversation")
+async def add_conversation(req: AddConversationRequest):
+    return await run_in("io_mongo", _sync_add_conversation, req)
+
+
+def _sync_get_conversation(
+    user_id: str,
+    workflow_id: Optional[str],
+    call_id: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
+    limit: Optional[int],
 ):
     try:
         q = {"user_id": user_id}
@@ -174,12 +179,19 @@ def get_conversation(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@conversation_router.get("/get-latest-call-conversation", summary="Latest call conversation for a workflow")
-def get_latest_call_conversation(
+@conversation_router.get("/get-call-conversation", summary="Fetch call conversation by user/workflow/call with optional date range")
+async def get_conversation(
     user_id: str = Query(..., min_length=1),
-    workflow_id: str = Query(..., min_length=1),
+    workflow_id: Optional[str] = Query(None, min_length=1),
+    call_id: Optional[str] = Query(None, min_length=1),
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST) for filtering messages/calls"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST) for filtering messages/calls"),
     limit: Optional[int] = Query(None, ge=1),
 ):
+    return await run_in("io_mongo", _sync_get_conversation, user_id, workflow_id, call_id, start, end, limit)
+
+
+def _sync_get_latest_call_conversation(user_id: str, workflow_id: str, limit: Optional[int]):
     try:
         projection = {"_id": 0, "user_id": 1, "workflow_id": 1, "call_id": 1, "messages": 1, "created_at": 1, "updated_at": 1}
         cursor = (
@@ -209,13 +221,21 @@ def get_latest_call_conversation(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@conversation_router.delete("/delete-call-conversation", summary="Delete call messages by user/workflow/call with optional date range (IST)")
-def delete_call_conversation(
+@conversation_router.get("/get-latest-call-conversation", summary="Latest call conversation for a workflow")
+async def get_latest_call_conversation(
     user_id: str = Query(..., min_length=1),
-    workflow_id: Optional[str] = Query(None, min_length=1),
-    call_id: Optional[str] = Query(None, min_length=1),
-    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST)"),
-    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST)"),
+    workflow_id: str = Query(..., min_length=1),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    return await run_in("io_mongo", _sync_get_latest_call_conversation, user_id, workflow_id, limit)
+
+
+def _sync_delete_call_conversation(
+    user_id: str,
+    workflow_id: Optional[str],
+    call_id: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
 ):
     try:
         base_q = {"user_id": user_id}
@@ -294,3 +314,14 @@ def delete_call_conversation(
     except Exception as e:
         logger.exception("Error deleting call conversation")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@conversation_router.delete("/delete-call-conversation", summary="Delete call messages by user/workflow/call with optional date range (IST)")
+async def delete_call_conversation(
+    user_id: str = Query(..., min_length=1),
+    workflow_id: Optional[str] = Query(None, min_length=1),
+    call_id: Optional[str] = Query(None, min_length=1),
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST)"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST)"),
+):
+    return await run_in("io_mongo", _sync_delete_call_conversation, user_id, workflow_id, call_id, start, end)
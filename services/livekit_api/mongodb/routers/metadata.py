@@ -2,6 +2,8 @@ import logging
 from typing import Any, Dict, List, Optional, Literal
 from fastapi import APIRouter, HTTPException, Query
 
+from utils.executors import run_in
+
 from ..db import users, workflows, calls
 from ..utils import IST, now_ist_iso, parse_any_dt_to_ist, parse_bound_date_only, format_ist_ampm
 from ..models import AddMetadataRequest
@@ -11,8 +13,7 @@ logger = logging.getLogger(__name__)
 metadata_router = APIRouter()
 
 
-@metadata_router.post("/add-call-metadata", summary="Add/merge call metadata")
-def add_metadata(req: AddMetadataRequest, mode: Literal["merge", "replace"] = Query("merge")):
+def _sync_add_metadata(req: AddMetadataRequest, mode: Literal["merge", "replace"]):
     try:
         now = now_ist_iso()
         # Ensure user and workflow exist
@@ -64,13 +65,17 @@ def add_metadata(req: AddMetadataRequest, mode: Literal["merge", "replace"] = Qu
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@metadata_router.get("/get-call-metadata", summary="Fetch call metadata by user/workflow/call")
-def get_metadata(
-    user_id: str = Query(..., min_length=1),
-    workflow_id: Optional[str] = Query(None, min_length=1),
-    call_id: Optional[str] = Query(None, min_length=1),
-    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST)"),
-    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST)"),
+@metadata_router.post("/add-call-metadata", summary="Add/merge call metadata")
+async def add_metadata(req: AddMetadataRequest, mode: Literal["merge", "replace"] = Query("merge")):
+    return await run_in("io_mongo", _sync_add_metadata, req, mode)
+
+
+def _sync_get_metadata(
+    user_id: str,
+    workflow_id: Optional[str],
+    call_id: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
 ):
     try:
         q = {"user_id": user_id}
@@ -154,11 +159,18 @@ def get_metadata(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@metadata_router.get("/get-latest-call-metadata", summary="Latest call metadata for a workflow")
-def get_latest_call_metadata(
+@metadata_router.get("/get-call-metadata", summary="Fetch call metadata by user/workflow/call")
+async def get_metadata(
     user_id: str = Query(..., min_length=1),
-    workflow_id: str = Query(..., min_length=1),
+    workflow_id: Optional[str] = Query(None, min_length=1),
+    call_id: Optional[str] = Query(None, min_length=1),
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST)"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST)"),
 ):
+    return await run_in("io_mongo", _sync_get_metadata, user_id, workflow_id, call_id, start, end)
+
+
+def _sync_get_latest_call_metadata(user_id: str, workflow_id: str):
     try:
         projection = {"_id": 0, "user_id": 1, "workflow_id": 1, "call_id": 1, "metadata": 1, "created_at": 1, "updated_at": 1}
         cursor = (
@@ -185,13 +197,20 @@ def get_latest_call_metadata(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@metadata_router.delete("/delete-call-metadata", summary="Delete call metadata by user/workflow/call with optional date range (IST)")
-def delete_call_metadata(
+@metadata_router.get("/get-latest-call-metadata", summary="Latest call metadata for a workflow")
+async def get_latest_call_metadata(
     user_id: str = Query(..., min_length=1),
-    workflow_id: Optional[str] = Query(None, min_length=1),
-    call_id: Optional[str] = Query(None, min_length=1),
-    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST)"),
-    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST)"),
+    workflow_id: str = Query(..., min_length=1),
+):
+    return await run_in("io_mongo", _sync_get_latest_call_metadata, user_id, workflow_id)
+
+
+def _sync_delete_call_metadata(
+    user_id: str,
+    workflow_id: Optional[str],
+    call_id: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
 ):
     try:
         base_q = {"user_id": user_id}
@@ -237,3 +256,14 @@ def delete_call_metadata(
     except Exception as e:
         logger.exception("Error deleting call metadata")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@metadata_router.delete("/delete-call-metadata", summary="Delete call metadata by user/workflow/call with optional date range (IST)")
+async def delete_call_metadata(
+    user_id: str = Query(..., min_length=1),
+    workflow_id: Optional[str] = Query(None, min_length=1),
+    call_id: Optional[str] = Query(None, min_length=1),
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, IST)"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD, IST)"),
+):
+    return await run_in("io_mongo", _sync_delete_call_metadata, user_id, workflow_id, call_id, start, end)
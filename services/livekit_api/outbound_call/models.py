@@ -41,6 +41,7 @@ class OutboundCallRequest(BaseModel):
     target_audience: Optional[str] = None
     key_talking_points: Optional[str] = None
     objection_responses: Optional[str] = None
+    agent_profile_id: Optional[str] = None
 
 class OutboundCallResponse(BaseModel):
     success: bool
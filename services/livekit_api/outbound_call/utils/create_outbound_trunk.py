@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from livekit import api
 from livekit.protocol.sip import CreateSIPOutboundTrunkRequest, SIPOutboundTrunkInfo
 
+from utils.telemetry import span
+
 load_dotenv()
 
 async def create_outbound_trunk_id(
@@ -26,7 +28,8 @@ async def create_outbound_trunk_id(
   request = CreateSIPOutboundTrunkRequest(
     trunk = trunk
   )
-  trunk = await lkapi.sip.create_sip_outbound_trunk(request)
+  with span("livekit.create_sip_outbound_trunk"):
+    trunk = await lkapi.sip.create_sip_outbound_trunk(request)
   await lkapi.aclose()
 
   return f"{trunk.sip_trunk_id}"
@@ -3,6 +3,10 @@ import json
 from typing import Dict, Any, Optional
 from livekit import api
 
+from services.rag.prefetch import schedule_prefetch
+from utils.telemetry import span
+from ...agent_profile.store import compact_agent_config
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("caller")
 
@@ -32,11 +36,17 @@ async def make_outbound_call(
     campaign_briefing: str = None,
     target_audience: str = None,
     key_talking_points: str = None,
-    objection_responses: str = None
+    objection_responses: str = None,
+    agent_profile_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Make an outbound call using LiveKit SIP and agent dispatch functionality.
-    
+
+    The dispatch metadata shape follows DISPATCH_METADATA_MODE: "full" (the default)
+    sends the whole agent config; "profile" stores the agent config as a versioned
+    profile and sends only the profile reference plus per-call fields (room, numbers,
+    trunk), falling back to the full config if the profile store is unavailable.
+
     Returns:
         Dict containing dispatch_id and sip_participant_id if successful, None otherwise.
     """
@@ -71,7 +81,7 @@ async def make_outbound_call(
     }
     metadata = {
         "phone_number": number_to_call,
-        "agent_config": agent_config,
+        "agent_config": await compact_agent_config(agent_config, profile_id=agent_profile_id),
         "standalone_call": True,
     }
 
@@ -84,15 +94,18 @@ async def make_outbound_call(
 
     try:
         #logger.info(f"Creating agent dispatch for room: {room_name}")
-        dispatch = await lkapi.agent_dispatch.create_dispatch(
-            api.CreateAgentDispatchRequest(
-                agent_name="Calling-Agent-System",
-                room=room_name,
-                metadata=json.dumps(metadata),
+        with span("livekit.create_dispatch"):
+            dispatch = await lkapi.agent_dispatch.create_dispatch(
+                api.CreateAgentDispatchRequest(
+                    agent_name="Calling-Agent-System",
+                    room=room_name,
+                    metadata=json.dumps(metadata),
+                )
             )
-        )
         #logger.info(f"Dispatch created: {dispatch}")
         result["dispatch_id"] = dispatch.id
+        # Warms the workflow's knowledge lookups while the phone rings; the agent reads them by room name
+        schedule_prefetch(room_name, workflow_id, key_talking_points, objection_responses)
     except Exception as e:
         logger.error(f"Failed to create dispatch: {e}")
         await lkapi.aclose()
@@ -100,17 +113,18 @@ async def make_outbound_call(
 
     try:
         #logger.info(f"Creating SIP participant for room: {room_name}")
-        sip_participant = await lkapi.sip.create_sip_participant(
-            api.CreateSIPParticipantRequest(
-                room_name=room_name,
-                sip_trunk_id=outbound_trunk_id,
-                sip_number=number_from,
-                sip_call_to=number_to_call,
-                participant_identity=f"sip-{workflow_id}",
-                krisp_enabled = True,
-                #wait_until_answered=True,
+        with span("livekit.create_sip_participant"):
+            sip_participant = await lkapi.sip.create_sip_participant(
+                api.CreateSIPParticipantRequest(
+                    room_name=room_name,
+                    sip_trunk_id=outbound_trunk_id,
+                    sip_number=number_from,
+                    sip_call_to=number_to_call,
+                    participant_identity=f"sip-{workflow_id}",
+                    krisp_enabled = True,
+                    #wait_until_answered=True,
+                )
             )
-        )
         #logger.info(f"SIP participant created: {sip_participant}")
         result["sip_participant_id"] = sip_participant.participant_id
         result["sip_call_id"] = sip_participant.sip_call_id
@@ -1,12 +1,14 @@
 import os
+import threading
 from dotenv import load_dotenv
 
 import qdrant_client
 from llama_index.core import Settings
-from llama_index.embeddings.gemini import GeminiEmbedding
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.llms.openrouter import OpenRouter
 
+from .embeddings import EMBED_BACKEND, get_embed_model
+
 load_dotenv()
 
 class RagConfig:
@@ -25,11 +27,9 @@ class RagConfig:
             temperature=0.3     
         )
 
-        # Embedding model
-        Settings.embed_model = GeminiEmbedding(
-            model_name="models/embedding-001",  
-            api_key=self.google_api_key
-        )
+        # Default embedding model; each collection uses the backend it was created with
+        self.embed_backend = EMBED_BACKEND
+        Settings.embed_model = get_embed_model(self.embed_backend)
 
         # Chunking strategy for extracted json data
         Settings.node_parser = SentenceSplitter(
@@ -50,4 +50,18 @@ class RagConfig:
             url=f"{self.qdrant_url}:80",
             api_key=self.qdrant_api_key,
             timeout=30
-        )
\ No newline at end of file
+        )
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_rag_config() -> RagConfig:
+    """Shared RagConfig, built on first use: it sets the llama-index globals and opens the Qdrant clients."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = RagConfig()
+    return _config
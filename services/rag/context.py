@@ -0,0 +1,124 @@
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from llama_index.core.schema import MetadataMode, NodeWithScore
+
+from utils.tokens import count_tokens, split_by_tokens
+
+load_dotenv()
+
+# Tokens of retrieved context passed to LLM synthesis (as the LLM sees the chunks, metadata included); 0 is unlimited
+RAG_CONTEXT_TOKEN_BUDGET = int(os.environ.get("RAG_CONTEXT_TOKEN_BUDGET", "6000"))
+# A chunk is dropped when this share of its word shingles is already in a higher-scored chunk
+# (near-duplicates, and chunks overlapping a neighbour); 1 only drops exact repeats
+RAG_CONTEXT_DEDUP_THRESHOLD = float(os.environ.get("RAG_CONTEXT_DEDUP_THRESHOLD", "0.8"))
+# A chunk that does not fit is cut to the remaining budget if at least this many tokens remain, else skipped
+RAG_CONTEXT_MIN_TOKENS = int(os.environ.get("RAG_CONTEXT_MIN_TOKENS", "128"))
+
+SHINGLE_WORDS = 3
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class ContextReport:
+    """What context assembly did to one query's retrieved chunks."""
+
+    retrieved: int = 0
+    kept: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+    truncated: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    budget: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "tokens_saved": self.tokens_saved}
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _llm_text(node: NodeWithScore) -> str:
+    return node.node.get_content(metadata_mode=MetadataMode.LLM)
+
+
+def _truncated(node: NodeWithScore, max_tokens: int) -> NodeWithScore:
+    """Copy of `node` with its text cut to fit `max_tokens` (the text alone; metadata is counted separately)."""
+    text = node.node.get_content()
+    metadata_tokens = count_tokens(_llm_text(node)) - count_tokens(text)
+    pieces = split_by_tokens(text, max(max_tokens - metadata_tokens, 1))
+    copy = node.node.model_copy()
+    copy.set_content(pieces[0] if pieces else "")
+    return NodeWithScore(node=copy, score=node.score)
+
+
+def assemble_context(
+    nodes: List[NodeWithScore],
+    *,
+    token_budget: Optional[int] = None,
+    dedup_threshold: float = RAG_CONTEXT_DEDUP_THRESHOLD,
+    min_tokens: int = RAG_CONTEXT_MIN_TOKENS,
+) -> Tuple[List[NodeWithScore], ContextReport]:
+    """
+    Prepare retrieved chunks for LLM synthesis.
+
+    Chunks are ordered by score, best first. A chunk whose word shingles are mostly
+    (`dedup_threshold`) covered by chunks already kept is dropped, which removes repeats
+    and the overlapping halves of neighbouring chunks. The rest are kept in order until
+    `token_budget` tokens (counted with utils.tokens, as the LLM sees them) are used;
+    a chunk that does not fit is cut to the remaining budget, or skipped when fewer than
+    `min_tokens` remain. The best chunk is always kept, cut to the budget if needed.
+
+    Args:
+        nodes: Retrieved chunks
+        token_budget: Token budget of the context, RAG_CONTEXT_TOKEN_BUDGET when None; 0 is unlimited
+        dedup_threshold: Share of a chunk's shingles seen before above which it is dropped
+        min_tokens: Smallest cut of a chunk worth keeping
+
+    Returns:
+        The chunks to synthesize from and a ContextReport
+    """
+    budget = RAG_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    report = ContextReport(retrieved=len(nodes), budget=budget)
+    ordered = sorted(nodes, key=lambda n: n.score if n.score is not None else float("-inf"), reverse=True)
+
+    seen: Set[Tuple[str, ...]] = set()
+    kept: List[NodeWithScore] = []
+    for node in ordered:
+        text = _llm_text(node)
+        tokens = count_tokens(text)
+        report.tokens_in += tokens
+
+        shingles = _shingles(node.node.get_content())
+        if shingles and len(shingles & seen) / len(shingles) >= dedup_threshold:
+            report.duplicates += 1
+            continue
+
+        remaining = budget - report.tokens_out if budget > 0 else tokens
+        if tokens > remaining:
+            if kept and remaining < min_tokens:
+                report.over_budget += 1
+                continue
+            node = _truncated(node, remaining)
+            tokens = count_tokens(_llm_text(node))
+            shingles = _shingles(node.node.get_content())
+            report.truncated += 1
+
+        seen |= shingles
+        kept.append(node)
+        report.tokens_out += tokens
+
+    report.kept = len(kept)
+    return kept, report
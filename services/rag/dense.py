@@ -0,0 +1,46 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# FastEmbed (ONNX) dense model for the local embedding backend
+LOCAL_EMBED_MODEL = os.environ.get("RAG_LOCAL_EMBED_MODEL", "BAAI/bge-small-en-v1.5")
+LOCAL_EMBED_BATCH_SIZE = int(os.environ.get("RAG_LOCAL_EMBED_BATCH_SIZE", "64"))
+# onnxruntime threads per process; each CPU pool child runs its own session (0 = onnxruntime default)
+LOCAL_EMBED_THREADS = int(os.environ.get("RAG_LOCAL_EMBED_THREADS", "0"))
+
+# One loaded model per process (API workers and CPU pool children alike)
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+
+def _get_model(model_name: str):
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from fastembed import TextEmbedding
+                threads: Optional[int] = LOCAL_EMBED_THREADS or None
+                model = TextEmbedding(model_name, threads=threads)
+                _models[model_name] = model
+                logger.info("Loaded local embedding model %s", model_name)
+    return model
+
+
+def encode_dense(model_name: str, texts: List[str]) -> List[List[float]]:
+    """Embed document texts; module-level so the CPU process pool can run it."""
+    if not texts:
+        return []
+    return [e.tolist() for e in _get_model(model_name).embed(texts, batch_size=LOCAL_EMBED_BATCH_SIZE)]
+
+
+def encode_query(model_name: str, query: str) -> List[float]:
+    """Embed a search query (some models prefix queries differently from passages)."""
+    return next(iter(_get_model(model_name).query_embed(query))).tolist()
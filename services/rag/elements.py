@@ -0,0 +1,137 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from llama_index.core import Document
+
+from utils.tokens import count_tokens, split_by_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Token budget of a chunk built from Unstructured elements; sections longer than this are split
+RAG_ELEMENT_CHUNK_TOKENS = int(os.environ.get("RAG_ELEMENT_CHUNK_TOKENS", "512"))
+
+# Page furniture and elements without retrievable text
+SKIP_TYPES = {"Header", "Footer", "PageBreak", "PageNumber", "Image"}
+SECTION_TYPES = {"Title"}
+
+
+def is_element(item: Any) -> bool:
+    return isinstance(item, dict) and "type" in item and "text" in item and "element_id" in item
+
+
+def extraction_elements(data: Any) -> Optional[List[Dict[str, Any]]]:
+    """
+    Unstructured elements in an extraction result, or None when `data` is not one.
+
+    Accepts process_document_extraction's result, its inner extraction_result, or a bare element list.
+    """
+    if isinstance(data, dict):
+        data = data.get("extraction_result", data)
+        data = data.get("json") if isinstance(data, dict) else None
+    if isinstance(data, list) and all(is_element(item) for item in data):
+        return data
+    return None
+
+
+class _Chunk:
+    def __init__(self, section: Optional[str]):
+        self.section = section
+        self.texts: List[str] = []
+        self.types: List[str] = []
+        self.pages: List[int] = []
+        self.language: Optional[str] = None
+        self.tokens = 0
+        self.titles_only = True
+
+    def add(self, text: str, tokens: int, element_type: str, page: Optional[int], language: Optional[str]):
+        self.texts.append(text)
+        self.language = self.language or language
+        self.tokens += tokens
+        if element_type not in self.types:
+            self.types.append(element_type)
+        if page is not None:
+            self.pages.append(page)
+        self.titles_only = self.titles_only and element_type in SECTION_TYPES
+
+    def to_document(self, filename: Optional[str]) -> Document:
+        metadata: Dict[str, Any] = {"source_type": "unstructured", "element_types": ",".join(self.types)}
+        if filename:
+            metadata["filename"] = filename
+        if self.pages:
+            metadata["page_number"] = min(self.pages)
+            if max(self.pages) != min(self.pages):
+                metadata["page_end"] = max(self.pages)
+        if self.section:
+            metadata["section"] = self.section
+        if self.language:
+            metadata["language"] = self.language
+        return Document(
+            text="\n\n".join(self.texts),
+            metadata=metadata,
+            # The section title is part of the text already; filename and pages are shown to the LLM for citations
+            excluded_embed_metadata_keys=list(metadata),
+            excluded_llm_metadata_keys=["source_type", "element_types", "section", "language"],
+        )
+
+
+def elements_to_documents(
+    elements: List[Dict[str, Any]],
+    *,
+    filename: Optional[str] = None,
+    max_tokens: int = RAG_ELEMENT_CHUNK_TOKENS,
+) -> List[Document]:
+    """
+    Build retrieval chunks from Unstructured elements.
+
+    Elements are grouped under the nearest preceding Title and packed up to `max_tokens`;
+    each chunk keeps the element text only, with filename, page range, section title,
+    language and element types as metadata. Headers, footers and page breaks are dropped.
+
+    Args:
+        elements: Unstructured element dicts (type, text, metadata)
+        filename: Source name to record, instead of the name the file was uploaded to Unstructured with
+        max_tokens: Token budget per chunk
+
+    Returns:
+        List of Document objects, one per chunk
+    """
+    chunks: List[_Chunk] = []
+    current: Optional[_Chunk] = None
+    section: Optional[str] = None
+    source = filename
+
+    for element in elements:
+        element_type = element.get("type") or "Text"
+        text = (element.get("text") or "").strip()
+        if element_type in SKIP_TYPES or not text:
+            continue
+        metadata = element.get("metadata") or {}
+        page = metadata.get("page_number")
+        language = (metadata.get("languages") or [None])[0]
+        source = source or metadata.get("filename")
+
+        if element_type in SECTION_TYPES:
+            section = text
+            # Consecutive titles (e.g. a heading and its subheading) stay together
+            if current is None or not current.titles_only:
+                current = _Chunk(section)
+                chunks.append(current)
+            current.section = section
+
+        for piece in split_by_tokens(text, max_tokens):
+            tokens = count_tokens(piece)
+            if current is None or (current.texts and current.tokens + tokens > max_tokens):
+                current = _Chunk(section)
+                chunks.append(current)
+            current.add(piece, tokens, element_type, page, language)
+
+    documents = [chunk.to_document(source) for chunk in chunks if chunk.texts]
+    logger.info(
+        "Built %d chunks (%d tokens) from %d elements of %s",
+        len(documents), sum(chunk.tokens for chunk in chunks), len(elements), source or "a document",
+    )
+    return documents
@@ -0,0 +1,125 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from utils.executors import get_cpu_pool, run_in
+from .dense import LOCAL_EMBED_BATCH_SIZE, LOCAL_EMBED_MODEL, encode_dense, encode_query
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Backend for new collections: "gemini" (Google API) or "fastembed" (local ONNX model on CPU).
+# A collection keeps the backend it was created with, see services.rag.registry.
+EMBED_BACKEND = os.environ.get("RAG_EMBED_BACKEND", "gemini").lower()
+GEMINI_EMBED_MODEL = os.environ.get("RAG_GEMINI_EMBED_MODEL", "models/embedding-001")
+
+
+class FastEmbedEmbedding(BaseEmbedding):
+    """
+    Local dense embeddings from a FastEmbed ONNX model.
+
+    Document batches are split into RAG_LOCAL_EMBED_BATCH_SIZE slices and encoded in
+    parallel in the CPU process pool; queries are encoded in the `embedding` thread pool,
+    where onnxruntime runs without holding the GIL.
+    """
+
+    embed_batch_size: int = 256
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return encode_query(self.model_name, query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await run_in("embedding", encode_query, self.model_name, query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        pool = get_cpu_pool()
+        if pool is None or len(texts) <= LOCAL_EMBED_BATCH_SIZE:
+            return encode_dense(self.model_name, list(texts))
+        futures = [
+            pool.submit(encode_dense, self.model_name, list(texts[i:i + LOCAL_EMBED_BATCH_SIZE]))
+            for i in range(0, len(texts), LOCAL_EMBED_BATCH_SIZE)
+        ]
+        return [vector for future in futures for vector in future.result()]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return await run_in("embedding", self._get_text_embedding, text)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await run_in("embedding", self._get_text_embeddings, texts)
+
+
+@dataclass(frozen=True)
+class EmbedBackend:
+    name: str
+    model_name: str
+    factory: Callable[[], BaseEmbedding]
+
+    @property
+    def model_id(self) -> str:
+        """Identifier stored with each collection, e.g. `fastembed:BAAI/bge-small-en-v1.5`."""
+        return f"{self.name}:{self.model_name}"
+
+
+def _gemini() -> BaseEmbedding:
+    from llama_index.embeddings.gemini import GeminiEmbedding
+    return GeminiEmbedding(model_name=GEMINI_EMBED_MODEL, api_key=os.environ.get("GOOGLE_API_KEY"))
+
+
+def _fastembed() -> BaseEmbedding:
+    return FastEmbedEmbedding(model_name=LOCAL_EMBED_MODEL)
+
+
+_backends: Dict[str, EmbedBackend] = {
+    "gemini": EmbedBackend("gemini", GEMINI_EMBED_MODEL, _gemini),
+    "fastembed": EmbedBackend("fastembed", LOCAL_EMBED_MODEL, _fastembed),
+}
+_instances: Dict[str, BaseEmbedding] = {}
+_instances_lock = threading.Lock()
+
+
+def register_embed_backend(name: str, model_name: str, factory: Callable[[], BaseEmbedding]):
+    """Add or replace an embedding backend (e.g. a fake model for benchmarks)."""
+    with _instances_lock:
+        _backends[name] = EmbedBackend(name, model_name, factory)
+        _instances.pop(name, None)
+
+
+def get_embed_backend(name: Optional[str] = None) -> EmbedBackend:
+    """
+    Raises:
+        ValueError: When the backend is not registered
+    """
+    name = (name or EMBED_BACKEND).lower()
+    backend = _backends.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown embedding backend '{name}', expected one of: {', '.join(sorted(_backends))}")
+    return backend
+
+
+def get_embed_model(name: Optional[str] = None) -> BaseEmbedding:
+    """Shared embedding model of a backend, created on first use."""
+    backend = get_embed_backend(name)
+    model = _instances.get(backend.name)
+    if model is None:
+        with _instances_lock:
+            model = _instances.get(backend.name)
+            if model is None:
+                model = backend.factory()
+                _instances[backend.name] = model
+    return model
+
+
+def warm_embed_model(name: Optional[str] = None):
+    """Load a local model ahead of the first request; remote backends need no warm-up."""
+    model = get_embed_model(name)
+    if isinstance(model, FastEmbedEmbedding):
+        model.get_query_embedding("warm-up")
@@ -0,0 +1,386 @@
+"""
+Retrieval evaluation: recall and latency of chunking and top-k settings on a labelled query set.
+
+Ingests a fixed corpus into a local in-memory Qdrant once per chunk setting, with the
+app's chunking (point IDs included), collection layout and hybrid retriever
+(RAG_QUERY_MODE=native). It then runs every labelled query at each top-k. For every
+(chunk_size, top_k) cell it reports recall@k and MRR over documents, ingest time, index
+size (points, vector and payload bytes), and query p50/p95 (query embedding plus search).
+
+Embeddings default to a deterministic hashed bag-of-words model, and BM25 to a hashed
+term-count encoder, so runs are offline and repeatable. Absolute recall is then lexical;
+compare cells, not numbers across models. --embed-backend fastembed and --sparse-model
+Qdrant/bm25 use the real local models instead.
+
+Without --corpus/--queries a synthetic labelled set is generated: documents of filler
+sentences, each with a few facts made of rare terms, queried by those terms.
+
+    corpus JSONL:  {"id": "doc-1", "text": "..."}
+    queries JSONL: {"query": "...", "relevant": ["doc-1"]}
+
+The chosen cell (best recall, then MRR, then p95; or with --min-recall the fastest cell
+reaching it) can be stored as a workflow's retrieval settings with --apply WORKFLOW_ID,
+or sent to POST /retrieval-settings.
+
+Usage:
+    python -m services.rag.evaluation --chunk-sizes 256,512,1024,2048 --top-k 1,3,5,10
+    python -m services.rag.evaluation --corpus corpus.jsonl --queries queries.jsonl --json results.json
+    python -m services.rag.evaluation --min-recall 0.9 --apply <workflow_id>
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core import Document, QueryBundle, StorageContext, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from qdrant_client import QdrantClient
+
+from .hybrid import RAG_HYBRID_FUSION, QdrantHybridRetriever
+from .profiles import ProfiledQdrantVectorStore
+from .retrieval import RetrievalSettings
+from .sparse import SPARSE_MODEL, sparse_doc_encoder, sparse_query_encoder
+
+EVAL_WORKFLOW_ID = "rag_eval"
+HASH_EMBED_DIM = 512
+_WORD = re.compile(r"\w+")
+
+FILLER_WORDS = (
+    "solar panel rooftop installation warranty financing survey inverter battery grid subsidy "
+    "tariff meter maintenance cleaning efficiency monsoon shading roof tilt capacity kilowatt "
+    "customer support booking invoice payment refund appointment technician inspection permit "
+    "the a of to and for with on in by is are will can our your each every"
+).split()
+_SYLLABLES = "ka ro mi zu te va lo ni sha qu bex dor fen gal hur jin kel mon pry tas".split()
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _bucket(token: str, size: int) -> int:
+    return zlib.crc32(token.encode("utf-8")) % size
+
+
+class HashEmbedding(BaseEmbedding):
+    """Deterministic dense embedding: hashed unigram and bigram counts (log-scaled), L2-normalised. No model, no network."""
+
+    dim: int = HASH_EMBED_DIM
+
+    def _vector(self, text: str) -> List[float]:
+        tokens = _tokens(text)
+        counts: Dict[str, int] = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector = [0.0] * self.dim
+        for feature, count in counts.items():
+            sign = 1.0 if zlib.adler32(feature.encode("utf-8")) % 2 else -1.0
+            # Log-scaled, so words repeated throughout a long chunk do not drown out rarer ones
+            vector[_bucket(feature, self.dim)] += sign * (1.0 + math.log(count))
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._vector(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+def hash_sparse_encoder() -> Callable:
+    """Sparse encoder of term counts over hashed token ids, shaped like the services.rag.sparse encoders."""
+    def encode(texts: Sequence[str]) -> Tuple[List[List[int]], List[List[float]]]:
+        indices, values = [], []
+        for text in texts:
+            counts: Dict[int, float] = {}
+            for token in _tokens(text):
+                index = _bucket(token, 2 ** 31)
+                counts[index] = counts.get(index, 0.0) + 1.0
+            indices.append(list(counts))
+            values.append(list(counts.values()))
+        return indices, values
+
+    return encode
+
+
+def synthetic_dataset(
+    docs: int = 60,
+    sentences: int = 80,
+    facts: int = 2,
+    seed: int = 5,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Corpus of `docs` documents of filler sentences with `facts` rare-term facts each, and one query per fact."""
+    rng = random.Random(seed)
+    used = set()
+
+    def rare_term() -> str:
+        while True:
+            term = "".join(rng.choice(_SYLLABLES) for _ in range(3))
+            if term not in used:
+                used.add(term)
+                return term
+
+    def sentence(words: List[str]) -> str:
+        return " ".join(words).capitalize() + "."
+
+    corpus, queries = [], []
+    for d in range(docs):
+        doc_id = f"doc-{d}"
+        lines = [sentence([rng.choice(FILLER_WORDS) for _ in range(12)]) for _ in range(sentences)]
+        for _ in range(facts):
+            terms = [rare_term() for _ in range(3)]
+            words = [rng.choice(FILLER_WORDS) for _ in range(9)] + terms
+            rng.shuffle(words)
+            lines[rng.randrange(sentences)] = sentence(words)
+            query = terms + [rng.choice(FILLER_WORDS) for _ in range(3)]
+            rng.shuffle(query)
+            queries.append({"query": " ".join(query), "relevant": [doc_id]})
+        # Paragraphs of 8 sentences, so the "\n\n" separator of the node parser has boundaries to use
+        paragraphs = [" ".join(lines[i:i + 8]) for i in range(0, sentences, 8)]
+        corpus.append({"id": doc_id, "text": "\n\n".join(paragraphs)})
+    return corpus, queries
+
+
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _index_size(client: QdrantClient, collection: str) -> Dict[str, int]:
+    """Points and the raw bytes of their float32 vectors (sparse: index + value per term) and JSON payloads."""
+    size = {"points": 0, "vector_bytes": 0, "payload_bytes": 0}
+    offset = None
+    while True:
+        points, offset = client.scroll(collection, limit=1024, offset=offset, with_payload=True, with_vectors=True)
+        for point in points:
+            size["points"] += 1
+            size["payload_bytes"] += len(json.dumps(point.payload, ensure_ascii=False).encode("utf-8"))
+            vectors = point.vector if isinstance(point.vector, dict) else {"": point.vector}
+            for vector in vectors.values():
+                if hasattr(vector, "indices"):
+                    size["vector_bytes"] += 8 * len(vector.indices)
+                elif vector is not None:
+                    size["vector_bytes"] += 4 * len(vector)
+        if offset is None:
+            return size
+
+
+def _ranked_documents(nodes: List[Any]) -> List[str]:
+    ranked: List[str] = []
+    for n in nodes:
+        document_id = n.node.ref_doc_id
+        if document_id not in ranked:
+            ranked.append(document_id)
+    return ranked
+
+
+class RetrievalEvaluation:
+    """Grid evaluation of chunk settings and top-k over one corpus and labelled query set."""
+
+    def __init__(
+        self,
+        corpus: List[Dict[str, Any]],
+        queries: List[Dict[str, Any]],
+        *,
+        embed_model: Optional[BaseEmbedding] = None,
+        sparse_model: str = "hash",
+        fusion: str = RAG_HYBRID_FUSION,
+    ):
+        self.corpus = corpus
+        self.queries = queries
+        self.embed_model = embed_model or HashEmbedding()
+        if sparse_model == "hash":
+            self.sparse_doc_fn = self.sparse_query_fn = hash_sparse_encoder()
+        else:
+            self.sparse_doc_fn, self.sparse_query_fn = sparse_doc_encoder(sparse_model), sparse_query_encoder(sparse_model)
+        self.fusion = fusion
+        self.client = QdrantClient(":memory:")
+
+    def ingest(self, settings: RetrievalSettings) -> Tuple[str, Dict[str, Any]]:
+        """Index the corpus with `settings`' chunking into a new collection; returns it and the ingest stats."""
+        from .vector_db import _chunk
+
+        collection = f"{EVAL_WORKFLOW_ID}_{settings.chunk_size}_{settings.chunk_overlap}"
+        if self.client.collection_exists(collection):
+            self.client.delete_collection(collection)
+        vector_store = ProfiledQdrantVectorStore(
+            client=self.client,
+            collection_name=collection,
+            enable_hybrid=True,
+            fastembed_sparse_model=SPARSE_MODEL,
+            sparse_doc_fn=self.sparse_doc_fn,
+            sparse_query_fn=self.sparse_query_fn,
+        )
+        parser = settings.node_parser()
+
+        started = time.perf_counter()
+        nodes = []
+        for item in self.corpus:
+            nodes.extend(_chunk([Document(text=item["text"])], EVAL_WORKFLOW_ID, str(item["id"]), parser))
+        VectorStoreIndex(
+            nodes=nodes,
+            storage_context=StorageContext.from_defaults(vector_store=vector_store),
+            embed_model=self.embed_model,
+        )
+        stats = {"ingest_s": round(time.perf_counter() - started, 3), **_index_size(self.client, collection)}
+        return collection, stats
+
+    def run_queries(self, collection: str, top_k: int) -> Dict[str, Any]:
+        retriever = QdrantHybridRetriever(
+            collection,
+            embed_model=self.embed_model,
+            similarity_top_k=top_k,
+            sparse_top_k=top_k,
+            hybrid_top_k=top_k,
+            fusion=self.fusion,
+            sparse_query_fn=self.sparse_query_fn,
+            client=self.client,
+        )
+        recall, reciprocal_ranks, latencies = [], [], []
+        for item in self.queries:
+            relevant = {str(doc_id) for doc_id in item["relevant"]}
+            started = time.perf_counter()
+            nodes = retriever.retrieve(QueryBundle(query_str=item["query"]))
+            latencies.append(time.perf_counter() - started)
+
+            ranked = _ranked_documents(nodes)
+            recall.append(len(relevant.intersection(ranked)) / len(relevant) if relevant else 0.0)
+            rank = next((i for i, doc_id in enumerate(ranked, 1) if doc_id in relevant), None)
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+        latencies.sort()
+        count = len(self.queries) or 1
+        return {
+            "recall": round(sum(recall) / count, 4),
+            "mrr": round(sum(reciprocal_ranks) / count, 4),
+            "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        }
+
+    def run(self, chunk_sizes: List[int], top_ks: List[int], chunk_overlap: int = 50) -> List[Dict[str, Any]]:
+        """Evaluate every (chunk_size, top_k) pair; each chunk size is ingested once."""
+        rows = []
+        for chunk_size in chunk_sizes:
+            settings = RetrievalSettings(chunk_size=chunk_size, chunk_overlap=min(chunk_overlap, chunk_size - 1))
+            collection, stats = self.ingest(settings)
+            for top_k in top_ks:
+                rows.append({
+                    "chunk_size": settings.chunk_size,
+                    "chunk_overlap": settings.chunk_overlap,
+                    "top_k": top_k,
+                    **stats,
+                    **self.run_queries(collection, top_k),
+                })
+            self.client.delete_collection(collection)
+        return rows
+
+
+def choose(rows: List[Dict[str, Any]], min_recall: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Best recall (then MRR, then p95); with `min_recall`, the lowest p95 among the cells reaching it."""
+    if min_recall is not None:
+        passing = [row for row in rows if row["recall"] >= min_recall]
+        return min(passing, key=lambda row: (row["p95_ms"], row["points"]), default=None)
+    return max(rows, key=lambda row: (row["recall"], row["mrr"], -row["p95_ms"]), default=None)
+
+
+def settings_from(row: Dict[str, Any]) -> RetrievalSettings:
+    top_k = row["top_k"]
+    return RetrievalSettings(
+        chunk_size=row["chunk_size"],
+        chunk_overlap=row["chunk_overlap"],
+        similarity_top_k=top_k,
+        sparse_top_k=top_k,
+        hybrid_top_k=top_k,
+    )
+
+
+async def apply_settings(workflow_id: str, settings: RetrievalSettings) -> Dict[str, Any]:
+    """Store `settings` as the workflow's retrieval settings (registering its collection if needed)."""
+    from .registry import resolve_collection, update_collection_record
+
+    await resolve_collection(workflow_id)
+    return await update_collection_record(workflow_id, {"retrieval": settings.as_dict()})
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.rag.evaluation",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--corpus", help="Corpus JSONL ({id, text} per line); synthetic when omitted")
+    parser.add_argument("--queries", help="Labelled queries JSONL ({query, relevant: [ids]} per line)")
+    parser.add_argument("--docs", type=int, default=60, help="Synthetic corpus size")
+    parser.add_argument("--chunk-sizes", type=_ints, default=[256, 512, 1024, 2048])
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--top-k", type=_ints, default=[1, 3, 5, 10])
+    parser.add_argument("--embed-backend", default="hash", help="hash, or a services.rag.embeddings backend (e.g. fastembed)")
+    parser.add_argument("--sparse-model", default="hash", help=f"hash, or a FastEmbed sparse model (e.g. {SPARSE_MODEL})")
+    parser.add_argument("--fusion", default=RAG_HYBRID_FUSION, choices=["rrf", "dbsf"])
+    parser.add_argument("--min-recall", type=float, help="Choose the fastest cell reaching this recall")
+    parser.add_argument("--apply", metavar="WORKFLOW_ID", help="Store the chosen settings for this workflow (needs MongoDB)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    if bool(args.corpus) != bool(args.queries):
+        parser.error("--corpus and --queries go together")
+    if args.corpus:
+        corpus, queries = load_jsonl(args.corpus), load_jsonl(args.queries)
+    else:
+        corpus, queries = synthetic_dataset(docs=args.docs)
+
+    embed_model = None
+    if args.embed_backend != "hash":
+        from .embeddings import get_embed_model
+        embed_model = get_embed_model(args.embed_backend)
+
+    evaluation = RetrievalEvaluation(
+        corpus, queries, embed_model=embed_model, sparse_model=args.sparse_model, fusion=args.fusion
+    )
+    print(f"{len(corpus)} documents, {len(queries)} queries")
+    print(f"{'chunk':>6} {'top_k':>5} {'recall':>7} {'mrr':>6} {'ingest_s':>8} {'points':>7} {'index_kb':>9} {'p50_ms':>7} {'p95_ms':>7}")
+    rows = evaluation.run(args.chunk_sizes, args.top_k, args.chunk_overlap)
+    for row in rows:
+        index_kb = (row["vector_bytes"] + row["payload_bytes"]) / 1024
+        print(
+            f"{row['chunk_size']:>6} {row['top_k']:>5} {row['recall']:>7.3f} {row['mrr']:>6.3f} {row['ingest_s']:>8.2f}"
+            f" {row['points']:>7} {index_kb:>9.1f} {row['p50_ms']:>7.2f} {row['p95_ms']:>7.2f}"
+        )
+
+    best = choose(rows, args.min_recall)
+    report: Dict[str, Any] = {"documents": len(corpus), "queries": len(queries), "results": rows, "chosen": None}
+    if best is None:
+        print(f"No cell reaches recall {args.min_recall}")
+    else:
+        settings = settings_from(best)
+        report["chosen"] = settings.as_dict()
+        print(f"Chosen: {json.dumps(settings.as_dict())}")
+        if args.apply:
+            asyncio.run(apply_settings(args.apply, settings))
+            print(f"Stored as the retrieval settings of workflow {args.apply}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if best is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import logging
+import threading
+from typing import Any, List, Optional
+
+from qdrant_client import models
+
+from .config import get_rag_config
+from .models import QueryFilters
+from .tenancy import tenant_condition
+
+logger = logging.getLogger(__name__)
+
+# Payload keys written at ingestion that queries can filter on, with their index types
+# (doc_id, the document id, is indexed by llama-index when it creates the collection)
+DOC_ID_KEY = "doc_id"
+FILTER_INDEXES = {
+    "source_type": models.PayloadSchemaType.KEYWORD,
+    "filename": models.PayloadSchemaType.KEYWORD,
+    "language": models.PayloadSchemaType.KEYWORD,
+    "page_number": models.PayloadSchemaType.INTEGER,
+    "page_end": models.PayloadSchemaType.INTEGER,
+    "ingested_at": models.PayloadSchemaType.DATETIME,
+}
+
+# Collections whose filter indexes are known to exist in this process
+_indexed = set()
+_indexed_lock = threading.Lock()
+
+
+def forget(collection: str) -> None:
+    """Drop what this process knows about a deleted collection, so a re-created one gets its indexes."""
+    with _indexed_lock:
+        _indexed.discard(collection)
+
+
+def filter_conditions(filters: QueryFilters) -> List[Any]:
+    """Qdrant conditions for the fields set in `filters`."""
+    conditions: List[Any] = []
+    for key, values in (
+        (DOC_ID_KEY, filters.document_ids),
+        ("source_type", filters.source_types),
+        ("filename", filters.filenames),
+        ("language", filters.languages),
+    ):
+        if values:
+            conditions.append(models.FieldCondition(key=key, match=models.MatchAny(any=values)))
+    if filters.page_to is not None:
+        conditions.append(models.FieldCondition(key="page_number", range=models.Range(lte=filters.page_to)))
+    if filters.page_from is not None:
+        # page_end is only stored for chunks spanning several pages
+        conditions.append(models.Filter(should=[
+            models.FieldCondition(key="page_number", range=models.Range(gte=filters.page_from)),
+            models.FieldCondition(key="page_end", range=models.Range(gte=filters.page_from)),
+        ]))
+    if filters.ingested_after is not None or filters.ingested_before is not None:
+        conditions.append(models.FieldCondition(
+            key="ingested_at",
+            range=models.DatetimeRange(gte=filters.ingested_after, lte=filters.ingested_before),
+        ))
+    return conditions
+
+
+def build_query_filter(record: dict, filters: Optional[QueryFilters] = None) -> Optional[models.Filter]:
+    """Qdrant filter for a query: the tenant condition of a shared collection plus the caller's filters."""
+    conditions = filter_conditions(filters) if filters is not None else []
+    tenant = tenant_condition(record)
+    if tenant is not None:
+        conditions.insert(0, tenant)
+    return models.Filter(must=conditions) if conditions else None
+
+
+def sync_ensure_filter_indexes(collection: str, client: Any = None):
+    """
+    Create the payload indexes behind QueryFilters on a collection.
+
+    Idempotent on the server, and skipped once done in this process. Call after the
+    collection exists (it is created by the first upsert).
+    """
+    if collection in _indexed:
+        return
+    client = client or get_rag_config().client
+    with _indexed_lock:
+        if collection in _indexed:
+            return
+        for key, schema in FILTER_INDEXES.items():
+            client.create_payload_index(collection_name=collection, field_name=key, field_schema=schema)
+        _indexed.add(collection)
+        logger.info("Filter indexes on %s ensured", collection)
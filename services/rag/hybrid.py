@@ -0,0 +1,213 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from llama_index.core import Settings
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.core.vector_stores.utils import legacy_metadata_dict_to_node, metadata_dict_to_node
+from qdrant_client import models
+
+from utils.executors import run_in
+from .config import get_rag_config
+from .sparse import BatchSparseEncoding, sparse_query_encoder
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "native" sends one Query API request with server-side fusion; "llama" uses llama-index's
+# QdrantVectorStore hybrid mode (a dense and a sparse search, fused in Python)
+RAG_QUERY_MODE = os.environ.get("RAG_QUERY_MODE", "native").lower()
+# rrf (Reciprocal Rank Fusion) or dbsf (Distribution-Based Score Fusion)
+RAG_HYBRID_FUSION = os.environ.get("RAG_HYBRID_FUSION", "rrf").lower()
+
+DENSE_VECTOR_NAME = "text-dense"
+# Newer llama-index collections name the sparse vector "text-sparse-new", older ones "text-sparse"
+SPARSE_VECTOR_NAMES = ("text-sparse-new", "text-sparse")
+# Payload keys needed to rebuild nodes; the flattened metadata copies llama-index also stores are skipped
+NODE_PAYLOAD_KEYS = ["_node_content", "_node_type", "doc_id", "document_id", "ref_doc_id", "text"]
+
+# collection -> (dense vector name, sparse vector name); None is the unnamed vector / no sparse vector
+_vector_names: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+_names_lock = threading.Lock()
+
+
+def _names_from_params(params: Any) -> Tuple[Optional[str], Optional[str]]:
+    vectors = params.vectors
+    dense = DENSE_VECTOR_NAME if isinstance(vectors, dict) and DENSE_VECTOR_NAME in vectors else None
+    sparse_names = list(params.sparse_vectors or {})
+    sparse = next((n for n in SPARSE_VECTOR_NAMES if n in sparse_names), sparse_names[0] if sparse_names else None)
+    return dense, sparse
+
+
+def _cache_names(collection: str, names: Tuple[Optional[str], Optional[str]]) -> Tuple[Optional[str], Optional[str]]:
+    with _names_lock:
+        _vector_names[collection] = names
+    return names
+
+
+def forget(collection: str) -> None:
+    """Drop the cached vector names of a deleted collection."""
+    with _names_lock:
+        _vector_names.pop(collection, None)
+
+
+def _nodes_from_points(points: List[models.ScoredPoint]) -> List[NodeWithScore]:
+    nodes = []
+    for point in points:
+        payload = point.payload or {}
+        try:
+            node = metadata_dict_to_node(payload)
+        except Exception:
+            # Points written by very old llama-index versions keep text and metadata at the top level
+            metadata, node_info, relationships = legacy_metadata_dict_to_node(payload)
+            node = TextNode(
+                id_=str(point.id),
+                text=payload.get("text", ""),
+                metadata=metadata,
+                start_char_idx=node_info.get("start"),
+                end_char_idx=node_info.get("end"),
+                relationships=relationships,
+            )
+        nodes.append(NodeWithScore(node=node, score=point.score))
+    return nodes
+
+
+class QdrantHybridRetriever(BaseRetriever):
+    """
+    Hybrid retriever issuing a single Qdrant `query_points` request.
+
+    The dense and sparse searches run as prefetches and are fused on the server (RRF or
+    DBSF), so each query costs one round trip and no Python-side fusion. Filters, the
+    dense score threshold and the collection profile's quantization search params are
+    applied inside the prefetches, and only the payload keys needed to rebuild nodes
+    are returned.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        *,
+        embed_model: Any = None,
+        query_filter: Optional[models.Filter] = None,
+        search_params: Optional[models.SearchParams] = None,
+        similarity_top_k: int = 3,
+        sparse_top_k: int = 3,
+        hybrid_top_k: int = 3,
+        score_threshold: Optional[float] = None,
+        fusion: str = RAG_HYBRID_FUSION,
+        sparse_query_fn: Optional[Callable] = None,
+        client: Any = None,
+        aclient: Any = None,
+        **kwargs: Any,
+    ):
+        """
+        Args:
+            collection_name: The Qdrant collection (the workflow id, or a shared collection)
+            embed_model: Embedding model the collection was indexed with (default Settings.embed_model)
+            query_filter: Payload filter applied to both searches (e.g. the tenant filter)
+            search_params: Dense search params, e.g. quantization rescoring from the collection profile
+            similarity_top_k: Number of dense candidates
+            sparse_top_k: Number of sparse candidates
+            hybrid_top_k: Number of fused results to return
+            score_threshold: Minimum dense (cosine) score of a candidate
+            fusion: "rrf" or "dbsf"
+            sparse_query_fn: Sparse query encoder (default the RAG_SPARSE_MODEL encoder)
+            client: Qdrant client (default the shared RagConfig clients)
+            aclient: Async Qdrant client
+        """
+        super().__init__(**kwargs)
+        self._collection_name = collection_name
+        self._embed_model = embed_model or Settings.embed_model
+        self._query_filter = query_filter
+        self._search_params = search_params
+        self._similarity_top_k = similarity_top_k
+        self._sparse_top_k = sparse_top_k
+        self._hybrid_top_k = hybrid_top_k
+        self._score_threshold = score_threshold
+        self._fusion = models.Fusion(fusion.lower())
+        self._sparse_query_fn = sparse_query_fn or sparse_query_encoder()
+        self._client = client
+        self._aclient = aclient
+
+    @property
+    def client(self) -> Any:
+        return self._client or get_rag_config().client
+
+    @property
+    def aclient(self) -> Any:
+        return self._aclient or get_rag_config().aclient
+
+    def _request(
+        self,
+        query: str,
+        embedding: List[float],
+        names: Tuple[Optional[str], Optional[str]],
+        sparse_query: Optional[BatchSparseEncoding] = None,
+    ) -> Dict[str, Any]:
+        dense_name, sparse_name = names
+        dense = models.Prefetch(
+            query=embedding,
+            using=dense_name,
+            filter=self._query_filter,
+            params=self._search_params,
+            score_threshold=self._score_threshold,
+            limit=self._similarity_top_k,
+        )
+        request = {
+            "collection_name": self._collection_name,
+            "limit": self._hybrid_top_k,
+            "with_payload": models.PayloadSelectorInclude(include=NODE_PAYLOAD_KEYS),
+            "with_vectors": False,
+        }
+        if sparse_name is None:
+            # Dense-only collection: a plain search with the same filter and threshold
+            return {
+                **request,
+                "query": embedding,
+                "using": dense_name,
+                "query_filter": self._query_filter,
+                "search_params": self._search_params,
+                "score_threshold": self._score_threshold,
+            }
+        indices, values = sparse_query or self._sparse_query_fn([query])
+        sparse = models.Prefetch(
+            query=models.SparseVector(indices=indices[0], values=values[0]),
+            using=sparse_name,
+            filter=self._query_filter,
+            limit=self._sparse_top_k,
+        )
+        return {**request, "prefetch": [dense, sparse], "query": models.FusionQuery(fusion=self._fusion)}
+
+    def _names(self) -> Tuple[Optional[str], Optional[str]]:
+        names = _vector_names.get(self._collection_name)
+        if names is None:
+            params = self.client.get_collection(self._collection_name).config.params
+            names = _cache_names(self._collection_name, _names_from_params(params))
+        return names
+
+    async def _anames(self) -> Tuple[Optional[str], Optional[str]]:
+        names = _vector_names.get(self._collection_name)
+        if names is None:
+            info = await self.aclient.get_collection(self._collection_name)
+            names = _cache_names(self._collection_name, _names_from_params(info.config.params))
+        return names
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        embedding = query_bundle.embedding or self._embed_model.get_query_embedding(query_bundle.query_str)
+        request = self._request(query_bundle.query_str, embedding, self._names())
+        return _nodes_from_points(self.client.query_points(**request).points)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        embedding = query_bundle.embedding or await self._embed_model.aget_query_embedding(query_bundle.query_str)
+        names = await self._anames()
+        sparse_query = None
+        if names[1] is not None:
+            # BM25 tokenization is CPU work; keep it off the event loop
+            sparse_query = await run_in("embedding", self._sparse_query_fn, [query_bundle.query_str])
+        request = self._request(query_bundle.query_str, embedding, names, sparse_query)
+        response = await self.aclient.query_points(**request)
+        return _nodes_from_points(response.points)
@@ -0,0 +1,293 @@
+"""
+Copy per-workflow Qdrant collections into the shared multi-tenant layout.
+
+Each workflow's points are copied with their vectors and IDs into its shared collection
+(see services.rag.tenancy), stamped with `workflow_id`, counted, and only then is the
+workflow's registry record switched to the shared layout. Other API workers follow the
+switch once their registry cache expires (RAG_REGISTRY_CACHE_TTL_S), so the tool then waits
+--settle-s seconds (the TTL and a margin by default) and copies over what those workers still
+added to or removed from the source. The source collection is kept unless --delete-source
+is given, in which case it is deleted only after that wait.
+
+Usage:
+    python -m services.rag.migrate_layout --workflow wf_123 --workflow wf_456
+    python -m services.rag.migrate_layout --all --batch-size 512 --delete-source
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from qdrant_client import models
+
+from utils.executors import run_in, shutdown_executors
+from .config import get_rag_config
+from .filters import DOC_ID_KEY
+from .registry import RAG_REGISTRY_CACHE_TTL_S, resolve_collection, update_collection_record
+from .tenancy import (
+    RAG_SHARED_COLLECTION_PREFIX,
+    TENANT_KEY,
+    collection_of,
+    is_shared,
+    shared_collection_name,
+    sync_ensure_tenant_index,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds added to the registry cache TTL before a switched workflow is settled
+SETTLE_MARGIN_S = 5.0
+
+
+def _sparse_name(params: Any) -> Optional[str]:
+    names = list(params.sparse_vectors or {})
+    return names[0] if len(names) == 1 else None
+
+
+def _without_hnsw(vectors: Any) -> Any:
+    if isinstance(vectors, dict):
+        return {name: params.model_copy(update={"hnsw_config": None}) for name, params in vectors.items()}
+    return vectors.model_copy(update={"hnsw_config": None})
+
+
+def _sync_prepare_target(source: str, target: str):
+    """Create the shared collection with the source's vector config, or check it matches."""
+    client = get_rag_config().client
+    params = client.get_collection(source).config.params
+    if not client.collection_exists(target):
+        client.create_collection(
+            collection_name=target,
+            # Vector-level HNSW from the source's profile would override the shared per-tenant graph
+            vectors_config=_without_hnsw(params.vectors),
+            sparse_vectors_config=params.sparse_vectors,
+        )
+        client.create_payload_index(
+            collection_name=target, field_name=DOC_ID_KEY, field_schema=models.PayloadSchemaType.KEYWORD
+        )
+        logger.info("Created shared collection %s from the config of %s", target, source)
+    else:
+        target_params = client.get_collection(target).config.params
+        if _without_hnsw(target_params.vectors) != _without_hnsw(params.vectors):
+            raise ValueError(f"Dense vector config of {source} does not match shared collection {target}")
+    sync_ensure_tenant_index(target, client)
+
+
+def _sync_write_points(source: str, target: str, workflow_id: str, points: List[Any]) -> int:
+    client = get_rag_config().client
+    # Older llama-index collections name the sparse vector differently; points follow the target's name
+    source_sparse = _sparse_name(client.get_collection(source).config.params)
+    target_sparse = _sparse_name(client.get_collection(target).config.params)
+
+    batch: List[models.PointStruct] = []
+    for point in points:
+        vector = dict(point.vector) if isinstance(point.vector, dict) else point.vector
+        if isinstance(vector, dict) and source_sparse and target_sparse and source_sparse != target_sparse:
+            if source_sparse in vector:
+                vector[target_sparse] = vector.pop(source_sparse)
+        batch.append(models.PointStruct(
+            id=point.id,
+            vector=vector,
+            payload={**(point.payload or {}), TENANT_KEY: workflow_id},
+        ))
+    if batch:
+        client.upsert(collection_name=target, points=batch, wait=True)
+    return len(batch)
+
+
+def _sync_copy_points(source: str, target: str, workflow_id: str, batch_size: int) -> Set[Any]:
+    """Copy every point of `source`; returns the IDs copied."""
+    client = get_rag_config().client
+    copied: Set[Any] = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        if not points:
+            break
+        _sync_write_points(source, target, workflow_id, points)
+        copied.update(point.id for point in points)
+        if offset is None:
+            break
+    return copied
+
+
+def _sync_point_ids(collection: str, batch_size: int) -> Set[Any]:
+    client = get_rag_config().client
+    ids: Set[Any] = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection, limit=batch_size, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids.update(point.id for point in points)
+        if not points or offset is None:
+            break
+    return ids
+
+
+def _sync_copy_difference(source: str, target: str, workflow_id: str, copied: Set[Any], batch_size: int) -> Dict[str, int]:
+    """
+    Apply to `target` what workers still on the old record did to `source` after the first copy.
+
+    Point IDs derive from workflow, document and chunk content, so a changed chunk is a new
+    ID: points added to the source since the copy are copied, and points removed from it are
+    removed from the target. Points written to the target by workers already switched are left alone.
+    """
+    client = get_rag_config().client
+    current = _sync_point_ids(source, batch_size)
+    added = list(current - copied)
+    removed = list(copied - current)
+    for i in range(0, len(added), batch_size):
+        points = client.retrieve(
+            collection_name=source, ids=added[i:i + batch_size], with_payload=True, with_vectors=True
+        )
+        _sync_write_points(source, target, workflow_id, points)
+    for i in range(0, len(removed), batch_size):
+        client.delete(
+            collection_name=target,
+            points_selector=models.PointIdsList(points=removed[i:i + batch_size]),
+            wait=True,
+        )
+    return {"added": len(added), "removed": len(removed)}
+
+
+def _sync_count(collection: str, workflow_id: Optional[str] = None) -> int:
+    client = get_rag_config().client
+    count_filter = None
+    if workflow_id is not None:
+        count_filter = models.Filter(must=[
+            models.FieldCondition(key=TENANT_KEY, match=models.MatchValue(value=workflow_id))
+        ])
+    return client.count(collection_name=collection, count_filter=count_filter, exact=True).count
+
+
+async def switch_workflow(workflow_id: str, batch_size: int = 256) -> Dict[str, Any]:
+    """
+    Copy one workflow from its own collection into its shared collection and switch its record.
+
+    Workers that cached the old record keep using the source until RAG_REGISTRY_CACHE_TTL_S
+    passes; run settle_workflow() after that to carry over what they changed.
+
+    Returns:
+        Dict with workflow_id, status, source, target, points copied and (internally) the copied IDs
+
+    Raises:
+        RuntimeError: When fewer points arrived in the shared collection than the source holds
+    """
+    record = await resolve_collection(workflow_id)
+    if is_shared(record):
+        return {"workflow_id": workflow_id, "status": "already_shared", "target": collection_of(record)}
+
+    source = collection_of(record)
+    target = shared_collection_name(workflow_id, record["embed_backend"])
+    start = time.perf_counter()
+
+    await run_in("vector_index", _sync_prepare_target, source, target)
+    copied = await run_in("vector_index", _sync_copy_points, source, target, workflow_id, batch_size)
+    expected = await run_in("vector_index", _sync_count, source)
+    present = await run_in("vector_index", _sync_count, target, workflow_id)
+    if present < expected:
+        raise RuntimeError(f"{workflow_id}: {present} of {expected} points present in {target}, record left unchanged")
+
+    await update_collection_record(workflow_id, {"layout": "shared", "collection": target})
+    logger.info("Switched %s: %d points %s -> %s", workflow_id, len(copied), source, target)
+    return {
+        "workflow_id": workflow_id,
+        "status": "switched",
+        "source": source,
+        "target": target,
+        "points": len(copied),
+        "seconds": round(time.perf_counter() - start, 2),
+        "_copied": copied,
+    }
+
+
+async def settle_workflow(switched: Dict[str, Any], batch_size: int = 256, delete_source: bool = False) -> Dict[str, Any]:
+    """
+    Finish a switch_workflow() once every worker has dropped the old record from its cache.
+
+    Copies the difference the source picked up in the meantime, then deletes the
+    source when `delete_source` is set.
+    """
+    result = {k: v for k, v in switched.items() if not k.startswith("_")}
+    if switched["status"] != "switched":
+        return result
+    workflow_id, source, target = switched["workflow_id"], switched["source"], switched["target"]
+    difference = await run_in(
+        "vector_index", _sync_copy_difference, source, target, workflow_id, switched["_copied"], batch_size
+    )
+    if delete_source:
+        await run_in("vector_index", get_rag_config().client.delete_collection, source)
+    result.update(status="migrated", late_changes=difference, source_deleted=delete_source)
+    logger.info("Migrated %s: %d late additions and %d removals carried over", workflow_id, difference["added"], difference["removed"])
+    return result
+
+
+async def migrate_workflow(
+    workflow_id: str,
+    batch_size: int = 256,
+    delete_source: bool = False,
+    settle_s: float = RAG_REGISTRY_CACHE_TTL_S + SETTLE_MARGIN_S,
+) -> Dict[str, Any]:
+    """Move one workflow into its shared collection: switch, wait `settle_s` seconds for other workers, settle."""
+    switched = await switch_workflow(workflow_id, batch_size)
+    if switched["status"] == "switched":
+        await asyncio.sleep(settle_s)
+    return await settle_workflow(switched, batch_size, delete_source)
+
+
+def _sync_list_workflow_collections() -> List[str]:
+    names = [c.name for c in get_rag_config().client.get_collections().collections]
+    return sorted(n for n in names if not n.startswith(f"{RAG_SHARED_COLLECTION_PREFIX}_"))
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflow", action="append", default=[], help="Workflow to migrate (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Migrate every per-workflow collection in Qdrant")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--delete-source", action="store_true", help="Delete each source collection after a verified copy")
+    parser.add_argument(
+        "--settle-s",
+        type=float,
+        default=RAG_REGISTRY_CACHE_TTL_S + SETTLE_MARGIN_S,
+        help="Seconds to wait after switching for API workers' registry caches to expire",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    workflows = list(args.workflow)
+    if args.all:
+        workflows += await run_in("vector_index", _sync_list_workflow_collections)
+    if not workflows:
+        parser.error("pass --workflow or --all")
+
+    failed = 0
+    try:
+        switched = []
+        for workflow_id in dict.fromkeys(workflows):
+            try:
+                switched.append(await switch_workflow(workflow_id, args.batch_size))
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to migrate {workflow_id}: {str(e)}")
+        # One wait covers every workflow switched above
+        if any(result["status"] == "switched" for result in switched):
+            logger.info("Waiting %.0fs for other workers to pick up the new records", args.settle_s)
+            await asyncio.sleep(args.settle_s)
+        for result in switched:
+            try:
+                print(await settle_workflow(result, args.batch_size, args.delete_source))
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to settle {result['workflow_id']}: {str(e)}")
+    finally:
+        shutdown_executors()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,17 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional, List
+
+
+# -------- Query Models --------
+class QueryFilters(BaseModel):
+    """Restrictions on the points a query searches; all given fields must match."""
+    document_ids: Optional[List[str]] = None
+    source_types: Optional[List[str]] = None
+    filenames: Optional[List[str]] = None
+    languages: Optional[List[str]] = None
+    # Chunks overlapping the page range [page_from, page_to]
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    ingested_after: Optional[datetime] = None
+    ingested_before: Optional[datetime] = None
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from services.livekit_api.mongodb.db import rag_prefetch
+from utils.background import background_jobs
+from utils.executors import run_in
+from utils.telemetry import span
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Warm a workflow's retrieval path and pre-run its likely queries when a call is dispatched
+RAG_PREFETCH_ENABLED = os.environ.get("RAG_PREFETCH_ENABLED", "false").lower() == "true"
+RAG_PREFETCH_MAX_QUERIES = int(os.environ.get("RAG_PREFETCH_MAX_QUERIES", "8"))
+RAG_PREFETCH_TOP_K = int(os.environ.get("RAG_PREFETCH_TOP_K", "3"))
+# Also synthesize an LLM answer per query (one LLM call each), not just the retrieved chunks
+RAG_PREFETCH_ANSWERS = os.environ.get("RAG_PREFETCH_ANSWERS", "false").lower() == "true"
+# Entries outlive the longest expected call; an inbound rule's entry is refreshed with POST /prefetch-context
+RAG_PREFETCH_TTL_S = float(os.environ.get("RAG_PREFETCH_TTL_S", "3600"))
+
+# Bullets and numbering at the start of a talking point ("- ", "* ", "1. ", "2) ")
+_BULLET = re.compile(r"^\s*(?:[-*•]+|\d+[.)])\s*")
+# "objection: response" lines (also "->", "=>" or " - "); only the objection is what a caller would ask
+_OBJECTION_LABEL = re.compile(r"^objection\s*:\s*", re.IGNORECASE)
+_OBJECTION = re.compile(r"^(.+?)\s*(?:[:–—]|\s-|->|=>)\s+.+$")
+
+
+def _lines(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    lines = []
+    for line in re.split(r"[\n;]+", text):
+        line = _BULLET.sub("", line).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def likely_queries(
+    key_talking_points: Optional[str] = None,
+    objection_responses: Optional[str] = None,
+    max_queries: int = RAG_PREFETCH_MAX_QUERIES,
+) -> List[str]:
+    """
+    Queries a call is likely to need, from the campaign's talking points and objections.
+
+    Each line (or ";"-separated item) is one query. Objections written as
+    "objection: response" contribute the objection only. Objections come first, as
+    they are what callers raise; duplicates are dropped and the list is capped at `max_queries`.
+    """
+    queries: List[str] = []
+    for line in _lines(objection_responses):
+        line = _OBJECTION_LABEL.sub("", line)
+        match = _OBJECTION.match(line)
+        queries.append(match.group(1) if match else line)
+    queries.extend(_lines(key_talking_points))
+
+    seen = set()
+    unique = []
+    for query in queries:
+        key = query.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique[:max_queries]
+
+
+def _sync_get(call_key: str) -> Optional[Dict[str, Any]]:
+    # MongoDB's TTL monitor only runs every minute, so expiry is also checked here
+    return rag_prefetch().find_one(
+        {"call_key": call_key, "expire_at": {"$gt": datetime.now(timezone.utc)}},
+        {"_id": 0, "expire_at": 0},
+    )
+
+
+def _sync_put(entry: Dict[str, Any]) -> None:
+    expire_at = datetime.now(timezone.utc) + timedelta(seconds=RAG_PREFETCH_TTL_S)
+    rag_prefetch().replace_one({"call_key": entry["call_key"]}, {**entry, "expire_at": expire_at}, upsert=True)
+
+
+async def get_prefetched(call_key: str) -> Optional[Dict[str, Any]]:
+    """Prefetched results of a call, or None when nothing was (or is yet) prefetched for it."""
+    return await run_in("io_mongo", _sync_get, call_key)
+
+
+async def prefetch_call(call_key: str, workflow_id: str, queries: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Warm a workflow's retrieval path and store the results of `queries` under `call_key`.
+
+    Results go to MongoDB (expiring after RAG_PREFETCH_TTL_S), so any worker can serve
+    them. Loading the collection record, embedding model, BM25 model and vector names
+    warms this worker's caches only; touching the collection's points warms Qdrant for
+    all. A query that fails is recorded with its error; the others are kept.
+
+    Returns:
+        The cached entry, or None when the workflow has no RAG collection
+    """
+    from .context import assemble_context
+    from .embeddings import get_embed_model
+    from .registry import get_collection_record, resolve_collection
+    from .vector_query import _engine_for, _retrieve
+
+    started = time.perf_counter()
+    with span("rag.prefetch", workflow_id=workflow_id):
+        # Registers a collection from before the registry; an unknown workflow stays unregistered
+        record = await resolve_collection(workflow_id, create=False)
+        if await get_collection_record(workflow_id) is None:
+            logger.info("No RAG collection for workflow %s, nothing to prefetch", workflow_id)
+            return None
+        embed_model = get_embed_model(record["embed_backend"])
+        engine = _engine_for(
+            record,
+            embed_model,
+            sparse_top_k=RAG_PREFETCH_TOP_K,
+            similarity_top_k=RAG_PREFETCH_TOP_K,
+            hybrid_top_k=RAG_PREFETCH_TOP_K,
+        )
+
+        async def run(query: str) -> Dict[str, Any]:
+            try:
+                bundle, nodes = await _retrieve(record, query, embed_model, engine)
+                result: Dict[str, Any] = {
+                    "query": query,
+                    "results": [
+                        {
+                            "text": n.node.get_content(),
+                            "score": n.score,
+                            "document_id": n.node.ref_doc_id,
+                            "metadata": n.node.metadata,
+                        }
+                        for n in nodes
+                    ],
+                }
+                if RAG_PREFETCH_ANSWERS and nodes:
+                    context, _ = assemble_context(nodes)
+                    with span("llm.synthesis"):
+                        result["answer"] = str(await engine.asynthesize(bundle, context))
+                return result
+            except Exception as e:
+                logger.warning("Prefetch of %r for workflow %s failed: %s", query, workflow_id, e)
+                return {"query": query, "results": [], "error": str(e)}
+
+        # The first query loads the models and vector names; the rest then run concurrently
+        answers = []
+        if queries:
+            answers.append(await run(queries[0]))
+            answers.extend(await asyncio.gather(*(run(query) for query in queries[1:])))
+
+    entry = {
+        "call_key": call_key,
+        "workflow_id": workflow_id,
+        "queries": answers,
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+        "prefetched_at": time.time(),
+    }
+    await run_in("io_mongo", _sync_put, entry)
+    logger.info("Prefetched %d queries for %s (workflow %s) in %.0f ms", len(answers), call_key, workflow_id, entry["took_ms"])
+    return entry
+
+
+async def _prefetch_safely(call_key: str, workflow_id: str, queries: List[str]):
+    try:
+        await prefetch_call(call_key, workflow_id, queries)
+    except Exception as e:
+        logger.error(f"Prefetch for {call_key} (workflow {workflow_id}) failed: {e}")
+
+
+def schedule_prefetch(
+    call_key: Optional[str],
+    workflow_id: Optional[str],
+    key_talking_points: Optional[str] = None,
+    objection_responses: Optional[str] = None,
+) -> bool:
+    """
+    Start prefetching for a call in the background when RAG_PREFETCH_ENABLED is set.
+
+    Never raises and never delays the dispatch; returns whether a prefetch was started.
+    """
+    if not RAG_PREFETCH_ENABLED or not call_key or not workflow_id:
+        return False
+    queries = likely_queries(key_talking_points, objection_responses)
+    background_jobs.spawn(_prefetch_safely(call_key, workflow_id, queries), name=f"rag-prefetch:{call_key}")
+    return True
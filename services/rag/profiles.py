@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client import models
+
+from .config import get_rag_config
+from .tenancy import RAG_SHARED_PAYLOAD_M
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Profile for collections created from now on; RAG_COLLECTION_PROFILES (JSON) adds or overrides profiles,
+# e.g. {"large": {"quantization": "binary", "on_disk_vectors": true, "oversampling": 4}}
+RAG_COLLECTION_PROFILE = os.environ.get("RAG_COLLECTION_PROFILE", "default").lower()
+# Qdrant's HNSW defaults, for profiles that do not set their own
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCT = 100
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Storage and index settings of a Qdrant collection."""
+
+    name: str
+    description: str = ""
+    # None (float32 only), "int8" (scalar, 4x smaller) or "binary" (32x smaller, best above ~1000 dims)
+    quantization: Optional[str] = None
+    # Keep the quantized vectors in RAM even when the originals are on disk
+    quantization_always_ram: bool = True
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    # Search-time: re-rank quantized candidates with the original vectors, fetching oversampling x limit
+    rescore: bool = True
+    oversampling: Optional[float] = None
+
+    def quantization_config(self) -> Optional[Any]:
+        if self.quantization == "int8":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=self.quantization_always_ram,
+            ))
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram))
+        return None
+
+    def hnsw_config(self, shared: bool = False) -> models.HnswConfigDiff:
+        """
+        Collection-level HNSW settings.
+
+        A shared collection keeps no global graph (m=0) and builds one per tenant instead,
+        so the profile's `hnsw_m` sets its payload_m (RAG_SHARED_PAYLOAD_M when unset).
+        """
+        ef_construct = self.hnsw_ef_construct or DEFAULT_HNSW_EF_CONSTRUCT
+        if shared:
+            return models.HnswConfigDiff(m=0, payload_m=self.hnsw_m or RAG_SHARED_PAYLOAD_M, ef_construct=ef_construct)
+        return models.HnswConfigDiff(m=self.hnsw_m or DEFAULT_HNSW_M, ef_construct=ef_construct)
+
+    def vector_params(self, size: int) -> models.VectorParams:
+        """Dense vector settings for a new collection; HNSW is set on the collection (see hnsw_config)."""
+        return models.VectorParams(
+            size=size,
+            distance=models.Distance.COSINE,
+            on_disk=self.on_disk_vectors or None,
+        )
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        """Search parameters for a collection with this profile, None when it is not quantized."""
+        if self.quantization is None:
+            return None
+        return models.SearchParams(quantization=models.QuantizationSearchParams(
+            rescore=self.rescore, oversampling=self.oversampling,
+        ))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_BUILTIN_PROFILES = [
+    CollectionProfile("default", "Qdrant defaults: float32 vectors, payload and HNSW graph in RAM"),
+    CollectionProfile(
+        "balanced",
+        "int8 vectors in RAM with float32 originals and payload on disk; about 4x less RAM, rescored",
+        quantization="int8", on_disk_vectors=True, on_disk_payload=True,
+        hnsw_m=16, hnsw_ef_construct=100, oversampling=2.0,
+    ),
+    CollectionProfile(
+        "compact",
+        "Binary vectors in RAM, originals and payload on disk; about 30x less RAM, heavier rescoring",
+        quantization="binary", on_disk_vectors=True, on_disk_payload=True,
+        hnsw_m=16, hnsw_ef_construct=128, oversampling=3.0,
+    ),
+    CollectionProfile(
+        "fast",
+        "int8 and float32 vectors in RAM with a denser graph, for the lowest query latency",
+        quantization="int8", hnsw_m=32, hnsw_ef_construct=256, oversampling=1.5,
+    ),
+]
+
+
+def _load_profiles() -> Dict[str, CollectionProfile]:
+    profiles = {p.name: p for p in _BUILTIN_PROFILES}
+    raw = os.environ.get("RAG_COLLECTION_PROFILES")
+    if raw:
+        allowed = {f.name for f in fields(CollectionProfile)}
+        try:
+            for name, settings in json.loads(raw).items():
+                profiles[name.lower()] = CollectionProfile(
+                    name=name.lower(), **{k: v for k, v in settings.items() if k in allowed and k != "name"}
+                )
+        except Exception as e:
+            logger.error(f"Ignoring invalid RAG_COLLECTION_PROFILES: {str(e)}")
+    return profiles
+
+
+COLLECTION_PROFILES = _load_profiles()
+
+
+def get_profile(name: Optional[str] = None) -> CollectionProfile:
+    """
+    Raises:
+        ValueError: When the profile does not exist
+    """
+    name = (name or RAG_COLLECTION_PROFILE).lower()
+    profile = COLLECTION_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown collection profile '{name}', expected one of: {', '.join(sorted(COLLECTION_PROFILES))}")
+    return profile
+
+
+def profile_of(record: Dict[str, Any]) -> CollectionProfile:
+    """Profile stored in a collection record; records from before profiles, or with a removed profile, get "default"."""
+    try:
+        return get_profile(record.get("profile") or "default")
+    except ValueError as e:
+        logger.warning(f"{record['workflow_id']}: {str(e)}")
+        return COLLECTION_PROFILES["default"]
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    return [p.as_dict() for p in COLLECTION_PROFILES.values()]
+
+
+class ProfiledQdrantVectorStore(QdrantVectorStore):
+    """QdrantVectorStore that creates its collection with a CollectionProfile's settings."""
+
+    def __init__(self, *args: Any, profile: Optional[CollectionProfile] = None, shared: bool = False, **kwargs: Any):
+        profile = profile or get_profile()
+        super().__init__(*args, quantization_config=profile.quantization_config(), **kwargs)
+        self._profile = profile
+        self._shared = shared
+
+    def _collection_settings(self) -> Dict[str, Any]:
+        settings: Dict[str, Any] = {"hnsw_config": self._profile.hnsw_config(self._shared)}
+        if self._profile.on_disk_payload:
+            settings["collection_params"] = models.CollectionParamsDiff(on_disk_payload=True)
+        return settings
+
+    def _create_collection(self, collection_name: str, vector_size: int) -> None:
+        # The vector size is only known once the first batch is embedded, so the profile applies here
+        self._dense_config = self._profile.vector_params(vector_size)
+        super()._create_collection(collection_name, vector_size)
+        self._client.update_collection(collection_name=collection_name, **self._collection_settings())
+        logger.info("Created collection %s with the %s profile", collection_name, self._profile.name)
+
+    async def _acreate_collection(self, collection_name: str, vector_size: int) -> None:
+        self._dense_config = self._profile.vector_params(vector_size)
+        await super()._acreate_collection(collection_name, vector_size)
+        await self._aclient.update_collection(collection_name=collection_name, **self._collection_settings())
+        logger.info("Created collection %s with the %s profile", collection_name, self._profile.name)
+
+
+def sync_apply_profile(collection: str, profile: CollectionProfile, client: Any = None, shared: bool = False):
+    """
+    Apply a profile to an existing collection; `shared` keeps a shared collection's per-tenant HNSW layout.
+
+    Qdrant rebuilds quantized vectors and HNSW graphs in the background; searches keep
+    working meanwhile. A newly set on-disk payload only applies to segments written after it.
+    """
+    client = client or get_rag_config().client
+    params = client.get_collection(collection).config.params
+    # Collections written by llama-index have named vectors ("text-dense"); "" addresses an unnamed one
+    names = list(params.vectors) if isinstance(params.vectors, dict) else [""]
+    hnsw_config = profile.hnsw_config(shared)
+    client.update_collection(
+        collection_name=collection,
+        # Vector-level HNSW overrides the collection's, so it is set to the same values
+        vectors_config={
+            name: models.VectorParamsDiff(on_disk=profile.on_disk_vectors, hnsw_config=hnsw_config)
+            for name in names
+        },
+        hnsw_config=hnsw_config,
+        quantization_config=profile.quantization_config() or models.Disabled.DISABLED,
+        collection_params=models.CollectionParamsDiff(on_disk_payload=profile.on_disk_payload),
+    )
+    logger.info("Applied the %s profile to collection %s", profile.name, collection)
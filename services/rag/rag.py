@@ -1,36 +1,129 @@
 import logging
 
-from .vector_query import query_data as query_vector_db
-from .vector_db import add_data as add_to_vector_db
 from fastapi import APIRouter, Body, HTTPException, File, UploadFile, BackgroundTasks
-from typing import Any,Dict
-from services.data_extraction.extract_data import process_document_extraction
+from typing import Any,Dict,List,Optional
+import hashlib
 import tempfile
 import os
 
+from .models import QueryFilters
+
 logger = logging.getLogger("RAG Router")
 rag_router = APIRouter()
 
+# llama-index, Qdrant and Unstructured are heavy to import; they load on first use
+# (or during the startup prewarm) instead of when the app module is imported.
+async def add_to_vector_db(
+    workflow_id: str,
+    data: Any,
+    embed_backend: Optional[str] = None,
+    collection_profile: Optional[str] = None,
+    document_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    from .vector_db import add_data
+    return await add_data(
+        workflow_id,
+        data,
+        embed_backend=embed_backend,
+        collection_profile=collection_profile,
+        document_id=document_id,
+    )
+
+
+def check_score_threshold(score_threshold: Optional[float]) -> None:
+    """Reject a score threshold the configured query mode cannot apply (400)."""
+    from .hybrid import RAG_QUERY_MODE
+    if score_threshold is not None and RAG_QUERY_MODE != "native":
+        raise HTTPException(
+            status_code=400,
+            detail=f"score_threshold needs RAG_QUERY_MODE=native, this service runs in {RAG_QUERY_MODE} mode",
+        )
+
+
+def document_id_of(data: Any) -> str:
+    from .vector_db import derive_document_id
+    return derive_document_id(data)
+
+
+async def prepare_collection(
+    workflow_id: str,
+    embed_backend: Optional[str] = None,
+    collection_profile: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Register a new collection's embedding backend and profile, or check them, before ingestion is scheduled."""
+    from .registry import EmbeddingMismatchError, resolve_collection
+    try:
+        return await resolve_collection(workflow_id, embed_backend, profile=collection_profile)
+    except EmbeddingMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def query_vector_db(workflow_id: str, query: str, **kwargs: Any) -> Any:
+    from .vector_query import query_data
+    return await query_data(workflow_id, query, **kwargs)
+
+
+async def retrieve_from_vector_db(workflow_id: str, query: str, **kwargs: Any) -> List[Dict[str, Any]]:
+    from .vector_query import retrieve_data
+    return await retrieve_data(workflow_id, query, **kwargs)
+
+
+async def process_document_extraction(file_path: str, **kwargs: Any) -> Any:
+    from services.data_extraction.extract_data import process_document_extraction as extract
+    return await extract(file_path, **kwargs)
+
 # ----------------- Background worker helpers -----------------
-async def _run_add_data_background(workflow_id: str, data: Any):
+async def _run_add_data_background(
+    workflow_id: str,
+    data: Any,
+    embed_backend: Optional[str] = None,
+    collection_profile: Optional[str] = None,
+    document_id: Optional[str] = None,
+):
     """Background task that adds data to the vector database."""
     try:
-        await add_to_vector_db(workflow_id, data)
-        logger.info("Background add_data completed for %s", workflow_id)
+        result = await add_to_vector_db(
+            workflow_id,
+            data,
+            embed_backend=embed_backend,
+            collection_profile=collection_profile,
+            document_id=document_id,
+        )
+        logger.info("Background add_data completed for %s: %s", workflow_id, result)
     except Exception as exc:
         logger.error("Background add_data failed for %s: %s", workflow_id, str(exc))
 
 
-async def _run_extract_add_background(temp_file_path: str, workflow_id: str, collection_name: str):
+async def _run_extract_add_background(
+    temp_file_path: str,
+    workflow_id: str,
+    collection_name: str,
+    embed_backend: Optional[str] = None,
+    collection_profile: Optional[str] = None,
+    document_id: Optional[str] = None,
+    filename: Optional[str] = None,
+):
     """Background task that extracts data then ingests it and cleans up temporary file."""
+    from .elements import elements_to_documents, extraction_elements
     try:
         result = await process_document_extraction(
             temp_file_path,
             collection_name=collection_name,
             workflow_id=workflow_id,
         )
-        await add_to_vector_db(workflow_id, result)
-        logger.info("Background extract+add completed for %s", workflow_id)
+        # Only element text is embedded; the upload's own name replaces the temp file's in the payload
+        elements = extraction_elements(result)
+        data = elements_to_documents(elements, filename=filename) if elements is not None else result
+        ingested = await add_to_vector_db(
+            workflow_id,
+            data,
+            embed_backend=embed_backend,
+            collection_profile=collection_profile,
+            document_id=document_id,
+        )
+        logger.info("Background extract+add completed for %s: %s", workflow_id, ingested)
     except Exception as exc:
         logger.error("Background extract+add failed for %s: %s", workflow_id, str(exc))
     finally:
@@ -45,20 +138,41 @@ async def add_data_endpoint(
     background_tasks: BackgroundTasks,
     workflow_id: str = Body(...),
     data: Any = Body(...),
+    embed_backend: Optional[str] = Body(None),
+    collection_profile: Optional[str] = Body(None),
+    document_id: Optional[str] = Body(None),
 ) -> Dict[str, Any]:
     """
-    Append new data (string, markdown, dict, list, Document, etc.) to the collection without overwriting existing points.
+    Add data (string, markdown, dict, list, Document, etc.) to the collection as one document.
+
+    Sending a document_id again replaces that document: only changed chunks are re-embedded
+    and chunks it no longer contains are removed. Without one, the id is derived from the
+    content, so re-sending identical data adds nothing.
     
     Args:
         workflow_id: The workflow id of the collection
         data: The data to add
+        embed_backend: "gemini" or "fastembed" for a new collection (default RAG_EMBED_BACKEND);
+            an existing collection keeps the backend it was created with
+        collection_profile: Storage profile for a new collection (default RAG_COLLECTION_PROFILE),
+            see /collection-profiles; ignored for an existing collection
+        document_id: Id of the document to add or replace
     """
     try:
+        record = await prepare_collection(workflow_id, embed_backend, collection_profile)
+        # Hashed inline: one sha256 pass over the payload is quicker than waiting for a
+        # vector_index thread behind whole ingests
+        document_id = document_id or document_id_of(data)
         # Schedule background task instead of awaiting directly
-        background_tasks.add_task(_run_add_data_background, workflow_id, data)
+        background_tasks.add_task(
+            _run_add_data_background, workflow_id, data, embed_backend, collection_profile, document_id
+        )
         return {
             "status": "accepted",
             "workflow_id": workflow_id,
+            "document_id": document_id,
+            "embed_model": record["embed_model"],
+            "profile": record.get("profile"),
             "message": "Data ingest scheduled and running in background."
         }
     except HTTPException as he:
@@ -72,9 +186,12 @@ async def query_data_endpoint(
     workflow_id: str = Body(...),
     query: str = Body(...),
     *,
-    sparse_top_k: int = 3,
-    similarity_top_k: int = 3,
-    hybrid_top_k: int = 3,
+    sparse_top_k: Optional[int] = None,
+    similarity_top_k: Optional[int] = None,
+    hybrid_top_k: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    filters: Optional[QueryFilters] = Body(None),
+    context_token_budget: Optional[int] = None,
 ) -> Any:
     """Run a hybrid similarity search over the workflow collection.
 
@@ -84,17 +201,29 @@ async def query_data_endpoint(
         sparse_top_k: Number of sparse results to return
         similarity_top_k: Number of similarity results to return
         hybrid_top_k: Number of hybrid results to return
+            (top-k values left unset come from the workflow's /retrieval-settings, default 3)
+        score_threshold: Minimum dense similarity of a result, applied by Qdrant; only with
+            RAG_QUERY_MODE=native, other modes reject it with a 400
+        filters: Restrict the search by document_ids, source_types, filenames, languages,
+            page range (page_from/page_to) or ingestion time (ingested_after/ingested_before)
+        context_token_budget: Tokens of retrieved context given to the LLM after duplicates
+            are dropped (default RAG_CONTEXT_TOKEN_BUDGET, 0 unlimited)
     
     Returns:
-        Llama-index `Response` containing answer + source nodes.
+        Llama-index `Response` containing answer + source nodes; metadata.context reports
+        the chunks kept and the tokens saved.
     """
+    check_score_threshold(score_threshold)
     try:
         return await query_vector_db(
             workflow_id=workflow_id,
             query=query,
             sparse_top_k=sparse_top_k,
             similarity_top_k=similarity_top_k,
-            hybrid_top_k=hybrid_top_k
+            hybrid_top_k=hybrid_top_k,
+            score_threshold=score_threshold,
+            filters=filters,
+            context_token_budget=context_token_budget,
         )
     except HTTPException as he:
         raise he
@@ -102,12 +231,59 @@ async def query_data_endpoint(
         logger.exception("Failed to query vector DB", exc_info=e)
         raise HTTPException(status_code=500, detail=f"Failed to query data: {str(e)}")
 
+@rag_router.post("/retrieve-data")
+async def retrieve_data_endpoint(
+    workflow_id: str = Body(...),
+    query: str = Body(...),
+    *,
+    sparse_top_k: Optional[int] = None,
+    similarity_top_k: Optional[int] = None,
+    hybrid_top_k: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    filters: Optional[QueryFilters] = Body(None),
+) -> Dict[str, Any]:
+    """Run the /query-data search without LLM synthesis and return the matching chunks.
+
+    Args:
+        workflow_id: The workflow id of the collection
+        query: The search query
+        sparse_top_k: Number of sparse results to return
+        similarity_top_k: Number of similarity results to return
+        hybrid_top_k: Number of hybrid results to return
+            (top-k values left unset come from the workflow's /retrieval-settings, default 3)
+        score_threshold: Minimum dense similarity of a result, see /query-data (RAG_QUERY_MODE=native only)
+        filters: Restrict the search, see /query-data
+
+    Returns:
+        Dict with the workflow_id and its results (text, score, document_id, metadata), best first
+    """
+    check_score_threshold(score_threshold)
+    try:
+        results = await retrieve_from_vector_db(
+            workflow_id=workflow_id,
+            query=query,
+            sparse_top_k=sparse_top_k,
+            similarity_top_k=similarity_top_k,
+            hybrid_top_k=hybrid_top_k,
+            score_threshold=score_threshold,
+            filters=filters,
+        )
+        return {"workflow_id": workflow_id, "results": results}
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.exception("Failed to retrieve from vector DB", exc_info=e)
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve data: {str(e)}")
+
 @rag_router.post("/extract-and-add-data", status_code=202)  # background task
 async def extract_and_add_data(
     background_tasks: BackgroundTasks,
     workflow_id: str = Body(...),
     collection_name: str = Body(...),
     file: UploadFile = File(...),
+    embed_backend: Optional[str] = Body(None),
+    collection_profile: Optional[str] = Body(None),
+    document_id: Optional[str] = Body(None),
 ) -> Dict[str, Any]:
     """
     Extract document data and save to both MongoDB and optionally JSON file.
@@ -116,12 +292,16 @@ async def extract_and_add_data(
         workflow_id: The workflow id of the collection
         collection_name: Name of the collection to save the data to
         file: The file to extract data from
+        embed_backend: Embedding backend for a new collection, see /add-data
+        collection_profile: Storage profile for a new collection, see /add-data
+        document_id: Id of the document to add or replace (default: a digest of the file), see /add-data
     
     Returns:
         Dictionary containing extraction results and save status
     """
     temp_file_path = None
     try:
+        record = await prepare_collection(workflow_id, embed_backend, collection_profile)
         # Create a temporary file to save the uploaded content
         with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{workflow_id}") as temp_file:
             temp_file_path = temp_file.name
@@ -129,6 +309,8 @@ async def extract_and_add_data(
             # Read and write the uploaded file content to the temporary file
             content = await file.read()
             temp_file.write(content)
+        # Re-uploading the same file replaces its chunks instead of adding a second copy
+        document_id = document_id or hashlib.sha256(content).hexdigest()[:32]
         
         # Call the extraction function with correct parameters
         # Schedule background processing task
@@ -137,12 +319,19 @@ async def extract_and_add_data(
             temp_file_path,
             workflow_id,
             collection_name,
+            embed_backend,
+            collection_profile,
+            document_id,
+            file.filename,
         )
         temp_file_path = None  # background function handles cleanup
         return {
             "status": "accepted",
             "workflow_id": workflow_id,
+            "document_id": document_id,
             "collection_name": collection_name,
+            "embed_model": record["embed_model"],
+            "profile": record.get("profile"),
             "message": "Extraction and vector ingest scheduled."
         }
     except HTTPException as he:
@@ -158,3 +347,225 @@ async def extract_and_add_data(
             except Exception as e:
                 logger.warning(f"Failed to clean up temporary file {temp_file_path}: {str(e)}")
 
+
+
+@rag_router.post("/delete-data")
+async def delete_data_endpoint(
+    workflow_id: str = Body(...),
+    document_id: Optional[str] = Body(None),
+) -> Dict[str, Any]:
+    """
+    Delete one document from the workflow collection, or all of the workflow's data.
+
+    Args:
+        workflow_id: The workflow id of the collection
+        document_id: Document to delete (as returned by /add-data); omit it to delete the
+            whole workflow: its collection, or its points in a shared collection, and its record
+    """
+    from .registry import get_collection_record, resolve_collection
+    from .vector_db import delete_data
+
+    try:
+        # Registers a collection from before the registry; an unknown workflow stays unregistered
+        record = await resolve_collection(workflow_id, create=False)
+        if await get_collection_record(workflow_id) is None:
+            raise HTTPException(status_code=404, detail=f"No RAG collection for workflow {workflow_id}")
+        return await delete_data(record, document_id)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.exception("Failed to delete data from vector DB", exc_info=e)
+        raise HTTPException(status_code=500, detail=f"Failed to delete data: {str(e)}")
+
+
+@rag_router.get("/collection-profiles")
+async def list_collection_profiles_endpoint() -> Dict[str, Any]:
+    """Storage profiles a collection can be created with or switched to, and the deployment default."""
+    from .profiles import RAG_COLLECTION_PROFILE, list_profiles
+    return {"default": RAG_COLLECTION_PROFILE, "profiles": list_profiles()}
+
+
+@rag_router.post("/apply-collection-profile")
+async def apply_collection_profile_endpoint(
+    workflow_id: str = Body(...),
+    profile: str = Body(...),
+) -> Dict[str, Any]:
+    """
+    Switch an existing workflow collection to another storage profile.
+
+    Qdrant re-quantizes vectors and rebuilds the HNSW graph in the background, and the
+    collection stays searchable meanwhile. A shared collection (RAG_COLLECTION_LAYOUT=shared)
+    is changed for every workflow stored in it.
+
+    Args:
+        workflow_id: The workflow id of the collection
+        profile: Name of the profile, see /collection-profiles
+    """
+    from utils.executors import run_in
+    from .config import get_rag_config
+    from .profiles import get_profile, sync_apply_profile
+    from .registry import (
+        get_collection_record,
+        resolve_collection,
+        set_collection_profile,
+        update_collection_record,
+    )
+    from .tenancy import collection_of, is_shared
+
+    try:
+        try:
+            target = get_profile(profile)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Registers a collection from before the registry; an unknown workflow stays unregistered
+        record = await resolve_collection(workflow_id, create=False)
+        if await get_collection_record(workflow_id) is None:
+            raise HTTPException(status_code=404, detail=f"No RAG collection for workflow {workflow_id}")
+
+        collection = collection_of(record)
+        # A registered collection without data yet is created with the new profile on first ingest
+        applied = await get_rag_config().aclient.collection_exists(collection)
+        if applied:
+            await run_in("vector_index", sync_apply_profile, collection, target, None, is_shared(record))
+        await set_collection_profile(collection, target.name)
+        await update_collection_record(workflow_id, {"profile": target.name})
+        return {
+            "workflow_id": workflow_id,
+            "collection": collection,
+            "shared": is_shared(record),
+            "profile": target.name,
+            "previous_profile": record.get("profile", "default"),
+            "applied": applied,
+        }
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.exception("Failed to apply collection profile", exc_info=e)
+        raise HTTPException(status_code=500, detail=f"Failed to apply collection profile: {str(e)}")
+
+
+@rag_router.post("/prefetch-context")
+async def prefetch_context_endpoint(
+    call_key: str = Body(...),
+    workflow_id: str = Body(...),
+    queries: Optional[List[str]] = Body(None),
+    key_talking_points: Optional[str] = Body(None),
+    objection_responses: Optional[str] = Body(None),
+) -> Dict[str, Any]:
+    """
+    Warm a workflow's retrieval path and store the results of a call's likely queries.
+
+    Runs the prefetch that outbound dispatches and inbound dispatch rules start on their
+    own when RAG_PREFETCH_ENABLED is set, and waits for it (e.g. to refresh an inbound
+    rule's entry after it expired).
+
+    Args:
+        call_key: Key to store the results under (outbound room name or inbound dispatch rule id)
+        workflow_id: The workflow id of the collection
+        queries: Queries to run; derived from the talking points and objections when omitted
+        key_talking_points: Campaign talking points, one query per line
+        objection_responses: Campaign objections, one "objection: response" per line
+    """
+    from .prefetch import likely_queries, prefetch_call
+
+    try:
+        entry = await prefetch_call(
+            call_key, workflow_id, queries or likely_queries(key_talking_points, objection_responses)
+        )
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"No RAG collection for workflow {workflow_id}")
+        return entry
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.exception("Failed to prefetch context", exc_info=e)
+        raise HTTPException(status_code=500, detail=f"Failed to prefetch context: {str(e)}")
+
+
+@rag_router.get("/prefetched-context/{call_key}")
+async def prefetched_context_endpoint(call_key: str, query: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Results prefetched for a call: one MongoDB lookup, no embedding or search.
+
+    Args:
+        call_key: Outbound room name or inbound dispatch rule id
+        query: Return only this query's results (case-insensitive exact match)
+    """
+    from .prefetch import get_prefetched
+
+    entry = await get_prefetched(call_key)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Nothing prefetched for {call_key}")
+    if query is None:
+        return entry
+    for item in entry["queries"]:
+        if item["query"].lower() == query.strip().lower():
+            return {**entry, "queries": [item]}
+    raise HTTPException(status_code=404, detail=f"Query not prefetched for {call_key}")
+
+
+@rag_router.get("/retrieval-settings/{workflow_id}")
+async def get_retrieval_settings_endpoint(workflow_id: str) -> Dict[str, Any]:
+    """Chunking and top-k settings of a workflow (see /retrieval-settings)."""
+    from .registry import get_collection_record
+    from .retrieval import retrieval_settings_of
+
+    record = await get_collection_record(workflow_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No RAG collection for workflow {workflow_id}")
+    return {"workflow_id": workflow_id, "retrieval": retrieval_settings_of(record).as_dict()}
+
+
+@rag_router.post("/retrieval-settings")
+async def set_retrieval_settings_endpoint(
+    workflow_id: str = Body(...),
+    chunk_size: Optional[int] = Body(None),
+    chunk_overlap: Optional[int] = Body(None),
+    similarity_top_k: Optional[int] = Body(None),
+    sparse_top_k: Optional[int] = Body(None),
+    hybrid_top_k: Optional[int] = Body(None),
+    reset: bool = Body(False),
+) -> Dict[str, Any]:
+    """
+    Set a workflow's chunking and default top-k, e.g. from `python -m services.rag.evaluation` results.
+
+    Registers the collection if it has no data yet. New chunk settings apply to documents
+    ingested afterwards; re-send existing documents to re-chunk them (unchanged chunks are
+    not re-embedded).
+
+    Args:
+        workflow_id: The workflow id of the collection
+        chunk_size: Chunk size in tokens (default: the deployment's node parser)
+        chunk_overlap: Overlap of consecutive chunks in tokens
+        similarity_top_k: Default number of dense candidates of a query
+        sparse_top_k: Default number of sparse candidates of a query
+        hybrid_top_k: Default number of results of a query
+        reset: Start from the defaults instead of the current settings
+    """
+    from .registry import update_collection_record
+    from .retrieval import RetrievalSettings, retrieval_settings_of
+
+    try:
+        record = await prepare_collection(workflow_id)
+        current = RetrievalSettings() if reset else retrieval_settings_of(record)
+        try:
+            settings = current.updated(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                similarity_top_k=similarity_top_k,
+                sparse_top_k=sparse_top_k,
+                hybrid_top_k=hybrid_top_k,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        await update_collection_record(workflow_id, {"retrieval": settings.as_dict()})
+        return {
+            "workflow_id": workflow_id,
+            "retrieval": settings.as_dict(),
+            "previous": retrieval_settings_of(record).as_dict(),
+        }
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.exception("Failed to set retrieval settings", exc_info=e)
+        raise HTTPException(status_code=500, detail=f"Failed to set retrieval settings: {str(e)}")
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+
+from services.livekit_api.mongodb.db import rag_collection_profiles, rag_collections
+from services.livekit_api.mongodb.utils import now_ist_iso
+from utils.executors import run_in
+from .config import get_rag_config
+from .embeddings import get_embed_backend
+from .profiles import get_profile
+from .tenancy import collection_of, layout_fields
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RAG_REGISTRY_CACHE_SIZE = int(os.environ.get("RAG_REGISTRY_CACHE_SIZE", "4096"))
+# Records change when a workflow is migrated to another layout; other workers pick that up after the TTL
+RAG_REGISTRY_CACHE_TTL_S = float(os.environ.get("RAG_REGISTRY_CACHE_TTL_S", "60"))
+# Collections created before the registry existed were all embedded with Gemini
+LEGACY_EMBED_BACKEND = "gemini"
+
+# workflow_id -> collection record
+_records: TTLCache = TTLCache(maxsize=RAG_REGISTRY_CACHE_SIZE, ttl=RAG_REGISTRY_CACHE_TTL_S)
+_cache_lock = threading.Lock()
+# Collections already warned about for a changed model, so the warning is logged once per process
+_drift_warned = set()
+
+
+class EmbeddingMismatchError(ValueError):
+    """Data was sent with a different embedding backend than the collection's vectors."""
+
+
+def _cache_get(workflow_id: str) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        return _records.get(workflow_id)
+
+
+def _cache_put(record: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _records[record["workflow_id"]] = record
+
+
+def _with_collection_profile(record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # The profile belongs to the physical collection, which a shared layout gives several workflows
+    if record is not None:
+        stored = rag_collection_profiles().find_one({"collection": collection_of(record)}, {"_id": 0, "profile": 1})
+        if stored is not None:
+            record["profile"] = stored["profile"]
+    return record
+
+
+def _sync_get_record(workflow_id: str) -> Optional[Dict[str, Any]]:
+    return _with_collection_profile(rag_collections().find_one({"workflow_id": workflow_id}, {"_id": 0}))
+
+
+def _sync_create_record(workflow_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    # The first workflow of a physical collection picks its profile; later tenants get that one
+    rag_collection_profiles().update_one(
+        {"collection": fields["collection"]},
+        {"$setOnInsert": {"profile": fields["profile"], "created_at": now_ist_iso()}},
+        upsert=True,
+    )
+    # Concurrent first ingests race on the upsert; every caller gets the record that won
+    record = rag_collections().find_one_and_update(
+        {"workflow_id": workflow_id},
+        {"$setOnInsert": fields},
+        upsert=True,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    return _with_collection_profile(record)
+
+
+def _sync_update_record(workflow_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    record = rag_collections().find_one_and_update(
+        {"workflow_id": workflow_id},
+        {"$set": fields},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    return _with_collection_profile(record)
+
+
+def _sync_set_collection_profile(collection: str, profile: str) -> None:
+    rag_collection_profiles().update_one(
+        {"collection": collection},
+        {"$set": {"profile": profile, "updated_at": now_ist_iso()}, "$setOnInsert": {"created_at": now_ist_iso()}},
+        upsert=True,
+    )
+
+
+def _sync_delete_record(workflow_id: str) -> bool:
+    record = rag_collections().find_one_and_delete(
+        {"workflow_id": workflow_id}, projection={"workflow_id": 1, "layout": 1, "collection": 1}
+    )
+    if record is None:
+        return False
+    # A per-workflow collection is dropped with its record; a shared one keeps its profile for the other tenants
+    if record.get("layout") != "shared":
+        rag_collection_profiles().delete_one({"collection": collection_of(record)})
+    return True
+
+
+async def get_collection_record(workflow_id: str) -> Optional[Dict[str, Any]]:
+    """Stored settings of a workflow collection (embedding model, layout, Qdrant collection), or None."""
+    record = _cache_get(workflow_id)
+    if record is None:
+        record = await run_in("io_mongo", _sync_get_record, workflow_id)
+        if record is not None:
+            _cache_put(record)
+    return record
+
+
+async def resolve_collection(
+    workflow_id: str,
+    embed_backend: Optional[str] = None,
+    create: bool = True,
+    profile: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Settings of a workflow collection, registering them the first time data is added.
+
+    A new collection takes `embed_backend` (or RAG_EMBED_BACKEND) and keeps it: its vectors
+    can only be searched with the model that produced them. Its storage profile (`profile`
+    or RAG_COLLECTION_PROFILE) is likewise fixed at creation; use /apply-collection-profile
+    to change it later.
+
+    Args:
+        workflow_id: The workflow id of the collection
+        embed_backend: Backend requested by the caller, None for the collection's own
+        create: Store the record for a new collection; False only resolves it (queries).
+            Legacy collections are registered either way
+        profile: Collection profile for a new collection, ignored for an existing one
+
+    Returns:
+        Dict with workflow_id, embed_backend, embed_model, layout, collection, profile and created_at
+
+    Raises:
+        ValueError: When the backend or profile is unknown
+        EmbeddingMismatchError: When the collection was created with another backend
+    """
+    requested = get_embed_backend(embed_backend) if embed_backend else None
+    requested_profile = get_profile(profile)
+    record = await get_collection_record(workflow_id)
+    if record is None:
+        # A workflow collection without a record was created before the registry existed
+        exists = await get_rag_config().aclient.collection_exists(workflow_id)
+        backend = get_embed_backend(LEGACY_EMBED_BACKEND) if exists else (requested or get_embed_backend())
+        fields = {
+            "workflow_id": workflow_id,
+            "embed_backend": backend.name,
+            "embed_model": backend.model_id,
+            **layout_fields(workflow_id, backend.name, "per_workflow" if exists else None),
+            # Existing collections were created with Qdrant's defaults
+            "profile": "default" if exists else requested_profile.name,
+            "created_at": now_ist_iso(),
+        }
+        # A legacy collection's settings are known, so it is registered on first sight, even
+        # by a query; a collection that does not exist yet is left to its first ingest
+        if not create and not exists:
+            return fields
+        record = await run_in("io_mongo", _sync_create_record, workflow_id, fields)
+        _cache_put(record)
+        logger.info("Registered RAG collection %s with %s embeddings", workflow_id, record["embed_model"])
+
+    if requested is not None and requested.name != record["embed_backend"]:
+        raise EmbeddingMismatchError(
+            f"Workflow {workflow_id} is indexed with {record['embed_model']}, not {requested.model_id}"
+        )
+    current = get_embed_backend(record["embed_backend"])
+    if current.model_id != record["embed_model"] and workflow_id not in _drift_warned:
+        _drift_warned.add(workflow_id)
+        logger.warning(
+            "Collection %s was embedded with %s but the %s backend now uses %s",
+            workflow_id, record["embed_model"], current.name, current.model_id,
+        )
+    return record
+
+
+async def update_collection_record(workflow_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Change a stored record (e.g. after a layout migration) and refresh this process's cache."""
+    record = await run_in("io_mongo", _sync_update_record, workflow_id, {**fields, "updated_at": now_ist_iso()})
+    if record is not None:
+        _cache_put(record)
+    return record
+
+
+async def set_collection_profile(collection: str, profile: str) -> None:
+    """
+    Record the profile applied to a physical collection, for every workflow stored in it.
+
+    This process's cached records of those workflows are dropped; other workers pick the
+    profile up after the cache TTL.
+    """
+    await run_in("io_mongo", _sync_set_collection_profile, collection, profile)
+    with _cache_lock:
+        for workflow_id in [k for k, record in _records.items() if collection_of(record) == collection]:
+            _records.pop(workflow_id, None)
+
+
+async def delete_collection_record(workflow_id: str) -> bool:
+    """Forget a workflow collection, so its next ingest registers it afresh. Other workers drop it after the cache TTL."""
+    with _cache_lock:
+        _records.pop(workflow_id, None)
+    return await run_in("io_mongo", _sync_delete_record, workflow_id)
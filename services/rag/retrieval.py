@@ -0,0 +1,88 @@
+import logging
+import threading
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Dict, Optional, Tuple
+
+from llama_index.core import Settings
+from llama_index.core.node_parser import SentenceSplitter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 3
+
+# (chunk_size, chunk_overlap) -> parser, shared by every workflow using those settings
+_parsers: Dict[Tuple[int, int], SentenceSplitter] = {}
+_parsers_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RetrievalSettings:
+    """
+    Per-workflow chunking and query settings, stored as "retrieval" in the collection record.
+
+    Chunk settings left unset use the deployment's node parser (Settings.node_parser).
+    New chunk settings apply to documents ingested afterwards; re-send existing documents
+    to re-chunk them. Top-k values are the defaults of requests that do not pass their own.
+    """
+
+    chunk_size: Optional[int] = None
+    chunk_overlap: Optional[int] = None
+    similarity_top_k: int = DEFAULT_TOP_K
+    sparse_top_k: int = DEFAULT_TOP_K
+    hybrid_top_k: int = DEFAULT_TOP_K
+
+    def __post_init__(self):
+        for name in ("chunk_size", "similarity_top_k", "sparse_top_k", "hybrid_top_k"):
+            value = getattr(self, name)
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if self.chunk_overlap is not None:
+            if self.chunk_size is None:
+                raise ValueError("chunk_overlap needs a chunk_size")
+            if not 0 <= self.chunk_overlap < self.chunk_size:
+                raise ValueError(f"chunk_overlap must be between 0 and chunk_size, got {self.chunk_overlap}")
+
+    def node_parser(self) -> Any:
+        if self.chunk_size is None:
+            return Settings.node_parser
+        key = (self.chunk_size, self.chunk_overlap if self.chunk_overlap is not None else 0)
+        parser = _parsers.get(key)
+        if parser is None:
+            with _parsers_lock:
+                parser = _parsers.get(key)
+                if parser is None:
+                    # Same splitting as the deployment default (services.rag.config), at another size
+                    parser = SentenceSplitter(chunk_size=key[0], chunk_overlap=key[1], separator="\n\n")
+                    _parsers[key] = parser
+        return parser
+
+    def top_k(
+        self,
+        similarity_top_k: Optional[int] = None,
+        sparse_top_k: Optional[int] = None,
+        hybrid_top_k: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Top-k arguments of a query: the ones passed, else these settings'."""
+        return {
+            "similarity_top_k": similarity_top_k or self.similarity_top_k,
+            "sparse_top_k": sparse_top_k or self.sparse_top_k,
+            "hybrid_top_k": hybrid_top_k or self.hybrid_top_k,
+        }
+
+    def updated(self, **changes: Any) -> "RetrievalSettings":
+        """Copy with the given fields changed; None values are ignored."""
+        return replace(self, **{k: v for k, v in changes.items() if v is not None})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def retrieval_settings_of(record: Optional[Dict[str, Any]]) -> RetrievalSettings:
+    """Retrieval settings of a collection record; unknown or invalid stored values fall back to the defaults."""
+    stored = (record or {}).get("retrieval") or {}
+    known = {f.name for f in fields(RetrievalSettings)}
+    try:
+        return RetrievalSettings(**{k: v for k, v in stored.items() if k in known})
+    except (TypeError, ValueError) as e:
+        logger.warning("Invalid retrieval settings for %s, using defaults: %s", (record or {}).get("workflow_id"), e)
+        return RetrievalSettings()
@@ -0,0 +1,72 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from utils.executors import get_cpu_pool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# FastEmbed sparse model used for the hybrid (BM25) half of the index
+SPARSE_MODEL = os.environ.get("RAG_SPARSE_MODEL", "Qdrant/bm25")
+SPARSE_BATCH_SIZE = int(os.environ.get("RAG_SPARSE_BATCH_SIZE", "256"))
+
+BatchSparseEncoding = Tuple[List[List[int]], List[List[float]]]
+
+# One loaded model per process (API workers and CPU pool children alike)
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+
+def _get_model(model_name: str):
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from fastembed.sparse.sparse_text_embedding import SparseTextEmbedding
+                model = SparseTextEmbedding(model_name)
+                _models[model_name] = model
+    return model
+
+
+def encode_sparse(model_name: str, texts: List[str]) -> BatchSparseEncoding:
+    """Encode texts into sparse vectors; module-level so the CPU process pool can run it."""
+    if not texts:
+        return [], []
+    embeddings = _get_model(model_name).embed(texts, batch_size=SPARSE_BATCH_SIZE)
+    indices, values = zip(*[(e.indices.tolist(), e.values.tolist()) for e in embeddings])
+    return list(indices), list(values)
+
+
+def sparse_doc_encoder(model_name: str = SPARSE_MODEL):
+    """
+    Document encoder for QdrantVectorStore.
+
+    Indexing runs in the vector_index thread pool, which blocks on the CPU process pool
+    here so BM25 tokenization of large batches does not hold the GIL in the API worker.
+    """
+    def encode(texts: List[str]) -> BatchSparseEncoding:
+        pool = get_cpu_pool()
+        if pool is None:
+            return encode_sparse(model_name, texts)
+        return pool.submit(encode_sparse, model_name, list(texts)).result()
+
+    return encode
+
+
+def sparse_query_encoder(model_name: str = SPARSE_MODEL):
+    """Query encoder; a single short query is cheaper to encode in-process than to ship to a child."""
+    def encode(texts: List[str]) -> BatchSparseEncoding:
+        return encode_sparse(model_name, texts)
+
+    return encode
+
+
+def warm_sparse_model(model_name: str = SPARSE_MODEL):
+    """Load the sparse model in this process ahead of the first hybrid query."""
+    encode_sparse(model_name, ["warm-up"])
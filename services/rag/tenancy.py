@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from llama_index.core import Document
+from qdrant_client import models
+
+from .config import get_rag_config
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "per_workflow" gives every workflow its own Qdrant collection (one HNSW graph each);
+# "shared" stores new workflows as tenants of a few shared collections, filtered by workflow_id.
+# Only applies when a workflow is first registered; existing workflows keep their layout.
+RAG_COLLECTION_LAYOUT = os.environ.get("RAG_COLLECTION_LAYOUT", "per_workflow").lower()
+RAG_SHARED_COLLECTION_PREFIX = os.environ.get("RAG_SHARED_COLLECTION_PREFIX", "nexus_rag")
+RAG_SHARED_SHARDS = max(1, int(os.environ.get("RAG_SHARED_SHARDS", "1")))
+# HNSW links built per tenant (payload_m) instead of one global graph (m=0), as Qdrant
+# recommends for collections that are always searched with a tenant filter
+RAG_SHARED_PAYLOAD_M = int(os.environ.get("RAG_SHARED_PAYLOAD_M", "16"))
+
+LAYOUTS = ("per_workflow", "shared")
+TENANT_KEY = "workflow_id"
+
+# Shared collections whose tenant index is known to exist in this process
+_tenant_indexed = set()
+_tenant_lock = threading.Lock()
+
+
+def shared_collection_name(workflow_id: str, embed_backend: str, shards: int = RAG_SHARED_SHARDS) -> str:
+    """
+    Shared collection a new workflow is placed in, e.g. `nexus_rag_gemini_00`.
+
+    Collections are per embedding backend since their vector sizes differ. The shard is
+    stored in the workflow's record, so changing RAG_SHARED_SHARDS only affects new workflows.
+    """
+    shard = zlib.crc32(workflow_id.encode("utf-8")) % shards
+    return f"{RAG_SHARED_COLLECTION_PREFIX}_{embed_backend}_{shard:02d}"
+
+
+def layout_fields(workflow_id: str, embed_backend: str, layout: Optional[str] = None) -> Dict[str, str]:
+    """Registry fields placing a new workflow according to `layout` (default RAG_COLLECTION_LAYOUT)."""
+    layout = (layout or RAG_COLLECTION_LAYOUT).lower()
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown collection layout '{layout}', expected one of: {', '.join(LAYOUTS)}")
+    if layout == "shared":
+        return {"layout": layout, "collection": shared_collection_name(workflow_id, embed_backend)}
+    return {"layout": layout, "collection": workflow_id}
+
+
+def collection_of(record: Dict[str, Any]) -> str:
+    """Physical Qdrant collection of a workflow; records from before layouts used the workflow id."""
+    return record.get("collection") or record["workflow_id"]
+
+
+def is_shared(record: Dict[str, Any]) -> bool:
+    return record.get("layout") == "shared"
+
+
+def tenant_condition(record: Dict[str, Any]) -> Optional[models.FieldCondition]:
+    """Qdrant condition restricting a search or deletion to the workflow's points, None for a per-workflow collection."""
+    if not is_shared(record):
+        return None
+    return models.FieldCondition(key=TENANT_KEY, match=models.MatchValue(value=record["workflow_id"]))
+
+
+def tag_documents(documents: List[Document], record: Dict[str, Any]) -> List[Document]:
+    """Stamp documents with their tenant so every upserted point carries it in its payload."""
+    if not is_shared(record):
+        return documents
+    for document in documents:
+        document.metadata[TENANT_KEY] = record["workflow_id"]
+        # Stored for filtering only; it must not change the embedded or prompted text
+        if TENANT_KEY not in document.excluded_embed_metadata_keys:
+            document.excluded_embed_metadata_keys.append(TENANT_KEY)
+        if TENANT_KEY not in document.excluded_llm_metadata_keys:
+            document.excluded_llm_metadata_keys.append(TENANT_KEY)
+    return documents
+
+
+def forget(collection: str) -> None:
+    """Drop what this process knows about a deleted collection, so a re-created one gets its tenant index."""
+    with _tenant_lock:
+        _tenant_indexed.discard(collection)
+
+
+def sync_ensure_tenant_index(collection: str, client: Any = None, hnsw_config: Optional[models.HnswConfigDiff] = None):
+    """
+    Create the `workflow_id` tenant index and per-tenant HNSW settings on a shared collection.
+
+    Idempotent on the server, and skipped once done in this process. Call after the
+    collection exists (it is created by the first upsert). `hnsw_config` is the collection
+    profile's shared HNSW settings, m=0 with RAG_SHARED_PAYLOAD_M by default.
+    """
+    if collection in _tenant_indexed:
+        return
+    client = client or get_rag_config().client
+    with _tenant_lock:
+        if collection in _tenant_indexed:
+            return
+        client.create_payload_index(
+            collection_name=collection,
+            field_name=TENANT_KEY,
+            field_schema=models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+        )
+        client.update_collection(
+            collection_name=collection,
+            hnsw_config=hnsw_config or models.HnswConfigDiff(m=0, payload_m=RAG_SHARED_PAYLOAD_M),
+        )
+        _tenant_indexed.add(collection)
+        logger.info("Tenant index on %s.%s ensured", collection, TENANT_KEY)
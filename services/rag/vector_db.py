@@ -1,4 +1,6 @@
-import os, asyncio, json
+import hashlib
+import os, json
+import uuid
 import qdrant_client
 from llama_index.core import VectorStoreIndex
 from llama_index.core import StorageContext
@@ -7,36 +9,57 @@ from llama_index.core import Settings
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader
 from llama_index.core import QueryBundle
 from llama_index.core import VectorStoreIndex, Document
-from .config import RagConfig
-import nest_asyncio
-from typing import Any, List
+from llama_index.core.schema import BaseNode, MetadataMode, NodeRelationship
+from qdrant_client import models
+from services.livekit_api.mongodb.utils import now_ist_iso
+from utils.executors import run_in
+from utils.telemetry import span
+from .config import get_rag_config
+from .elements import elements_to_documents, extraction_elements
+from . import filters, hybrid, tenancy
+from .filters import DOC_ID_KEY, sync_ensure_filter_indexes
+from .embeddings import get_embed_model
+from .profiles import CollectionProfile, ProfiledQdrantVectorStore, profile_of
+from .registry import delete_collection_record, resolve_collection
+from .retrieval import retrieval_settings_of
+from .tenancy import collection_of, is_shared, sync_ensure_tenant_index, tag_documents, tenant_condition
+from .sparse import SPARSE_MODEL, sparse_doc_encoder, sparse_query_encoder
+from typing import Any, Dict, List, Optional, Set
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-nest_asyncio.apply()
+# Namespace of the deterministic point IDs (uuid5 of workflow, document and chunk content)
+POINT_ID_NAMESPACE = uuid.UUID("8f7d3c2a-5b1e-4e6f-9a0d-2c4b6e8f1a3d")
+SCROLL_BATCH = 1024
 
-# Qdrant clients (sync / async)
-client = RagConfig().client
-aclient = RagConfig().aclient
 
-def _get_vector_store(workflow_id: str) -> QdrantVectorStore:
+def _get_vector_store(
+    collection_name: str, profile: Optional[CollectionProfile] = None, shared: bool = False
+) -> QdrantVectorStore:
     """
     Return a QdrantVectorStore bound to a specific collection.
 
     Args:
-        workflow_id: The workflow id of the collection
+        collection_name: The Qdrant collection (the workflow id, or a shared collection)
+        profile: Storage settings used if the store has to create the collection
+        shared: Whether the collection is shared by several workflows (per-tenant HNSW)
     
     Returns:
         QdrantVectorStore object
     """
-    return QdrantVectorStore(
-        client=client,
-        aclient=aclient,
-        collection_name=workflow_id,
+    config = get_rag_config()
+    return ProfiledQdrantVectorStore(
+        client=config.client,
+        aclient=config.aclient,
+        collection_name=collection_name,
         enable_hybrid=True,
-        fastembed_sparse_model="Qdrant/bm25",
+        fastembed_sparse_model=SPARSE_MODEL,
+        sparse_doc_fn=sparse_doc_encoder(),
+        sparse_query_fn=sparse_query_encoder(),
+        profile=profile,
+        shared=shared,
     )
 
 
@@ -59,6 +82,11 @@ def _normalize_to_documents(input_data: Any) -> List[Document]:
     if isinstance(input_data, Document):
         return [input_data]
 
+    # Unstructured extraction output -> text chunks grouped by section, without the JSON around it
+    elements = extraction_elements(input_data)
+    if elements is not None:
+        return elements_to_documents(elements)
+
     # Iterable -> flatten
     if isinstance(input_data, (list, tuple, set)):
         for item in input_data:
@@ -78,25 +106,199 @@ def _normalize_to_documents(input_data: Any) -> List[Document]:
     docs.append(Document(text=str(input_data)))
     return docs
 
-async def add_data(workflow_id: str, data: Any) -> None:
+def derive_document_id(data: Any) -> str:
+    """Document id of data sent without one: a digest of its content, so re-sending it is a no-op."""
+    digest = hashlib.sha256()
+    for document in _normalize_to_documents(data):
+        digest.update(document.get_content(metadata_mode=MetadataMode.ALL).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def _point_id(workflow_id: str, document_id: str, content: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{workflow_id}:{document_id}:{digest}"))
+
+
+def _chunk(documents: List[Document], workflow_id: str, document_id: str, node_parser: Any = None) -> List[BaseNode]:
+    """
+    Split documents into nodes (with `node_parser`, default Settings.node_parser) whose IDs are derived from their content.
+
+    An unchanged chunk keeps its point ID across re-ingests, so it is neither embedded
+    nor written again; identical chunks within a document collapse into one point.
+    """
+    node_parser = node_parser or Settings.node_parser
+    nodes: List[BaseNode] = []
+    for document in documents:
+        document.id_ = document_id
+        # One at a time: the parser maps nodes back to their document by id, which is shared here
+        nodes.extend(node_parser.get_nodes_from_documents([document]))
+
+    ids = {
+        node.node_id: _point_id(workflow_id, document_id, node.get_content(metadata_mode=MetadataMode.ALL))
+        for node in nodes
+    }
+    unique: Dict[str, BaseNode] = {}
+    for node in nodes:
+        for relation in (NodeRelationship.PREVIOUS, NodeRelationship.NEXT):
+            related = node.relationships.get(relation)
+            if related is not None and related.node_id in ids:
+                related.node_id = ids[related.node_id]
+        node.id_ = ids[node.node_id]
+        unique.setdefault(node.node_id, node)
+    return list(unique.values())
+
+
+def _document_filter(record: Dict[str, Any], document_id: Optional[str] = None) -> models.Filter:
+    """Points of one document of a workflow (or, without document_id, all of a shared-collection tenant's)."""
+    conditions = []
+    if document_id is not None:
+        conditions.append(models.FieldCondition(key=DOC_ID_KEY, match=models.MatchValue(value=document_id)))
+    tenant = tenant_condition(record)
+    if tenant is not None:
+        conditions.append(tenant)
+    return models.Filter(must=conditions)
+
+
+def _sync_point_ids(collection: str, point_filter: models.Filter) -> Set[str]:
+    client = get_rag_config().client
+    if not client.collection_exists(collection):
+        return set()
+    ids: Set[str] = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            scroll_filter=point_filter,
+            limit=SCROLL_BATCH,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        ids.update(str(point.id) for point in points)
+        if offset is None:
+            return ids
+
+
+async def add_data(
+    workflow_id: str,
+    data: Any,
+    embed_backend: Optional[str] = None,
+    collection_profile: Optional[str] = None,
+    document_id: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Append new data (string, markdown, dict, list, Document, etc.) to the collection without overwriting existing points.
+    Add data (string, markdown, dict, list, Document, etc.) to the collection as one document, replacing its previous version.
+
+    Only chunks that are new or changed since the document was last ingested are embedded
+    and written; chunks it no longer contains are deleted afterwards, so searches never
+    see the document missing. Other documents are left untouched. Chunking follows the
+    workflow's retrieval settings (see services.rag.retrieval).
     
     Args:
         workflow_id: The workflow id of the collection
         data: The data to add
-    """
-    vector_store = _get_vector_store(workflow_id)
+        embed_backend: Embedding backend for a new collection; an existing one keeps its own
+        collection_profile: Storage profile for a new collection (see services.rag.profiles)
+        document_id: Id of the document to add or replace (default: derived from the content)
 
+    Returns:
+        Dict with document_id and the number of chunks, of chunks embedded, unchanged and removed
+    """
     documents = _normalize_to_documents(data)
+    document_id = document_id or derive_document_id(data)
+    result = {"document_id": document_id, "chunks": 0, "embedded": 0, "unchanged": 0, "removed": 0}
     if not documents:
-        return
-
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: VectorStoreIndex.from_documents(
-            documents,
-            storage_context=StorageContext.from_defaults(vector_store=vector_store),
-        ),
-    )
\ No newline at end of file
+        return result
+
+    record = await resolve_collection(workflow_id, embed_backend, profile=collection_profile)
+    embed_model = get_embed_model(record["embed_backend"])
+    collection = collection_of(record)
+    profile = profile_of(record)
+    vector_store = _get_vector_store(collection, profile, is_shared(record))
+    node_parser = retrieval_settings_of(record).node_parser()
+    # In a shared collection every point carries its workflow_id for tenant filtering
+    documents = tag_documents(documents, record)
+    document_filter = _document_filter(record, document_id)
+
+    def _index():
+        nodes = _chunk(documents, workflow_id, document_id, node_parser)
+        existing = _sync_point_ids(collection, document_filter)
+        new_nodes = [node for node in nodes if node.node_id not in existing]
+        ingested_at = now_ist_iso()
+        for node in new_nodes:
+            # Set after the point IDs are derived, so unchanged chunks keep their ID and date
+            node.metadata["ingested_at"] = ingested_at
+            for excluded in (node.excluded_embed_metadata_keys, node.excluded_llm_metadata_keys):
+                if "ingested_at" not in excluded:
+                    excluded.append("ingested_at")
+        if new_nodes:
+            VectorStoreIndex(
+                nodes=new_nodes,
+                storage_context=StorageContext.from_defaults(vector_store=vector_store),
+                embed_model=embed_model,
+            )
+            sync_ensure_filter_indexes(collection)
+            if is_shared(record):
+                sync_ensure_tenant_index(collection, hnsw_config=profile.hnsw_config(shared=True))
+
+        current = [node.node_id for node in nodes]
+        stale = existing.difference(current)
+        if stale:
+            get_rag_config().client.delete(
+                collection_name=collection,
+                points_selector=models.FilterSelector(filter=models.Filter(
+                    must=document_filter.must,
+                    must_not=[models.HasIdCondition(has_id=current)],
+                )),
+            )
+        result.update(chunks=len(nodes), embedded=len(new_nodes), unchanged=len(nodes) - len(new_nodes), removed=len(stale))
+
+    with span("qdrant.index", collection=collection, documents=len(documents), embed_model=record["embed_model"]):
+        await run_in("vector_index", _index)
+    return result
+
+
+async def delete_data(record: Dict[str, Any], document_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Delete one document of a workflow, or all of its data.
+
+    Deleting a whole workflow drops its own collection, or its points in a shared one,
+    and its registry record, so the next ingest starts a new collection.
+
+    Args:
+        record: The workflow's collection record
+        document_id: Document to delete; None deletes the workflow's data
+
+    Returns:
+        Dict with workflow_id, document_id, deleted_points and collection_deleted
+    """
+    workflow_id = record["workflow_id"]
+    collection = collection_of(record)
+    client = get_rag_config().client
+    drop_collection = document_id is None and not is_shared(record)
+    point_filter = _document_filter(record, document_id)
+
+    def _delete() -> int:
+        if not client.collection_exists(collection):
+            return 0
+        count = client.count(collection_name=collection, count_filter=point_filter, exact=True).count
+        if drop_collection:
+            client.delete_collection(collection)
+            # A re-ingest creates the collection afresh, which needs its indexes again
+            for module in (filters, hybrid, tenancy):
+                module.forget(collection)
+        elif count:
+            client.delete(collection_name=collection, points_selector=models.FilterSelector(filter=point_filter))
+        return count
+
+    with span("qdrant.delete", collection=collection, document_id=document_id or "*"):
+        deleted = await run_in("vector_index", _delete)
+    if document_id is None:
+        await delete_collection_record(workflow_id)
+    return {
+        "workflow_id": workflow_id,
+        "document_id": document_id,
+        "deleted_points": deleted,
+        "collection_deleted": drop_collection,
+    }
@@ -1,24 +1,35 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Optional
+import logging
+from typing import Any, Dict, List, Optional
 
-import nest_asyncio
-from llama_index.core import StorageContext, VectorStoreIndex, Settings
+from llama_index.core import QueryBundle, StorageContext, VectorStoreIndex, Settings
+from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client import models
 
-from .config import RagConfig
+from utils.telemetry import span
+from .config import get_rag_config
+from .context import assemble_context
+from .embeddings import get_embed_model
+from .filters import build_query_filter
+from .models import QueryFilters
+from .hybrid import RAG_HYBRID_FUSION, RAG_QUERY_MODE, QdrantHybridRetriever
+from .profiles import profile_of
+from .registry import resolve_collection
+from .retrieval import retrieval_settings_of
+from .tenancy import collection_of
+from .sparse import SPARSE_MODEL, sparse_doc_encoder, sparse_query_encoder
 
-nest_asyncio.apply()
-
-# Shared Qdrant clients (sync + async)
-client = RagConfig().client
-aclient = RagConfig().aclient
+logger = logging.getLogger(__name__)
 
 
 def _build_query_engine(
-    workflow_id: str,
+    collection_name: str,
     *,
+    embed_model: Any = None,
+    query_filter: Optional[models.Filter] = None,
     sparse_top_k: int = 3,
     similarity_top_k: int = 3,
     hybrid_top_k: int = 3,
@@ -27,7 +38,9 @@ def _build_query_engine(
     Create and return a llama-index QueryEngine for a given collection.
     
     Args:
-        workflow_id: The workflow id of the collection
+        collection_name: The Qdrant collection (the workflow id, or a shared collection)
+        embed_model: Embedding model the collection was indexed with (default Settings.embed_model)
+        query_filter: Qdrant filter applied to the dense and sparse searches (tenant and query filters)
         sparse_top_k: Number of sparse results to return
         similarity_top_k: Number of similarity results to return
         hybrid_top_k: Number of hybrid results to return
@@ -35,17 +48,21 @@ def _build_query_engine(
     Returns:
         llama-index QueryEngine object
     """
+    config = get_rag_config()
     vector_store = QdrantVectorStore(
-        client=client,
-        aclient=aclient,
-        collection_name=workflow_id,
+        client=config.client,
+        aclient=config.aclient,
+        collection_name=collection_name,
         enable_hybrid=True,
-        fastembed_sparse_model="Qdrant/bm25",
+        fastembed_sparse_model=SPARSE_MODEL,
+        sparse_doc_fn=sparse_doc_encoder(),
+        sparse_query_fn=sparse_query_encoder(),
     )
 
     index = VectorStoreIndex.from_vector_store(
         vector_store=vector_store,
         storage_context=StorageContext.from_defaults(vector_store=vector_store),
+        embed_model=embed_model or Settings.embed_model,
     )
 
     return index.as_query_engine(
@@ -54,17 +71,113 @@ def _build_query_engine(
         sparse_top_k=sparse_top_k,
         similarity_top_k=similarity_top_k,
         hybrid_top_k=hybrid_top_k,
+        # Passed through to QdrantVectorStore.query, where it replaces MetadataFilters
+        vector_store_kwargs={"qdrant_filters": query_filter} if query_filter is not None else {},
         llm=Settings.llm,
     )
 
 
-async def query_data(
-    workflow_id: str,
-    query: str,
+def _build_native_query_engine(
+    collection_name: str,
+    *,
+    embed_model: Any = None,
+    query_filter: Optional[models.Filter] = None,
+    search_params: Optional[models.SearchParams] = None,
+    score_threshold: Optional[float] = None,
+    sparse_top_k: int = 3,
+    similarity_top_k: int = 3,
+    hybrid_top_k: int = 3,
+) -> Any:
+    """
+    Create a QueryEngine whose retrieval is one server-side fused Qdrant query (see services.rag.hybrid).
+
+    Args:
+        collection_name: The Qdrant collection (the workflow id, or a shared collection)
+        embed_model: Embedding model the collection was indexed with (default Settings.embed_model)
+        query_filter: Qdrant filter applied to both searches (the tenant filter in a shared collection)
+        search_params: Dense search params from the collection profile
+        score_threshold: Minimum dense similarity of a candidate
+        sparse_top_k: Number of sparse results to return
+        similarity_top_k: Number of similarity results to return
+        hybrid_top_k: Number of hybrid results to return
+
+    Returns:
+        llama-index QueryEngine object
+    """
+    retriever = QdrantHybridRetriever(
+        collection_name,
+        embed_model=embed_model,
+        query_filter=query_filter,
+        search_params=search_params,
+        similarity_top_k=similarity_top_k,
+        sparse_top_k=sparse_top_k,
+        hybrid_top_k=hybrid_top_k,
+        score_threshold=score_threshold,
+        fusion=RAG_HYBRID_FUSION,
+    )
+    return RetrieverQueryEngine.from_args(retriever, llm=Settings.llm, use_async=True)
+
+
+def _engine_for(
+    record: Dict[str, Any],
+    embed_model: Any,
     *,
+    filters: Optional[QueryFilters] = None,
     sparse_top_k: int = 3,
     similarity_top_k: int = 3,
     hybrid_top_k: int = 3,
+    score_threshold: Optional[float] = None,
+) -> Any:
+    """
+    QueryEngine over a workflow's collection for RAG_QUERY_MODE, restricted to its points and `filters`.
+
+    Raises:
+        ValueError: When a score_threshold is given outside RAG_QUERY_MODE=native, which cannot apply it
+    """
+    collection = collection_of(record)
+    query_filter = build_query_filter(record, filters)
+    if RAG_QUERY_MODE == "native":
+        return _build_native_query_engine(
+            collection,
+            embed_model=embed_model,
+            query_filter=query_filter,
+            search_params=profile_of(record).search_params(),
+            score_threshold=score_threshold,
+            sparse_top_k=sparse_top_k,
+            similarity_top_k=similarity_top_k,
+            hybrid_top_k=hybrid_top_k,
+        )
+    if score_threshold is not None:
+        raise ValueError(f"score_threshold needs RAG_QUERY_MODE=native, not {RAG_QUERY_MODE}")
+    return _build_query_engine(
+        collection,
+        embed_model=embed_model,
+        query_filter=query_filter,
+        sparse_top_k=sparse_top_k,
+        similarity_top_k=similarity_top_k,
+        hybrid_top_k=hybrid_top_k,
+    )
+
+
+async def _retrieve(record: Dict[str, Any], query: str, embed_model: Any, query_engine: Any):
+    with span("embedding.query", embed_model=record["embed_model"]):
+        embedding = await embed_model.aget_query_embedding(query)
+    bundle = QueryBundle(query_str=query, embedding=embedding)
+    with span("qdrant.search", collection=collection_of(record)):
+        nodes = await query_engine.aretrieve(bundle)
+    return bundle, nodes
+
+
+async def query_data(
+    workflow_id: str,
+    query: str,
+    *,
+    sparse_top_k: Optional[int] = None,
+    similarity_top_k: Optional[int] = None,
+    hybrid_top_k: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    filters: Optional[QueryFilters] = None,
+    context_token_budget: Optional[int] = None,
 ) -> Any:
     """Run a hybrid similarity search over the workflow collection.
 
@@ -74,16 +187,73 @@ async def query_data(
         sparse_top_k: Number of sparse results to return
         similarity_top_k: Number of similarity results to return
         hybrid_top_k: Number of hybrid results to return
+            (top-k values left unset come from the workflow's retrieval settings)
+        score_threshold: Minimum dense similarity of a result (RAG_QUERY_MODE=native only)
+        filters: Restrict the search to matching documents, pages, languages, etc.
+        context_token_budget: Tokens of context given to the LLM (default RAG_CONTEXT_TOKEN_BUDGET, 0 unlimited)
     
     Returns:
-        Llama-index `Response` containing answer + source nodes.
+        Llama-index `Response` containing answer + source nodes, with the context assembly
+        report (see services.rag.context) under metadata["context"].
     """
-    query_engine = _build_query_engine(
-        workflow_id,
-        sparse_top_k=sparse_top_k,
-        similarity_top_k=similarity_top_k,
-        hybrid_top_k=hybrid_top_k,
+    # Queries must be embedded with the model that produced the collection's vectors
+    record = await resolve_collection(workflow_id, create=False)
+    embed_model = get_embed_model(record["embed_backend"])
+    query_engine = _engine_for(
+        record,
+        embed_model,
+        filters=filters,
+        score_threshold=score_threshold,
+        **retrieval_settings_of(record).top_k(similarity_top_k, sparse_top_k, hybrid_top_k),
     )
 
-    return await query_engine.aquery(query)
+    # The engine's steps are run one by one so embedding, search and synthesis are timed separately
+    with span("rag.query", workflow_id=workflow_id):
+        bundle, nodes = await _retrieve(record, query, embed_model, query_engine)
+        with span("rag.context"):
+            nodes, report = assemble_context(nodes, token_budget=context_token_budget)
+        logger.info(
+            "Context for %s: %d of %d chunks, %d tokens (%d saved)",
+            workflow_id, report.kept, report.retrieved, report.tokens_out, report.tokens_saved,
+        )
+        with span("llm.synthesis"):
+            response = await query_engine.asynthesize(bundle, nodes)
+    response.metadata = {**(response.metadata or {}), "context": report.as_dict()}
+    return response
+
 
+async def retrieve_data(
+    workflow_id: str,
+    query: str,
+    *,
+    sparse_top_k: Optional[int] = None,
+    similarity_top_k: Optional[int] = None,
+    hybrid_top_k: Optional[int] = None,
+    score_threshold: Optional[float] = None,
+    filters: Optional[QueryFilters] = None,
+) -> List[Dict[str, Any]]:
+    """Hybrid search over the workflow collection without LLM synthesis; arguments as for query_data.
+
+    Returns:
+        List of dicts with text, score, document_id and metadata, best first
+    """
+    record = await resolve_collection(workflow_id, create=False)
+    embed_model = get_embed_model(record["embed_backend"])
+    query_engine = _engine_for(
+        record,
+        embed_model,
+        filters=filters,
+        score_threshold=score_threshold,
+        **retrieval_settings_of(record).top_k(similarity_top_k, sparse_top_k, hybrid_top_k),
+    )
+    with span("rag.retrieve", workflow_id=workflow_id):
+        _, nodes = await _retrieve(record, query, embed_model, query_engine)
+    return [
+        {
+            "text": n.node.get_content(),
+            "score": n.score,
+            "document_id": n.node.ref_doc_id,
+            "metadata": n.node.metadata,
+        }
+        for n in nodes
+    ]
@@ -1,40 +1,55 @@
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt, stop_after_delay, wait_exponential
 import pybreaker
 from pydantic_ai.usage import UsageLimits
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 import asyncio
+from contextlib import AsyncExitStack
 from functools import lru_cache
 
+from .agent_runtime import agent_runtime, agent_key
+from .telemetry import span
+from .agent_policy import (
+    agent_policy,
+    is_retryable,
+    model_key,
+    AGENT_DEADLINE_S,
+    AGENT_BREAKER_FAIL_MAX,
+    AGENT_BREAKER_RESET_TIMEOUT,
+)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Default configuration
 DEFAULT_CONFIG = {
-    "retry_attempts": 20,
-    "retry_multiplier": 1,
-    "retry_max": 40,
-    "circuit_fail_max": 20,
-    "circuit_reset_timeout": 60
+    "retry_attempts": 4,
+    "retry_multiplier": 0.5,
+    "retry_max": 8,
+    "circuit_fail_max": AGENT_BREAKER_FAIL_MAX,
+    "circuit_reset_timeout": AGENT_BREAKER_RESET_TIMEOUT,
+    "deadline": AGENT_DEADLINE_S,
 }
 
-# Circuit breaker configuration
-AGENT_BREAKER = pybreaker.CircuitBreaker(
-    fail_max=DEFAULT_CONFIG["circuit_fail_max"], 
-    reset_timeout=DEFAULT_CONFIG["circuit_reset_timeout"],
-    name="agent_circuit",
-    exclude=[KeyboardInterrupt, asyncio.CancelledError]
-)
+
+class AgentDeadlineExceeded(TimeoutError):
+    """Raised when an agent request runs out of its overall time budget."""
+
 
 @lru_cache(maxsize=128)
-def get_configured_retry(attempts: int = None, multiplier: int = None, max_wait: int = None):
+def get_configured_retry(attempts: int = None, multiplier: float = None, max_wait: float = None, deadline: float = None):
     """
     Create a retry decorator with configurable parameters.
+
+    Only retryable errors (rate limits, 5xx, timeouts, connection errors, invalid
+    model output) are retried, and no new attempt starts once `deadline` has passed.
     
     Args:
         attempts: Maximum number of retry attempts
         multiplier: Base multiplier for exponential backoff
         max_wait: Maximum wait time between retries
+        deadline: Seconds after which no further attempt is made
         
     Returns:
         Configured retry decorator
@@ -42,69 +57,203 @@ def get_configured_retry(attempts: int = None, multiplier: int = None, max_wait:
     attempts = attempts or DEFAULT_CONFIG["retry_attempts"]
     multiplier = multiplier or DEFAULT_CONFIG["retry_multiplier"]
     max_wait = max_wait or DEFAULT_CONFIG["retry_max"]
+
+    stop = stop_after_attempt(attempts)
+    if deadline:
+        stop = stop | stop_after_delay(deadline)
     
     return retry(
-        stop=stop_after_attempt(attempts),
+        stop=stop,
         wait=wait_exponential(multiplier=multiplier, max=max_wait),
+        retry=retry_if_exception(is_retryable),
         reraise=True,
         before_sleep=lambda retry_state: logger.info(
             f"Retrying agent execution: attempt {retry_state.attempt_number} after {retry_state.outcome.exception()}"
         )
     )
 
+
+async def _run_model(agent, prompt: str, model, usage_limits: UsageLimits, breaker: pybreaker.CircuitBreaker) -> Any:
+    """One run against one model, reporting its outcome to that model's breaker and latency window."""
+    key = breaker.name
+    counters = agent_policy.counters(key)
+    counters.attempts += 1
+    kwargs = {"model": model} if model is not None else {}
+    limiter = agent_policy.rate_limiter(model if model is not None else agent.model)
+    if limiter is not None:
+        await limiter.acquire()
+    start = time.perf_counter()
+    try:
+        with span("llm.agent_run", agent=agent_key(agent), model=key):
+            response = await agent_runtime.run(agent, prompt, usage_limits=usage_limits, **kwargs)
+    except Exception as e:
+        counters.failures += 1
+        if is_retryable(e):
+            agent_policy.breakers.record_failure(breaker, e)
+        else:
+            counters.non_retryable += 1
+        raise
+    agent_policy.latency.observe(key, time.perf_counter() - start)
+    agent_policy.breakers.record_success(breaker)
+    return response
+
+
+async def _hedged(primary: asyncio.Future, hedge_after: float, start_hedge) -> Tuple[Any, bool]:
+    """
+    Return (result, hedge_won): the primary result, or the first success of a race
+    against a hedge started after `hedge_after` seconds.
+    """
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result(), False
+
+    hedge = start_hedge()
+    if hedge is None:
+        return await primary, False
+
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task is hedge
+        # Both failed: surface the primary model's error
+        raise primary.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _attempt(agent, prompt: str, usage_limits: UsageLimits, fallback_model, circuit_config: Dict[str, int]) -> Any:
+    """
+    A single attempt: the primary model guarded by its breaker, failing over to the
+    fallback model while the breaker is open and hedging to it when the primary is slow.
+    """
+    fail_max = circuit_config.get("fail_max")
+    reset_timeout = circuit_config.get("reset_timeout")
+    breakers = agent_policy.breakers
+
+    primary_key = model_key(agent.model)
+    primary_breaker = breakers.get(primary_key, fail_max, reset_timeout)
+    fallback_breaker = None
+    if fallback_model is not None:
+        fallback_breaker = breakers.get(model_key(fallback_model), fail_max, reset_timeout)
+
+    counters = agent_policy.counters(primary_key)
+    if not breakers.allow(primary_breaker):
+        counters.breaker_rejections += 1
+        if fallback_breaker is not None and breakers.allow(fallback_breaker):
+            counters.failovers += 1
+            logger.warning(f"Circuit breaker for {primary_key} open, failing over to {fallback_breaker.name}")
+            return await _run_model(agent, prompt, fallback_model, usage_limits, fallback_breaker)
+        raise pybreaker.CircuitBreakerError(f"Circuit breaker for {primary_key} is open")
+
+    primary = asyncio.ensure_future(_run_model(agent, prompt, None, usage_limits, primary_breaker))
+    hedge_after = agent_policy.hedge_delay(primary_key)
+    if fallback_breaker is None or hedge_after is None:
+        return await primary
+
+    def start_hedge():
+        if not breakers.allow(fallback_breaker):
+            return None
+        counters.hedges += 1
+        logger.info(f"{primary_key} slower than {hedge_after:.2f}s, hedging to {fallback_breaker.name}")
+        return asyncio.ensure_future(_run_model(agent, prompt, fallback_model, usage_limits, fallback_breaker))
+
+    try:
+        result, hedge_won = await _hedged(primary, hedge_after, start_hedge)
+    finally:
+        if not primary.done():
+            primary.cancel()
+    if hedge_won:
+        counters.hedge_wins += 1
+    return result
+
+
 async def execute_agent_with_retries(
     agent,
     prompt: str,
     retry_config: Optional[Dict[str, int]] = None,
-    usage_limits: Optional[UsageLimits] = None
+    usage_limits: Optional[UsageLimits] = None,
+    circuit_config: Optional[Dict[str, int]] = None,
+    fallback_model: Any = None
 ) -> Any:
     """
     Execute an agent with retry capabilities.
+
+    Runs go through the shared agent runtime, so MCP servers are started once per
+    process instead of for every attempt. Each attempt goes through the model's
+    shared circuit breaker and, when `fallback_model` is given, is hedged to it once
+    the primary model is slower than its usual latency. The whole call, retries
+    included, is bounded by `retry_config["deadline"]` seconds.
     
     Args:
         agent: The agent to execute
         prompt: The prompt to send to the agent
-        retry_config: Optional configuration for retries
+        retry_config: Optional configuration for retries (attempts, multiplier, max_wait, deadline)
         usage_limits: Optional usage limits
+        circuit_config: Optional configuration for the per-model circuit breakers
+        fallback_model: Optional model used for hedged requests and while the primary breaker is open
         
     Returns:
         The agent response
     
     Raises:
+        AgentDeadlineExceeded: When the deadline passes before a successful run
+        pybreaker.CircuitBreakerError: When the model's circuit is open and there is no usable fallback
         Exception: Any exception raised by the agent after all retries are exhausted
     """
     retry_config = retry_config or {}
+    deadline = retry_config.get("deadline", DEFAULT_CONFIG["deadline"])
     retry_decorator = get_configured_retry(
         retry_config.get("attempts"),
         retry_config.get("multiplier"),
-        retry_config.get("max_wait")
+        retry_config.get("max_wait"),
+        deadline
     )
+    usage_limits = usage_limits or UsageLimits(request_limit=None)
+    primary_key = model_key(agent.model)
+    attempt = 0
     
     @retry_decorator
     async def _execute():
+        nonlocal attempt
+        attempt += 1
+        if attempt > 1:
+            agent_policy.counters(primary_key).retries += 1
         try:
             logger.debug(f"Executing agent with prompt: {prompt[:50]}...")
-            async with agent.run_mcp_servers():
-                agent_response = await agent.run(
-                    prompt, 
-                    usage_limits=usage_limits or UsageLimits(request_limit=None)
-                )
-            return agent_response
+            return await _attempt(agent, prompt, usage_limits, fallback_model, circuit_config or {})
         except Exception as e:
             logger.error(f"Agent execution failed: {str(e)}")
             raise
-    
-    return await _execute()
+
+    if not deadline:
+        return await _execute()
+
+    start = time.monotonic()
+    try:
+        return await asyncio.wait_for(_execute(), timeout=deadline)
+    except asyncio.TimeoutError:
+        if time.monotonic() - start < deadline:
+            raise
+        agent_policy.counters(primary_key).deadline_exceeded += 1
+        raise AgentDeadlineExceeded(f"Agent execution exceeded its {deadline:g}s deadline after {attempt} attempt(s)")
 
 async def execute_agent_safely(
     agent,
     prompt: str,
     retry_config: Optional[Dict[str, int]] = None,
     circuit_config: Optional[Dict[str, int]] = None,
-    usage_limits: Optional[UsageLimits] = None
+    usage_limits: Optional[UsageLimits] = None,
+    fallback_model: Any = None
 ) -> Any:
     """
     Execute an agent with both circuit breaker and retry capabilities.
+
+    Circuit breakers are kept per model/provider and shared across requests;
+    `circuit_config` (fail_max, reset_timeout) tunes them.
     
     Args:
         agent: The agent to execute
@@ -112,34 +261,97 @@ async def execute_agent_safely(
         retry_config: Optional configuration for retries
         circuit_config: Optional configuration for the circuit breaker
         usage_limits: Optional usage limits
+        fallback_model: Optional model for hedging and failover
         
     Returns:
         The agent response
         
     Raises:
         pybreaker.CircuitBreakerError: When the circuit is open
+        AgentDeadlineExceeded: When the deadline passes
         Exception: Any exception raised by the agent after all retries are exhausted
     """
-    # Apply custom circuit breaker if configured
-    if circuit_config:
-        circuit_breaker = pybreaker.CircuitBreaker(
-            fail_max=circuit_config.get("fail_max", DEFAULT_CONFIG["circuit_fail_max"]),
-            reset_timeout=circuit_config.get("reset_timeout", DEFAULT_CONFIG["circuit_reset_timeout"]),
-            name="custom_agent_circuit",
-            exclude=[KeyboardInterrupt, asyncio.CancelledError]
-        )
-    else:
-        circuit_breaker = AGENT_BREAKER
-        
     try:
-        @circuit_breaker
-        async def _execute_with_circuit_breaker():
-            return await execute_agent_with_retries(agent, prompt, retry_config, usage_limits)
-            
-        return await _execute_with_circuit_breaker()
+        return await execute_agent_with_retries(
+            agent,
+            prompt,
+            retry_config,
+            usage_limits,
+            circuit_config=circuit_config,
+            fallback_model=fallback_model
+        )
     except pybreaker.CircuitBreakerError:
         logger.critical("Agent circuit breaker open - too many failures")
         raise
     except Exception as e:
         logger.error(f"Agent execution failed after retries: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def stream_agent_safely(
+    agent,
+    prompt: str,
+    usage_limits: Optional[UsageLimits] = None,
+    debounce_by: Optional[float] = 0.1,
+    deadline: Optional[float] = None
+) -> AsyncIterator[Any]:
+    """
+    Stream partially validated agent outputs as the model produces them.
+
+    The run goes through the model's shared circuit breaker like `execute_agent_safely`,
+    but is neither retried nor hedged: output already sent to the caller cannot be replayed.
+    The last item yielded is the fully validated output. The run is bounded by `deadline`
+    seconds (AGENT_DEADLINE_S by default); time the caller spends between items counts too.
+
+    Raises:
+        pybreaker.CircuitBreakerError: When the model's circuit is open
+        AgentDeadlineExceeded: When the deadline passes before the stream completes
+        Exception: Any exception raised by the agent
+    """
+    key = model_key(agent.model)
+    breaker = agent_policy.breakers.get(key)
+    counters = agent_policy.counters(key)
+    if not agent_policy.breakers.allow(breaker):
+        counters.breaker_rejections += 1
+        logger.critical("Agent circuit breaker open - too many failures")
+        raise pybreaker.CircuitBreakerError(f"Circuit breaker for {key} is open")
+
+    if deadline is None:
+        deadline = DEFAULT_CONFIG["deadline"]
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + deadline if deadline else None
+
+    counters.attempts += 1
+    limiter = agent_policy.rate_limiter(agent.model)
+    try:
+        # The timeout only wraps awaits inside this generator, never a yield, so it cannot
+        # fire while the caller is running between items
+        async with AsyncExitStack() as stack:
+            async with asyncio.timeout_at(expires):
+                if limiter is not None:
+                    await limiter.acquire()
+                result = await stack.enter_async_context(agent_runtime.run_stream(
+                    agent,
+                    prompt,
+                    usage_limits=usage_limits or UsageLimits(request_limit=None)
+                ))
+            outputs = result.stream(debounce_by=debounce_by).__aiter__()
+            while True:
+                try:
+                    async with asyncio.timeout_at(expires):
+                        output = await outputs.__anext__()
+                except StopAsyncIteration:
+                    break
+                yield output
+    except Exception as e:
+        if isinstance(e, TimeoutError) and expires is not None and loop.time() >= expires:
+            counters.deadline_exceeded += 1
+            raise AgentDeadlineExceeded(f"Streamed agent execution exceeded its {deadline:g}s deadline") from e
+        counters.failures += 1
+        if is_retryable(e):
+            agent_policy.breakers.record_failure(breaker, e)
+        else:
+            counters.non_retryable += 1
+        logger.error(f"Streamed agent execution failed: {str(e)}")
+        raise
+    agent_policy.breakers.record_success(breaker)
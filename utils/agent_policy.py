@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+import pybreaker
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Overall time budget for one agent request, retries and hedges included
+AGENT_DEADLINE_S = float(os.environ.get("AGENT_DEADLINE_S", "120"))
+# Per-model circuit breaker
+AGENT_BREAKER_FAIL_MAX = int(os.environ.get("AGENT_BREAKER_FAIL_MAX", "5"))
+AGENT_BREAKER_RESET_TIMEOUT = float(os.environ.get("AGENT_BREAKER_RESET_TIMEOUT", "30"))
+# Start a hedged request to the fallback model once the primary is slower than this latency percentile
+AGENT_HEDGE_PERCENTILE = float(os.environ.get("AGENT_HEDGE_PERCENTILE", "0.95"))
+AGENT_HEDGE_MIN_SAMPLES = int(os.environ.get("AGENT_HEDGE_MIN_SAMPLES", "20"))
+AGENT_LATENCY_WINDOW = int(os.environ.get("AGENT_LATENCY_WINDOW", "200"))
+# Requests per minute per provider (0 = unlimited); AGENT_RATE_LIMIT_RPM_<PROVIDER> overrides per provider
+AGENT_RATE_LIMIT_RPM = float(os.environ.get("AGENT_RATE_LIMIT_RPM", "0"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient provider failures are worth another attempt; bad requests and limits are not."""
+    # Imported here so loading the policy (e.g. for /agent-metrics) does not pull in the model SDKs
+    import httpx
+    import openai
+    from pydantic_ai.exceptions import ModelHTTPError, UnexpectedModelBehavior
+
+    if isinstance(exc, ModelHTTPError):
+        return exc.status_code in RETRYABLE_STATUS_CODES or exc.status_code >= 500
+    if isinstance(exc, UnexpectedModelBehavior):
+        return True
+    if isinstance(exc, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    return isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError))
+
+
+def provider_key(model: Any) -> str:
+    """
+    Provider a model is served by, e.g. `openrouter`; rate limits are shared per provider.
+
+    `model.system` names the API flavour, not the provider (an OpenAIModel served by
+    OpenRouter reports "openai"), so the provider comes from the model's provider object
+    or, failing that, from its base URL's domain (openrouter.ai -> openrouter).
+    """
+    if isinstance(model, str):
+        return model.split(":", 1)[0] if ":" in model else "default"
+    provider = getattr(model, "_provider", None)
+    if getattr(provider, "name", None):
+        return provider.name
+    base_url = getattr(model, "base_url", None)
+    if base_url:
+        host = urlparse(str(base_url)).hostname or ""
+        labels = host.split(".")
+        if len(labels) >= 2:
+            return labels[-2]
+    return getattr(model, "system", None) or "default"
+
+
+def model_key(model: Any) -> str:
+    """Breaker and latency key for a model, e.g. `openrouter:meta-llama/llama-4-scout`."""
+    if model is None:
+        return "default"
+    if isinstance(model, str):
+        return model
+    name = getattr(model, "model_name", None) or type(model).__name__
+    provider = provider_key(model)
+    return f"{provider}:{name}" if provider != "default" else name
+
+
+class BreakerRegistry:
+    """
+    One circuit breaker per model/provider, shared by every request in the process.
+
+    pybreaker only guards sync callables, so the open/half-open gate is checked
+    before an async run and the outcome is reported afterwards.
+    """
+
+    def __init__(self, fail_max: int = AGENT_BREAKER_FAIL_MAX, reset_timeout: float = AGENT_BREAKER_RESET_TIMEOUT):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, pybreaker.CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, fail_max: Optional[int] = None, reset_timeout: Optional[float] = None) -> pybreaker.CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = pybreaker.CircuitBreaker(
+                    fail_max=fail_max or self.fail_max,
+                    reset_timeout=reset_timeout or self.reset_timeout,
+                    name=key,
+                )
+                self._breakers[key] = breaker
+            else:
+                if fail_max:
+                    breaker.fail_max = fail_max
+                if reset_timeout:
+                    breaker.reset_timeout = reset_timeout
+            return breaker
+
+    @staticmethod
+    def allow(breaker: pybreaker.CircuitBreaker) -> bool:
+        """False while the breaker is open; moves it to half-open once the reset timeout has elapsed."""
+        if breaker.current_state != pybreaker.STATE_OPEN:
+            return True
+        opened_at = breaker._state_storage.opened_at
+        if opened_at and datetime.now(timezone.utc) < opened_at + timedelta(seconds=breaker.reset_timeout):
+            return False
+        breaker.half_open()
+        return True
+
+    @staticmethod
+    def record_success(breaker: pybreaker.CircuitBreaker):
+        try:
+            breaker.call(lambda: None)
+        except pybreaker.CircuitBreakerError:
+            # Another request re-opened it meanwhile
+            pass
+
+    @staticmethod
+    def record_failure(breaker: pybreaker.CircuitBreaker, exc: BaseException):
+        def _fail():
+            raise exc
+
+        try:
+            breaker.call(_fail)
+        except pybreaker.CircuitBreakerError:
+            logger.critical(f"Circuit breaker for {breaker.name} opened after {breaker.fail_max} failures")
+        except BaseException:
+            pass
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {
+            key: {"state": breaker.current_state, "fail_counter": breaker.fail_counter}
+            for key, breaker in breakers
+        }
+
+
+class LatencyTracker:
+    """Sliding window of successful run latencies per model."""
+
+    def __init__(self, window: int = AGENT_LATENCY_WINDOW, min_samples: int = AGENT_HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, key: str, latency_s: float):
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(latency_s)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        """Latency at quantile `q`, or None until enough samples have been seen."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class RateLimiter:
+    """Async token bucket allowing `rpm` requests per minute with bursts of up to `burst`."""
+
+    def __init__(self, rpm: float, burst: Optional[float] = None):
+        self.rate = rpm / 60.0
+        self.capacity = burst or max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self.throttled = 0
+        self.waited_s = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        start = None
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                if start is not None:
+                    self.throttled += 1
+                    self.waited_s += time.monotonic() - start
+                return
+            if start is None:
+                start = time.monotonic()
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rpm": self.rate * 60.0,
+            "throttled": self.throttled,
+            "waited_s": round(self.waited_s, 3),
+        }
+
+
+@dataclass
+class PolicyMetrics:
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0
+    non_retryable: int = 0
+    breaker_rejections: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    deadline_exceeded: int = 0
+
+
+class AgentPolicy:
+    """Shared breakers, latency windows and counters used by utils.agent_execution."""
+
+    def __init__(self):
+        self.breakers = BreakerRegistry()
+        self.latency = LatencyTracker()
+        self._metrics: Dict[str, PolicyMetrics] = {}
+        self._limiters: Dict[str, Optional[RateLimiter]] = {}
+
+    def counters(self, key: str) -> PolicyMetrics:
+        return self._metrics.setdefault(key, PolicyMetrics())
+
+    def rate_limiter(self, model: Any) -> Optional[RateLimiter]:
+        """The provider's shared request bucket, or None when the provider is not rate limited."""
+        provider = provider_key(model)
+        if provider not in self._limiters:
+            env_key = "AGENT_RATE_LIMIT_RPM_" + "".join(c if c.isalnum() else "_" for c in provider.upper())
+            rpm = float(os.environ.get(env_key, AGENT_RATE_LIMIT_RPM))
+            self._limiters[provider] = RateLimiter(rpm) if rpm > 0 else None
+        return self._limiters[provider]
+
+    def rate_limits(self) -> Dict[str, Dict[str, Any]]:
+        return {provider: limiter.as_dict() for provider, limiter in self._limiters.items() if limiter is not None}
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        return self.latency.percentile(key, AGENT_HEDGE_PERCENTILE)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        breakers = self.breakers.states()
+        keys = set(self._metrics) | set(breakers)
+        result = {}
+        for key in sorted(keys):
+            data = asdict(self._metrics.get(key, PolicyMetrics()))
+            data["breaker"] = breakers.get(key)
+            data["latency_p50_s"] = self.latency.percentile(key, 0.5)
+            data["latency_p95_s"] = self.latency.percentile(key, 0.95)
+            data["hedge_after_s"] = self.hedge_delay(key)
+            result[key] = data
+        return result
+
+
+# Shared policy state used by utils.agent_execution
+agent_policy = AgentPolicy()
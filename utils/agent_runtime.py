@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds an agent's MCP servers stay up with no active runs; 0 keeps them for the process lifetime
+AGENT_RUNTIME_IDLE_TIMEOUT = float(os.environ.get("AGENT_RUNTIME_IDLE_TIMEOUT", "0"))
+
+
+def agent_key(agent) -> str:
+    """Stable metrics key for an agent."""
+    return getattr(agent, "name", None) or f"agent-{id(agent)}"
+
+
+@dataclass
+class AgentRunMetrics:
+    runs: int = 0
+    failures: int = 0
+    total_latency_s: float = 0.0
+    max_latency_s: float = 0.0
+    last_latency_s: float = 0.0
+    requests: int = 0
+    request_tokens: int = 0
+    response_tokens: int = 0
+    total_tokens: int = 0
+
+    def record(self, latency_s: float, usage: Any = None, failed: bool = False):
+        self.runs += 1
+        if failed:
+            self.failures += 1
+        self.total_latency_s += latency_s
+        self.last_latency_s = latency_s
+        self.max_latency_s = max(self.max_latency_s, latency_s)
+        if usage is not None:
+            self.requests += getattr(usage, "requests", 0) or 0
+            self.request_tokens += getattr(usage, "request_tokens", 0) or 0
+            self.response_tokens += getattr(usage, "response_tokens", 0) or 0
+            self.total_tokens += getattr(usage, "total_tokens", 0) or 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["avg_latency_s"] = self.total_latency_s / self.runs if self.runs else 0.0
+        return data
+
+
+class _AgentContext:
+    """
+    Keeps an agent's toolsets (MCP servers) entered for as long as it is in use.
+
+    MCP clients are built on anyio task groups, which must be entered and exited
+    from the same task, so the context lives in a dedicated holder task.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.refcount = 0
+        self.last_release = time.monotonic()
+        self.loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._hold(), name=f"agent-runtime:{agent_key(self.agent)}")
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _hold(self):
+        try:
+            async with self.agent:
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            logger.error(f"Agent runtime for {agent_key(self.agent)} failed: {str(e)}")
+            self._error = e
+            self._ready.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+
+
+class AgentRuntimeManager:
+    """
+    Process-wide owner of agent runtimes.
+
+    The first run of an agent starts its MCP servers; later runs reuse them.
+    Active runs are reference-counted so idle runtimes can be released, and
+    every run records latency and token usage per agent.
+    """
+
+    def __init__(self, idle_timeout: float = AGENT_RUNTIME_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._contexts: Dict[int, _AgentContext] = {}
+        self._metrics: Dict[str, AgentRunMetrics] = {}
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def _acquire(self, agent) -> _AgentContext:
+        ctx = self._contexts.get(id(agent))
+        if ctx is None or not ctx.alive or ctx.loop is not asyncio.get_running_loop():
+            if self._start_lock is None:
+                self._start_lock = asyncio.Lock()
+            async with self._start_lock:
+                ctx = self._contexts.get(id(agent))
+                if ctx is None or not ctx.alive or ctx.loop is not asyncio.get_running_loop():
+                    ctx = _AgentContext(agent)
+                    await ctx.start()
+                    self._contexts[id(agent)] = ctx
+                    logger.info(f"Started agent runtime for {agent_key(agent)}")
+        ctx.refcount += 1
+        return ctx
+
+    def _release(self, ctx: _AgentContext):
+        ctx.refcount -= 1
+        if ctx.refcount == 0:
+            ctx.last_release = time.monotonic()
+            if self.idle_timeout > 0:
+                ctx.loop.call_later(self.idle_timeout, self._stop_if_idle, ctx)
+
+    def _stop_if_idle(self, ctx: _AgentContext):
+        if ctx.refcount == 0 and time.monotonic() - ctx.last_release >= self.idle_timeout:
+            if self._contexts.get(id(ctx.agent)) is ctx:
+                del self._contexts[id(ctx.agent)]
+            asyncio.ensure_future(ctx.stop())
+            logger.info(f"Stopped idle agent runtime for {agent_key(ctx.agent)}")
+
+    @asynccontextmanager
+    async def session(self, agent) -> AsyncIterator[None]:
+        """Hold a reference to the agent's running MCP servers for the duration of the block."""
+        ctx = await self._acquire(agent)
+        try:
+            yield
+        finally:
+            self._release(ctx)
+
+    def record(self, agent, latency_s: float, usage: Any = None, failed: bool = False):
+        self._metrics.setdefault(agent_key(agent), AgentRunMetrics()).record(latency_s, usage, failed)
+
+    async def run(self, agent, prompt: str, **kwargs) -> Any:
+        """Run the agent on its shared runtime and record latency and token usage."""
+        async with self.session(agent):
+            start = time.perf_counter()
+            try:
+                response = await agent.run(prompt, **kwargs)
+            except Exception:
+                self.record(agent, time.perf_counter() - start, failed=True)
+                raise
+            self.record(agent, time.perf_counter() - start, response.usage())
+            return response
+
+    @asynccontextmanager
+    async def run_stream(self, agent, prompt: str, **kwargs) -> AsyncIterator[Any]:
+        """Streamed counterpart of `run`; latency and usage are recorded when the stream closes."""
+        async with self.session(agent):
+            start = time.perf_counter()
+            try:
+                async with agent.run_stream(prompt, **kwargs) as result:
+                    yield result
+            except Exception:
+                self.record(agent, time.perf_counter() - start, failed=True)
+                raise
+            self.record(agent, time.perf_counter() - start, result.usage())
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: m.as_dict() for name, m in self._metrics.items()}
+
+    async def aclose(self):
+        """Stop every agent runtime; call on application shutdown."""
+        contexts, self._contexts = list(self._contexts.values()), {}
+        for ctx in contexts:
+            if ctx.loop is asyncio.get_running_loop():
+                await ctx.stop()
+
+
+# Shared manager used by utils.agent_execution
+agent_runtime = AgentRuntimeManager()
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+from typing import Any, Coroutine, Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds shutdown waits for running jobs before cancelling them; keep it below the
+# server's graceful shutdown timeout so cancelled jobs still get to flush their results
+SHUTDOWN_DRAIN_TIMEOUT_S = float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT_S", "20"))
+# Seconds cancelled jobs get to run their cleanup (e.g. a final bulk write)
+SHUTDOWN_CANCEL_GRACE_S = float(os.environ.get("SHUTDOWN_CANCEL_GRACE_S", "5"))
+
+
+class BackgroundJobs:
+    """
+    Long-running tasks started by requests that outlive the response (e.g. bulk jobs).
+
+    Tasks spawned here are drained from the app lifespan on shutdown instead of being
+    destroyed with the event loop.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, coro: Coroutine[Any, Any, Any], name: Optional[str] = None) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def running(self) -> int:
+        return sum(1 for task in self._tasks if not task.done())
+
+    async def drain(self, timeout: float = SHUTDOWN_DRAIN_TIMEOUT_S) -> Dict[str, int]:
+        """Wait up to `timeout` seconds for running jobs, then cancel the rest."""
+        tasks = [task for task in self._tasks if not task.done()]
+        if not tasks:
+            return {"completed": 0, "cancelled": 0}
+        logger.info("Draining %d background jobs (timeout %.0fs)", len(tasks), timeout)
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Cancelled %d background jobs still running at shutdown", len(pending))
+            await asyncio.wait(pending, timeout=SHUTDOWN_CANCEL_GRACE_S)
+        return {"completed": len(done), "cancelled": len(pending)}
+
+
+# Shared registry used by the routers and drained by the app lifespan
+background_jobs = BackgroundJobs()
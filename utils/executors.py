@@ -0,0 +1,223 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Thread pools by workload, so slow extraction or indexing cannot starve quick Mongo calls.
+# Sized by EXECUTOR_<NAME>_WORKERS, e.g. EXECUTOR_IO_MONGO_WORKERS=32
+EXECUTOR_DEFAULTS = {
+    "io_mongo": 16,
+    "extraction_http": 8,
+    "vector_index": 4,
+    "embedding": 4,
+}
+# Process pool for CPU-bound work (BM25 sparse encoding, local dense embeddings); 0 runs that work in the calling thread
+EXECUTOR_CPU_WORKERS = int(os.environ.get("EXECUTOR_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXECUTOR_CPU_START_METHOD = os.environ.get("EXECUTOR_CPU_START_METHOD", "spawn")
+# Starlette's threadpool for sync endpoints and sync response iterators (S3 recording streams,
+# file downloads, ZIP export); Mongo calls use io_mongo instead. anyio's default is 40
+STARLETTE_THREADPOOL_SIZE = int(os.environ.get("STARLETTE_THREADPOOL_SIZE", "40"))
+
+
+def _workers(name: str, default: int) -> int:
+    return max(1, int(os.environ.get(f"EXECUTOR_{name.upper()}_WORKERS", str(default))))
+
+
+class _PoolStats:
+    """Queue depth, in-flight work and busy time of one executor."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.created = time.monotonic()
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+        self._lock = threading.Lock()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self.started - self.completed - self.failed
+            elapsed = max(time.monotonic() - self.created, 1e-9)
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.submitted - self.started,
+                "active": active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "utilization": round(active / self.max_workers, 3),
+                "busy_ratio": round(self.busy_s / (elapsed * self.max_workers), 4),
+                "avg_wait_ms": round(self.wait_s / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self.busy_s / finished * 1000, 2) if finished else 0.0,
+            }
+
+
+class InstrumentedThreadPool(ThreadPoolExecutor):
+    """ThreadPoolExecutor that tracks how long work waits for a thread and how busy the pool is."""
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.stats = _PoolStats(max_workers)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        stats = self.stats
+        queued_at = time.monotonic()
+
+        def run():
+            start = time.monotonic()
+            with stats._lock:
+                stats.started += 1
+                stats.wait_s += start - queued_at
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with stats._lock:
+                    stats.busy_s += time.monotonic() - start
+                    if ok:
+                        stats.completed += 1
+                    else:
+                        stats.failed += 1
+
+        with stats._lock:
+            stats.submitted += 1
+        return super().submit(run)
+
+
+class InstrumentedProcessPool(ProcessPoolExecutor):
+    """ProcessPoolExecutor with pending/completed counters; per-task timing stays in the parent."""
+
+    def __init__(self, name: str, max_workers: int, start_method: str):
+        super().__init__(max_workers=max_workers, mp_context=multiprocessing.get_context(start_method))
+        self.name = name
+        self.stats = _PoolStats(max_workers)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        stats = self.stats
+        submitted_at = time.monotonic()
+        with stats._lock:
+            stats.submitted += 1
+            # Children do not report when they pick work up, so submitted work counts as started
+            stats.started += 1
+        future = super().submit(fn, *args, **kwargs)
+
+        def done(f: Future):
+            with stats._lock:
+                stats.busy_s += time.monotonic() - submitted_at
+                if f.cancelled() or f.exception() is not None:
+                    stats.failed += 1
+                else:
+                    stats.completed += 1
+
+        future.add_done_callback(done)
+        return future
+
+
+_pools: Dict[str, InstrumentedThreadPool] = {}
+_cpu_pool: Optional[InstrumentedProcessPool] = None
+_pools_lock = threading.Lock()
+
+
+def get_executor(name: str) -> InstrumentedThreadPool:
+    """Named thread pool, created on first use with EXECUTOR_<NAME>_WORKERS threads."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = InstrumentedThreadPool(name, _workers(name, EXECUTOR_DEFAULTS.get(name, 4)))
+                _pools[name] = pool
+    return pool
+
+
+def get_cpu_pool() -> Optional[InstrumentedProcessPool]:
+    """Shared process pool for CPU-bound work, or None when EXECUTOR_CPU_WORKERS=0."""
+    global _cpu_pool
+    if EXECUTOR_CPU_WORKERS <= 0:
+        return None
+    # A child that died (e.g. OOM-killed) breaks the whole pool; replace it rather than failing forever
+    if _cpu_pool is None or _cpu_pool._broken:
+        with _pools_lock:
+            if _cpu_pool is None or _cpu_pool._broken:
+                if _cpu_pool is not None:
+                    logger.warning("CPU process pool is broken, starting a new one")
+                    _cpu_pool.shutdown(wait=False, cancel_futures=True)
+                _cpu_pool = InstrumentedProcessPool("cpu", EXECUTOR_CPU_WORKERS, EXECUTOR_CPU_START_METHOD)
+    return _cpu_pool
+
+
+async def run_in(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call in the named thread pool, keeping the caller's context (trace spans)."""
+    loop = asyncio.get_event_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(name), functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def configure_starlette_threadpool(size: int = STARLETTE_THREADPOOL_SIZE):
+    """Resize the anyio threadpool that runs sync endpoints; call from inside the running loop."""
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = size
+
+
+def _starlette_stats() -> Optional[Dict[str, Any]]:
+    try:
+        from anyio import to_thread
+        limiter = to_thread.current_default_thread_limiter()
+        stats = limiter.statistics()
+    except Exception:
+        # No running event loop (e.g. called from a worker thread)
+        return None
+    total = limiter.total_tokens
+    return {
+        "max_workers": total,
+        "queued": stats.tasks_waiting,
+        "active": stats.borrowed_tokens,
+        "utilization": round(stats.borrowed_tokens / total, 3) if total else 0.0,
+    }
+
+
+def executor_metrics() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and utilization of every executor created so far."""
+    with _pools_lock:
+        pools = dict(_pools)
+        cpu_pool = _cpu_pool
+    result = {name: pool.stats.as_dict() for name, pool in sorted(pools.items())}
+    if cpu_pool is not None:
+        result["cpu"] = cpu_pool.stats.as_dict()
+    starlette = _starlette_stats()
+    if starlette is not None:
+        result["starlette"] = starlette
+    return result
+
+
+def shutdown_executors(wait: bool = False):
+    """Stop the pools on app shutdown; running threads finish, queued work is dropped."""
+    global _cpu_pool
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        cpu_pool, _cpu_pool = _cpu_pool, None
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
+    if cpu_pool is not None:
+        cpu_pool.shutdown(wait=wait, cancel_futures=True)
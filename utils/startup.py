@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from utils.executors import run_in
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "background" warms subsystems after the worker starts serving, "blocking" finishes before it
+# accepts requests, "off" leaves everything to first use
+STARTUP_PREWARM = os.environ.get("STARTUP_PREWARM", "background").lower()
+
+
+def _warm_mongodb():
+    from services.livekit_api.mongodb.config import MongodbClient
+    from services.livekit_api.mongodb.db import ensure_indexes
+    MongodbClient().ping()
+    if not ensure_indexes():
+        raise RuntimeError("MongoDB indexes not created; retried on first use")
+
+
+def _warm_summarizer():
+    from services.conversation_summarizer.conversation_summarizer import get_summarizer
+    get_summarizer()
+
+
+def _warm_rag():
+    from services.rag import vector_db, vector_query  # noqa: F401 - llama-index import cost
+    from services.rag.config import get_rag_config
+    from services.rag.embeddings import warm_embed_model
+    from services.rag.sparse import warm_sparse_model
+    get_rag_config()
+    warm_embed_model()
+    warm_sparse_model()
+
+
+def _warm_extraction():
+    from services.data_extraction.extract_data import get_client
+    get_client()
+
+
+# Independent subsystems and the named executor each warms in (so warm-up shows in
+# /executor-metrics and shares the pools' budgets); each is also initialized lazily on
+# first use if warming is off or fails
+PREWARM_TASKS: Dict[str, Tuple[str, Callable[[], None]]] = {
+    "mongodb": ("io_mongo", _warm_mongodb),
+    "summarizer": ("embedding", _warm_summarizer),
+    "rag": ("embedding", _warm_rag),
+    "extraction": ("extraction_http", _warm_extraction),
+}
+
+# Seconds each subsystem took to warm, or the error that stopped it
+prewarm_status: Dict[str, Dict[str, object]] = {}
+
+
+async def _warm(name: str, pool: str, init: Callable[[], None]):
+    start = time.perf_counter()
+    try:
+        await run_in(pool, init)
+        prewarm_status[name] = {"ok": True, "seconds": round(time.perf_counter() - start, 3)}
+        logger.info("Prewarmed %s in %.2fs", name, time.perf_counter() - start)
+    except Exception as e:
+        # A subsystem that cannot start should not take the whole service down
+        prewarm_status[name] = {"ok": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+        logger.error(f"Failed to prewarm {name}: {str(e)}")
+
+
+async def prewarm(mode: str = STARTUP_PREWARM) -> Optional[asyncio.Task]:
+    """
+    Initialize the subsystems in parallel from the app lifespan.
+
+    Returns:
+        The running task in "background" mode (cancel it on shutdown), otherwise None
+    """
+    if mode == "off":
+        return None
+    work = asyncio.gather(*(_warm(name, pool, init) for name, (pool, init) in PREWARM_TASKS.items()))
+    if mode == "blocking":
+        await work
+        return None
+    return asyncio.ensure_future(work)
@@ -0,0 +1,238 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from cachetools import LRUCache
+from dotenv import load_dotenv
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+from pymongo import monitoring
+from starlette.routing import Match
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+# "otlp" exports to OTEL_EXPORTER_OTLP_(TRACES_)ENDPOINT, "console" prints spans, "none" is a no-op.
+# Defaults to otlp when an endpoint is configured and to none otherwise.
+OTEL_TRACES_EXPORTER = os.environ.get(
+    "OTEL_TRACES_EXPORTER",
+    "otlp" if os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT") or os.environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") else "none",
+).lower()
+OTEL_SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "nexus-service")
+
+# Internal steps range from sub-millisecond cache hits to minute-long LLM runs and partitions
+OPERATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is complete", ["method", "route"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ["method", "route"], multiprocess_mode="livesum"
+)
+OPERATION_LATENCY = Histogram(
+    "operation_duration_seconds",
+    "Latency of internal steps (partition, Mongo, Qdrant, embedding, LLM, LiveKit)",
+    ["operation", "status"],
+    buckets=OPERATION_BUCKETS,
+)
+
+tracer = trace.get_tracer("nexus-service")
+
+# (method, path) -> route template; bounded since paths carry IDs. Only touched from the event loop.
+_route_cache: "LRUCache[Tuple[str, str], str]" = LRUCache(maxsize=4096)
+
+_tracing_configured = False
+_tracing_lock = threading.Lock()
+
+
+def setup_tracing():
+    """
+    Install the OpenTelemetry SDK when an exporter is configured. Without one the API's
+    default no-op tracer stays in place and spans cost almost nothing.
+    """
+    global _tracing_configured
+    with _tracing_lock:
+        if _tracing_configured or OTEL_TRACES_EXPORTER in ("", "none"):
+            return
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if OTEL_TRACES_EXPORTER == "console":
+            exporter = ConsoleSpanExporter()
+        else:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+
+        provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        _tracing_configured = True
+        logger.info(f"OpenTelemetry tracing enabled ({OTEL_TRACES_EXPORTER} exporter)")
+
+
+def shutdown_tracing():
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+@contextmanager
+def span(operation: str, **attributes: Any) -> Iterator[Any]:
+    """Time an internal step into `operation_duration_seconds` and a trace span of the same name."""
+    start = time.perf_counter()
+    status = "ok"
+    with tracer.start_as_current_span(operation, attributes=attributes or None) as current:
+        try:
+            yield current
+        except BaseException as e:
+            status = "error"
+            current.record_exception(e)
+            current.set_status(Status(StatusCode.ERROR, str(e)))
+            raise
+        finally:
+            if METRICS_ENABLED:
+                OPERATION_LATENCY.labels(operation, status).observe(time.perf_counter() - start)
+
+
+def traced(operation: str) -> Callable:
+    """Decorator form of `span` for sync and async functions."""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(operation):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every MongoDB command (find, insert, update, aggregate, ...) from the driver's own events."""
+
+    def __init__(self):
+        self._inflight: Dict[Any, Any] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        self._inflight[(event.request_id, event.connection_id)] = tracer.start_span(
+            f"mongodb.{event.command_name}",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": "mongodb", "db.name": event.database_name},
+        )
+
+    def _finish(self, event, status: str):
+        current = self._inflight.pop((event.request_id, event.connection_id), None)
+        if current is not None:
+            if status == "error":
+                current.set_status(Status(StatusCode.ERROR, str(getattr(event, "failure", ""))))
+            current.end()
+        if METRICS_ENABLED:
+            OPERATION_LATENCY.labels(f"mongodb.{event.command_name}", status).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, "error")
+
+
+# Registered at import so it applies to every MongoClient created afterwards (all are lazy)
+monitoring.register(MongoCommandListener())
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """Route template for a request (e.g. `/livekit/calls/{call_id}`); raw paths would explode label cardinality."""
+    app = scope.get("app")
+    key = (scope["method"], scope["path"])
+    label = _route_cache.get(key)
+    if label is not None:
+        return label
+    label = "unmatched"
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            label = route.path
+            break
+        if match == Match.PARTIAL and label == "unmatched":
+            label = route.path
+    _route_cache[key] = label
+    return label
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts, latency and in-flight requests, and
+    a server span per request continuing any incoming W3C trace context.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming (SSE, downloads) is timed until
+    the last chunk without buffering.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_label(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers") or []}
+        in_flight = HTTP_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            with tracer.start_as_current_span(
+                f"{method} {route}",
+                context=propagate.extract(headers),
+                kind=SpanKind.SERVER,
+                attributes={"http.request.method": method, "http.route": route},
+            ) as current:
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    current.set_attribute("http.response.status_code", status_code)
+        finally:
+            in_flight.dec()
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+
+
+def metrics_payload() -> bytes:
+    """Prometheus exposition of this process, or of all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
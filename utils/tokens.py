@@ -0,0 +1,56 @@
+import logging
+import os
+import threading
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# tiktoken encoding used to budget prompts; an approximation for non-OpenAI models
+TOKENIZER_ENCODING = os.environ.get("TOKENIZER_ENCODING", "cl100k_base")
+# Characters per token assumed when the encoding cannot be loaded (e.g. offline hosts)
+FALLBACK_CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; None when it is unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    logger.warning(f"tiktoken encoding {TOKENIZER_ENCODING} unavailable, estimating tokens: {str(e)}")
+                    _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """Split text into consecutive pieces of at most `max_tokens` tokens."""
+    if max_tokens <= 0 or not text:
+        return [text] if text else []
+    encoding = _get_encoding()
+    if encoding is None:
+        step = max_tokens * FALLBACK_CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]